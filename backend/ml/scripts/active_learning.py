@@ -0,0 +1,201 @@
+import argparse
+import heapq
+import json
+import os
+import sys
+import time
+from PIL import Image, ImageOps
+from detect import DEFAULT_LABELS, load_labels, load_model, run_batch_inference
+from phash import IMAGE_EXTENSIONS
+
+DEFAULT_WEIGHTS = {'confidence': 1.0, 'margin': 1.0, 'flip': 1.0}
+EMPTY_UNCERTAINTY = 0.5
+MATCH_IOU = 0.5
+MAX_PRE_ANNOTATIONS = 20
+
+def iter_images(directory):
+    """Image paths under a directory in a stable order, yielded without listing the whole tree."""
+    for root, dirs, files in os.walk(directory):
+        dirs.sort()
+        for name in sorted(files):
+            if name.lower().endswith(IMAGE_EXTENSIONS):
+                yield os.path.join(root, name)
+
+def iou(a, b):
+    ix = max(0.0, min(a[2], b[2]) - max(a[0], b[0]))
+    iy = max(0.0, min(a[3], b[3]) - max(a[1], b[1]))
+    inter = ix * iy
+    union = (a[2] - a[0]) * (a[3] - a[1]) + (b[2] - b[0]) * (b[3] - b[1]) - inter
+    return inter / union if union > 0 else 0.0
+
+def unflip(detections):
+    """Map boxes predicted on a horizontally flipped image back to the original."""
+    return [dict(d, bbox=[1.0 - d['bbox'][2], d['bbox'][1], 1.0 - d['bbox'][0], d['bbox'][3]])
+            for d in detections]
+
+def least_confidence(detections):
+    """1 - the strongest detection's confidence."""
+    if not detections:
+        return EMPTY_UNCERTAINTY
+    return 1.0 - max(d['confidence'] for d in detections)
+
+def class_margin(detections):
+    """1 - the gap between the top box and the best other-class box over the same region.
+
+    NMS is per class, so at a low confidence threshold a region the model
+    cannot make up its mind about keeps one box per competing disease.
+    """
+    if not detections:
+        return EMPTY_UNCERTAINTY
+    top = max(detections, key=lambda d: d['confidence'])
+    rival = max((d['confidence'] for d in detections
+                 if d['class'] != top['class'] and iou(d['bbox'], top['bbox']) >= MATCH_IOU), default=0.0)
+    return 1.0 - (top['confidence'] - rival)
+
+def flip_disagreement(detections, flipped):
+    """Confidence-weighted share of boxes with no same-class IoU match in the flipped prediction."""
+    if not detections and not flipped:
+        return 0.0
+    total = unmatched = 0.0
+    for ours, theirs in ((detections, flipped), (flipped, detections)):
+        for d in ours:
+            total += d['confidence']
+            if not any(t['class'] == d['class'] and iou(t['bbox'], d['bbox']) >= MATCH_IOU for t in theirs):
+                unmatched += d['confidence']
+    return unmatched / total if total else 0.0
+
+def score_batch(model, paths, conf_threshold, weights, use_flip=True):
+    """(path, score, components, detections) per readable image in one forward pass.
+
+    Each image is run alongside its mirror image when flip scoring is on.
+    """
+    images, kept = [], []
+    for path in paths:
+        try:
+            with Image.open(path) as image:
+                image.draft('RGB', (1280, 1280))
+                images.append(ImageOps.exif_transpose(image).convert('RGB'))
+            kept.append(path)
+        except Exception as e:
+            print(json.dumps({'image': path, 'error': str(e)}), file=sys.stderr)
+    if not images:
+        return []
+
+    batch = images + [ImageOps.mirror(image) for image in images] if use_flip else images
+    results = run_batch_inference(model, batch, conf_threshold)
+    scored = []
+    for i, path in enumerate(kept):
+        detections = results[i]
+        components = {'confidence': least_confidence(detections), 'margin': class_margin(detections)}
+        if use_flip:
+            components['flip'] = flip_disagreement(detections, unflip(results[len(kept) + i]))
+        total = sum(weights.get(k, 0.0) for k in components)
+        score = sum(weights.get(k, 0.0) * v for k, v in components.items()) / total if total else 0.0
+        scored.append((path, score, components, detections))
+    return scored
+
+def select(model, pool_dir, top_k=300, batch_size=8, conf_threshold=0.05, weights=None,
+           use_flip=True, exclude=()):
+    """Stream the pool and keep the top_k most uncertain images in a min-heap.
+
+    Memory is bounded by top_k and batch_size regardless of pool size.
+    """
+    weights = weights or DEFAULT_WEIGHTS
+    exclude = set(exclude)
+    heap, seq = [], 0
+    stats = {'scanned': 0, 'excluded': 0, 'seconds': 0.0}
+    start = time.perf_counter()
+
+    def consume(paths):
+        nonlocal seq
+        for path, score, components, detections in score_batch(model, paths, conf_threshold, weights, use_flip):
+            entry = (score, seq, path, components, detections)
+            seq += 1
+            if len(heap) < top_k:
+                heapq.heappush(heap, entry)
+            elif score > heap[0][0]:
+                heapq.heapreplace(heap, entry)
+        stats['scanned'] += len(paths)
+        if stats['scanned'] % (batch_size * 100) < batch_size:
+            print(json.dumps({'scanned': stats['scanned'], 'threshold': heap[0][0] if heap else None}),
+                  file=sys.stderr)
+
+    pending = []
+    for path in iter_images(pool_dir):
+        if os.path.relpath(path, pool_dir) in exclude:
+            stats['excluded'] += 1
+            continue
+        pending.append(path)
+        if len(pending) == batch_size:
+            consume(pending)
+            pending = []
+    if pending:
+        consume(pending)
+
+    stats['seconds'] = time.perf_counter() - start
+    ranked = sorted(heap, key=lambda e: (-e[0], e[1]))
+    return ranked, stats
+
+def load_exclusions(manifest_paths):
+    """Relative image paths already queued in earlier manifests."""
+    queued = set()
+    for manifest_path in manifest_paths or []:
+        try:
+            with open(manifest_path, 'r', encoding='utf-8') as f:
+                queued.update(item['image'] for item in json.load(f)['queue'])
+        except Exception as e:
+            raise RuntimeError(f"Failed to read queue manifest: {str(e)}")
+    return queued
+
+def write_manifest(path, ranked, pool_dir, model_path, labels, stats, weights):
+    """Labeling queue, most uncertain first, with the model's current guess as a pre-annotation."""
+    queue = []
+    for rank, (score, _, image_path, components, detections) in enumerate(ranked, 1):
+        detections = sorted(detections, key=lambda d: d['confidence'], reverse=True)[:MAX_PRE_ANNOTATIONS]
+        for det in detections:
+            det['disease'] = labels[det['class']] if det['class'] < len(labels) else str(det['class'])
+        queue.append({'rank': rank, 'image': os.path.relpath(image_path, pool_dir), 'score': score,
+                      'components': components, 'pre_annotations': detections})
+    manifest = {
+        'created': time.strftime('%Y-%m-%dT%H:%M:%S'),
+        'pool': os.path.abspath(pool_dir),
+        'model': os.path.abspath(model_path),
+        'weights': weights,
+        'stats': stats,
+        'queue': queue
+    }
+    tmp_path = path + '.tmp'
+    with open(tmp_path, 'w', encoding='utf-8') as f:
+        json.dump(manifest, f, indent=2)
+    os.replace(tmp_path, path)
+    return manifest
+
+def main():
+    parser = argparse.ArgumentParser()
+    parser.add_argument('--model', required=True, help='Path to YOLOv8 model')
+    parser.add_argument('--pool', required=True, help='Folder of unlabeled images (recursive)')
+    parser.add_argument('--output', required=True, help='Labeling queue manifest (JSON)')
+    parser.add_argument('--top-k', type=int, default=300, help='Images to queue')
+    parser.add_argument('--batch-size', type=int, default=8)
+    parser.add_argument('--conf', type=float, default=0.05, help='Low threshold so competing boxes survive')
+    parser.add_argument('--weights', type=json.loads, default=DEFAULT_WEIGHTS,
+                        help='JSON weights for confidence, margin and flip')
+    parser.add_argument('--no-flip', action='store_true', help='Skip the mirrored pass (halves inference)')
+    parser.add_argument('--exclude', nargs='+', help='Earlier manifests whose images are skipped')
+    parser.add_argument('--labels', default=DEFAULT_LABELS, help='diseases.json for slug names')
+    args = parser.parse_args()
+
+    try:
+        model = load_model(args.model)
+        labels = load_labels(args.labels)
+        ranked, stats = select(model, args.pool, args.top_k, args.batch_size, args.conf, args.weights,
+                               not args.no_flip, load_exclusions(args.exclude))
+        manifest = write_manifest(args.output, ranked, args.pool, args.model, labels, stats, args.weights)
+        print(json.dumps({'queued': len(manifest['queue']), 'stats': stats, 'output': args.output}))
+
+    except Exception as e:
+        print(json.dumps({'error': str(e)}))
+        exit(1)
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,254 @@
+import argparse
+import datetime
+import json
+import os
+import sys
+from collections import Counter
+
+NO_DETECTION = 'none'
+# Not a disease: an image with only healthy detections counts as disease-free
+HEALTHY = 'healthy'
+SKETCH_BINS = 200
+
+def iso_week(ts):
+    """'YYYY-Www' for an epoch timestamp or ISO-8601 string, 'unknown' otherwise."""
+    try:
+        if isinstance(ts, (int, float)):
+            when = datetime.datetime.fromtimestamp(ts, datetime.timezone.utc)
+        else:
+            when = datetime.datetime.fromisoformat(str(ts).replace('Z', '+00:00'))
+    except (TypeError, ValueError, OSError):
+        return 'unknown'
+    year, week, _ = when.isocalendar()
+    return f'{year}-W{week:02d}'
+
+def crop_of(slug):
+    """Crop prefix of a disease slug (cocoa_black_pod -> cocoa)."""
+    return slug.split('_', 1)[0] if '_' in slug else 'unknown'
+
+class ConfidenceSketch:
+    """Fixed-bin histogram over [0, 1]: O(1) updates, mergeable by addition, quantile error <= 1/bins."""
+
+    def __init__(self, bins=SKETCH_BINS, counts=None):
+        self.bins = bins
+        self.counts = counts or [0] * bins
+
+    def add(self, value):
+        self.counts[min(int(value * self.bins), self.bins - 1)] += 1
+
+    def merge(self, other):
+        self.counts = [a + b for a, b in zip(self.counts, other.counts)]
+
+    def total(self):
+        return sum(self.counts)
+
+    def quantile(self, q):
+        """Upper edge of the bin holding the q-th quantile."""
+        target = q * self.total()
+        seen = 0
+        for i, count in enumerate(self.counts):
+            seen += count
+            if count and seen >= target:
+                return (i + 1) / self.bins
+        return None
+
+class IncidenceAggregates:
+    """Mergeable counts and sketches built in one pass over result records."""
+
+    def __init__(self, labels=()):
+        self.labels = list(labels)
+        self.images = Counter()
+        self.by_crop_week = Counter()
+        self.by_region = Counter()
+        self.confidence = {}
+
+    def _slugs(self, record):
+        slugs = {}
+        for det in record.get('detections') or []:
+            if not isinstance(det, dict):
+                continue
+            slug = det.get('disease')
+            if slug is None:
+                cls = det.get('class')
+                slug = self.labels[cls] if isinstance(cls, int) and cls < len(self.labels) else str(cls)
+            if slug == HEALTHY:
+                continue
+            slugs[slug] = max(slugs.get(slug, 0.0), det.get('confidence', 0.0))
+        return slugs
+
+    def add(self, record):
+        """Fold one detect.py result record into the aggregates."""
+        if 'error' in record:
+            return
+        week = iso_week(record.get('ts', record.get('timestamp')))
+        region = record.get('region', 'unknown')
+        slugs = self._slugs(record) or {NO_DETECTION: None}
+        crops = {record['crop']} if record.get('crop') else {crop_of(s) for s in slugs if s != NO_DETECTION}
+
+        for crop in crops or {'unknown'}:
+            self.images[f'{crop}|{week}'] += 1
+        self.images[f'region:{region}'] += 1
+        for slug, conf in slugs.items():
+            for crop in crops or {'unknown'}:
+                self.by_crop_week[f'{crop}|{week}|{slug}'] += 1
+            self.by_region[f'{region}|{slug}'] += 1
+            if conf is not None:
+                self.confidence.setdefault(slug, ConfidenceSketch()).add(conf)
+
+    def merge(self, other):
+        """Combine with aggregates built from other lines (another shard or day)."""
+        self.images.update(other.images)
+        self.by_crop_week.update(other.by_crop_week)
+        self.by_region.update(other.by_region)
+        for slug, sketch in other.confidence.items():
+            self.confidence.setdefault(slug, ConfidenceSketch()).merge(sketch)
+
+    def subtract(self, other):
+        """Remove aggregates merged earlier (the previous snapshot of a shard)."""
+        for counter, other_counter in ((self.images, other.images), (self.by_crop_week, other.by_crop_week),
+                                       (self.by_region, other.by_region)):
+            counter.subtract(other_counter)
+            for key in [k for k, v in counter.items() if v <= 0]:
+                del counter[key]
+        for slug, sketch in other.confidence.items():
+            if slug in self.confidence:
+                own = self.confidence[slug]
+                own.counts = [max(a - b, 0) for a, b in zip(own.counts, sketch.counts)]
+                if not own.total():
+                    del self.confidence[slug]
+
+    def to_dict(self):
+        return {
+            'images': dict(self.images),
+            'by_crop_week': dict(self.by_crop_week),
+            'by_region': dict(self.by_region),
+            'confidence': {slug: sketch.counts for slug, sketch in self.confidence.items()}
+        }
+
+    @classmethod
+    def from_dict(cls, data, labels=()):
+        aggregates = cls(labels)
+        aggregates.images.update(data.get('images', {}))
+        aggregates.by_crop_week.update(data.get('by_crop_week', {}))
+        aggregates.by_region.update(data.get('by_region', {}))
+        for slug, counts in data.get('confidence', {}).items():
+            aggregates.confidence[slug] = ConfidenceSketch(len(counts), counts)
+        return aggregates
+
+    def report(self):
+        """Incidence rates and confidence quantiles from the current aggregates."""
+        crop_week = {}
+        for key, count in sorted(self.by_crop_week.items()):
+            crop, week, slug = key.split('|')
+            crop_week.setdefault(crop, {}).setdefault(week, {})[slug] = {
+                'images': count, 'incidence': count / self.images[f'{crop}|{week}']}
+        region = {}
+        for key, count in sorted(self.by_region.items()):
+            name, slug = key.split('|')
+            region.setdefault(name, {})[slug] = {'images': count,
+                                                 'incidence': count / self.images[f'region:{name}']}
+        confidence = {slug: {'count': s.total(), 'p10': s.quantile(0.1), 'p50': s.quantile(0.5),
+                             'p90': s.quantile(0.9)} for slug, s in sorted(self.confidence.items())}
+        return {'crop_week': crop_week, 'region': region, 'confidence': confidence}
+
+def load_state(state_path, labels=()):
+    """Aggregates, per-file read offsets and merged shard snapshots from the last run."""
+    if not state_path or not os.path.exists(state_path):
+        return IncidenceAggregates(labels), {}, {}
+    try:
+        with open(state_path, 'r', encoding='utf-8') as f:
+            state = json.load(f)
+        return (IncidenceAggregates.from_dict(state['aggregates'], labels), state['offsets'],
+                state.get('shards', {}))
+    except Exception as e:
+        raise RuntimeError(f"Failed to load analytics state: {str(e)}")
+
+def save_state(state_path, aggregates, offsets, shards=None):
+    tmp_path = state_path + '.tmp'
+    with open(tmp_path, 'w', encoding='utf-8') as f:
+        json.dump({'aggregates': aggregates.to_dict(), 'offsets': offsets, 'shards': shards or {}}, f)
+    os.replace(tmp_path, state_path)
+
+def merge_shard(aggregates, shards, shard_path, labels=()):
+    """Fold another state file into aggregates, adding only what changed since it was last merged.
+
+    The shard's aggregates and offsets are kept under its path in shards, so
+    merging the same checkpoint again is a no-op and a grown one contributes
+    just its new lines. Its offsets stay separate from this state's own.
+    """
+    key = os.path.abspath(shard_path)
+    if not os.path.exists(shard_path):
+        raise RuntimeError(f"Shard state not found: {shard_path}")
+    other, other_offsets, _ = load_state(shard_path, labels)
+    previous = shards.get(key)
+    aggregates.merge(other)
+    if previous:
+        aggregates.subtract(IncidenceAggregates.from_dict(previous['aggregates'], labels))
+    shards[key] = {'aggregates': other.to_dict(), 'offsets': other_offsets}
+
+def consume(path, aggregates, offsets):
+    """Read complete lines appended since the stored offset; returns lines read.
+
+    A file smaller than its stored offset was rotated and is read again from
+    the start. A trailing line without a newline is still being written and
+    is left for the next run. Lines that are not JSON objects are skipped,
+    and a missing file is skipped with a warning.
+    """
+    if not os.path.exists(path):
+        print(json.dumps({'log': path, 'warning': 'not found, skipped'}), file=sys.stderr)
+        return 0
+    key = os.path.abspath(path)
+    offset = offsets.get(key, 0)
+    if os.path.getsize(path) < offset:
+        offset = 0
+    lines = 0
+    with open(path, 'rb') as f:
+        f.seek(offset)
+        for raw in f:
+            if not raw.endswith(b'\n'):
+                break
+            offset += len(raw)
+            try:
+                record = json.loads(raw)
+            except ValueError:
+                continue
+            # Bare detection lists (single-image output) carry no farm or time context
+            if not isinstance(record, dict):
+                continue
+            aggregates.add(record)
+            lines += 1
+    offsets[key] = offset
+    return lines
+
+def main():
+    parser = argparse.ArgumentParser()
+    parser.add_argument('logs', nargs='*', help='detect.py JSON-lines result files')
+    parser.add_argument('--state', help='Checkpoint with aggregates and read offsets (updated in place)')
+    parser.add_argument('--merge', nargs='+', help='Merge other state files into --state')
+    parser.add_argument('--labels', default=os.path.join(os.path.dirname(__file__), '..', 'data', 'diseases.json'),
+                        help='diseases.json for class-index to slug mapping')
+    args = parser.parse_args()
+
+    try:
+        with open(args.labels, 'r', encoding='utf-8') as f:
+            labels = list(json.load(f).keys())
+        aggregates, offsets, shards = load_state(args.state, labels)
+
+        read = 0
+        for path in args.logs:
+            read += consume(path, aggregates, offsets)
+        for other_path in args.merge or []:
+            merge_shard(aggregates, shards, other_path, labels)
+
+        if args.state:
+            save_state(args.state, aggregates, offsets, shards)
+        report = aggregates.report()
+        report['lines_read'] = read
+        print(json.dumps(report, indent=2))
+
+    except Exception as e:
+        print(json.dumps({'error': str(e)}))
+        exit(1)
+
+if __name__ == '__main__':
+    main()
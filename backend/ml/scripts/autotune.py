@@ -0,0 +1,215 @@
+import argparse
+import itertools
+import json
+import os
+import platform
+import subprocess
+import sys
+import time
+import torch
+from PIL import Image
+import numpy as np
+
+DEFAULT_PROFILE = os.path.join(os.path.dirname(__file__), '..', 'data', 'host_profiles.json')
+SYNTHETIC_SIZES = [(640, 480), (1280, 960), (3000, 4000)]
+BACKEND_SUFFIXES = {'torch': None, 'onnx': '.onnx'}
+
+def host_key():
+    """Identify the machine by CPU model and logical core count."""
+    cpu = platform.processor() or platform.machine()
+    try:
+        with open('/proc/cpuinfo', 'r', encoding='utf-8') as f:
+            for line in f:
+                if line.startswith('model name'):
+                    cpu = line.split(':', 1)[1].strip()
+                    break
+    except OSError:
+        pass
+    return f"{cpu}|{os.cpu_count()}"
+
+def host_profile_path(profile_path=None):
+    """Profile file to read and write: the given path, else $YCD_ML_PROFILE, else DEFAULT_PROFILE."""
+    return profile_path or os.environ.get('YCD_ML_PROFILE') or DEFAULT_PROFILE
+
+def load_host_profile(profile_path=None):
+    """Return the tuned settings for this host, or None if it was never tuned."""
+    path = host_profile_path(profile_path)
+    if not os.path.exists(path):
+        return None
+    try:
+        with open(path, 'r', encoding='utf-8') as f:
+            return json.load(f).get(host_key())
+    except Exception as e:
+        raise RuntimeError(f"Failed to load host profile: {str(e)}")
+
+def save_host_profile(profile, profile_path=None):
+    """Store the tuned settings for this host alongside other hosts' profiles."""
+    profile_path = host_profile_path(profile_path)
+    profiles = {}
+    if os.path.exists(profile_path):
+        with open(profile_path, 'r', encoding='utf-8') as f:
+            profiles = json.load(f)
+    profiles[host_key()] = profile
+    tmp_path = profile_path + '.tmp'
+    with open(tmp_path, 'w', encoding='utf-8') as f:
+        json.dump(profiles, f, indent=2)
+    os.replace(tmp_path, profile_path)
+
+def apply_threads(intra_op, inter_op):
+    """Set torch thread pools. Must run before the first parallel torch op."""
+    if intra_op:
+        torch.set_num_threads(intra_op)
+    if inter_op:
+        try:
+            torch.set_num_interop_threads(inter_op)
+        except RuntimeError:
+            # Already fixed for this process; only the intra-op setting applies
+            pass
+
+def resolve_model_path(model_path, backend):
+    """Path of the exported model for a backend, falling back to the original weights.
+
+    The fallback also applies when the backend's runtime is missing here, so a
+    profile tuned with onnxruntime installed keeps working without it.
+    """
+    suffix = BACKEND_SUFFIXES.get(backend)
+    if not suffix or backend not in available_backends():
+        return model_path
+    exported = os.path.splitext(model_path)[0] + suffix
+    return exported if os.path.exists(exported) else model_path
+
+def available_backends():
+    """Backends that can run on this host."""
+    backends = ['torch']
+    try:
+        import onnxruntime  # noqa: F401
+        backends.append('onnx')
+    except ImportError:
+        pass
+    return backends
+
+def export_backend(model_path, backend):
+    """Export the weights for a backend once and return the exported path."""
+    exported = resolve_model_path(model_path, backend)
+    if backend == 'torch' or exported != model_path:
+        return exported
+    from detect import load_model
+    return load_model(model_path).export(format=backend, dynamic=True)
+
+def synthetic_images(sizes=SYNTHETIC_SIZES, seed=0):
+    """Random-noise RGB images at typical phone resolutions."""
+    rng = np.random.default_rng(seed)
+    return [Image.fromarray(rng.integers(0, 256, (h, w, 3), dtype=np.uint8)) for w, h in sizes]
+
+def probe(config, model_path, image_paths, rounds):
+    """Benchmark one configuration in the current process."""
+    apply_threads(config['intra_op_threads'], config['inter_op_threads'])
+    from detect import load_model, process_image, run_buffered_inference
+    from preprocess import LetterboxBuffer
+
+    model = load_model(resolve_model_path(model_path, config['backend']))
+    images = synthetic_images() + [process_image(p).convert('RGB') for p in image_paths]
+    batch = (images * config['batch_size'])[:max(config['batch_size'], len(images))]
+    buffer = LetterboxBuffer(config['batch_size'], config['imgsz'])
+
+    run_buffered_inference(model, buffer, batch[:config['batch_size']], 0.25)
+    latencies = []
+    started = time.perf_counter()
+    for _ in range(rounds):
+        for i in range(0, len(batch), config['batch_size']):
+            start = time.perf_counter()
+            run_buffered_inference(model, buffer, batch[i:i + config['batch_size']], 0.25)
+            latencies.append((time.perf_counter() - start) * 1000)
+    elapsed = time.perf_counter() - started
+
+    return {
+        'images_per_sec': rounds * len(batch) / elapsed,
+        'p50_batch_ms': float(np.percentile(latencies, 50)),
+        'p95_batch_ms': float(np.percentile(latencies, 95))
+    }
+
+def run_probe(config, model_path, image_paths, rounds):
+    """Run probe() in a fresh interpreter so thread-pool sizes take effect."""
+    cmd = [sys.executable, os.path.abspath(__file__), '--probe', json.dumps(config),
+           '--model', model_path, '--rounds', str(rounds), '--images'] + list(image_paths)
+    proc = subprocess.run(cmd, capture_output=True, text=True)
+    try:
+        return json.loads(proc.stdout.strip().splitlines()[-1])
+    except (ValueError, IndexError):
+        return {'error': proc.stderr.strip()[-500:] or 'probe produced no output'}
+
+def candidate_configs(intra_op, inter_op, batch_sizes, imgszs, backends):
+    """Cartesian product of the candidate settings."""
+    for intra, inter, batch, imgsz, backend in itertools.product(intra_op, inter_op, batch_sizes, imgszs, backends):
+        yield {'intra_op_threads': intra, 'inter_op_threads': inter, 'batch_size': batch,
+               'imgsz': imgsz, 'backend': backend}
+
+def pick_best(results, latency_target_ms):
+    """Highest throughput whose p95 batch latency meets the target, else the lowest latency."""
+    ok = [r for r in results if 'error' not in r]
+    if not ok:
+        return None
+    within = [r for r in ok if r['p95_batch_ms'] <= latency_target_ms]
+    if within:
+        return max(within, key=lambda r: r['images_per_sec'])
+    return min(ok, key=lambda r: r['p95_batch_ms'])
+
+def autotune(model_path, image_paths=(), latency_target_ms=1000.0, intra_op=None, inter_op=None,
+             batch_sizes=(1, 4, 8), imgszs=(480, 640), backends=None, rounds=3,
+             profile_path=None):
+    """Benchmark the configuration grid and persist the winner for this host."""
+    cores = os.cpu_count() or 1
+    intra_op = intra_op or sorted({1, max(1, cores // 2), cores})
+    inter_op = inter_op or sorted({1, min(2, cores)})
+    backends = backends or available_backends()
+    missing = sorted(set(backends) - set(available_backends()))
+    if missing:
+        raise RuntimeError(f"Backend runtime not installed: {', '.join(missing)}")
+    for backend in backends:
+        export_backend(model_path, backend)
+
+    results = []
+    for config in candidate_configs(intra_op, inter_op, batch_sizes, imgszs, backends):
+        result = dict(config)
+        result.update(run_probe(config, model_path, image_paths, rounds))
+        results.append(result)
+        print(json.dumps(result), file=sys.stderr)
+
+    best = pick_best(results, latency_target_ms)
+    if best is None:
+        raise RuntimeError('Every autotune probe failed')
+    profile = {k: best[k] for k in ('intra_op_threads', 'inter_op_threads', 'batch_size', 'imgsz', 'backend')}
+    profile.update({'images_per_sec': best['images_per_sec'], 'p95_batch_ms': best['p95_batch_ms'],
+                    'latency_target_ms': latency_target_ms, 'tuned_at': time.time()})
+    save_host_profile(profile, profile_path)
+    return {'host': host_key(), 'profile': profile, 'candidates': len(results)}
+
+def main():
+    parser = argparse.ArgumentParser()
+    parser.add_argument('--model', required=True, help='Path to YOLOv8 model')
+    parser.add_argument('--images', nargs='*', default=[], help='Sample images in addition to synthetic ones')
+    parser.add_argument('--latency-target', type=float, default=1000.0, help='Max p95 batch latency (ms)')
+    parser.add_argument('--intra-op', type=int, nargs='+', help='Intra-op thread counts to try')
+    parser.add_argument('--inter-op', type=int, nargs='+', help='Inter-op thread counts to try')
+    parser.add_argument('--batch-sizes', type=int, nargs='+', default=[1, 4, 8], help='Batch sizes to try')
+    parser.add_argument('--imgsz', type=int, nargs='+', default=[480, 640], help='Input sizes to try')
+    parser.add_argument('--backends', nargs='+', choices=sorted(BACKEND_SUFFIXES), help='Backends to try')
+    parser.add_argument('--rounds', type=int, default=3, help='Timed passes per configuration')
+    parser.add_argument('--profile', help='Host profile file to update (default: $YCD_ML_PROFILE or data/host_profiles.json)')
+    parser.add_argument('--probe', help=argparse.SUPPRESS)
+    args = parser.parse_args()
+
+    try:
+        if args.probe:
+            print(json.dumps(probe(json.loads(args.probe), args.model, args.images, args.rounds)))
+            return
+        result = autotune(args.model, args.images, args.latency_target, args.intra_op, args.inter_op,
+                          args.batch_sizes, args.imgsz, args.backends, args.rounds, args.profile)
+        print(json.dumps(result))
+
+    except Exception as e:
+        print(json.dumps({'error': str(e)}))
+        exit(1)
+
+if __name__ == '__main__':
+    main()
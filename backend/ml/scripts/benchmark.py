@@ -0,0 +1,179 @@
+import argparse
+import json
+import os
+import platform
+import resource
+import subprocess
+import sys
+import tempfile
+import time
+import torch
+import ultralytics
+from PIL import Image
+import numpy as np
+from detect import load_labels, load_model, process_image, run_buffered_inference, run_inference
+from preprocess import LetterboxBuffer
+from visualize import draw_detections
+
+RESOLUTIONS = [(640, 480), (1280, 960), (4000, 3000)]
+DEFAULT_TOLERANCE = 0.10
+
+def build_tiny_model(output_path, num_classes):
+    """Save a randomly initialised YOLOv8n with our class count (no download needed)."""
+    from ultralytics import YOLO
+    from ultralytics.nn.tasks import DetectionModel
+
+    model = YOLO('yolov8n.yaml')
+    model.model = DetectionModel('yolov8n.yaml', nc=num_classes, verbose=False)
+    model.save(output_path)
+    return output_path
+
+def write_synthetic_images(directory, resolutions=RESOLUTIONS, seed=0):
+    """Random-noise JPEGs at phone-like resolutions."""
+    rng = np.random.default_rng(seed)
+    paths = []
+    for width, height in resolutions:
+        path = os.path.join(directory, f'synthetic_{width}x{height}.jpg')
+        Image.fromarray(rng.integers(0, 256, (height, width, 3), dtype=np.uint8)).save(path, quality=85)
+        paths.append(path)
+    return paths
+
+def percentiles(samples):
+    """p50/p95/p99 in milliseconds."""
+    values = np.asarray(samples) * 1000
+    return {f'p{q}': float(np.percentile(values, q)) for q in (50, 95, 99)}
+
+def metric(value, unit, better):
+    return {'value': value, 'unit': unit, 'better': better}
+
+def bench_cold_start(model_path, image_path, repeats):
+    """Wall time of a fresh `detect.py` process, import and model load included."""
+    script = os.path.join(os.path.dirname(os.path.abspath(__file__)), 'detect.py')
+    times = []
+    for _ in range(repeats):
+        start = time.perf_counter()
+        subprocess.run([sys.executable, script, '--model', model_path, '--image', image_path, '--no-profile'],
+                       check=True, stdout=subprocess.DEVNULL, stderr=subprocess.DEVNULL)
+        times.append(time.perf_counter() - start)
+    # ru_maxrss is the largest child seen so far, in kB on Linux
+    peak_rss = resource.getrusage(resource.RUSAGE_CHILDREN).ru_maxrss / 1024
+    return float(np.median(times)) * 1000, peak_rss
+
+def bench_warm_latency(model, image_paths, repeats):
+    """Single-image latency per resolution through the default run_inference path."""
+    results = {}
+    for path in image_paths:
+        run_inference(model, process_image(path), 0.25)
+        samples = []
+        for _ in range(repeats):
+            start = time.perf_counter()
+            run_inference(model, process_image(path), 0.25)
+            samples.append(time.perf_counter() - start)
+        results[os.path.basename(path)] = percentiles(samples)
+    return results
+
+def bench_batch_throughput(model, image_paths, batch_size, rounds):
+    """Images per second through the preallocated batch path."""
+    buffer = LetterboxBuffer(batch_size, 640)
+    batch = (image_paths * batch_size)[:batch_size]
+    run_buffered_inference(model, buffer, [process_image(p) for p in batch], 0.25)
+    start = time.perf_counter()
+    for _ in range(rounds):
+        run_buffered_inference(model, buffer, [process_image(p) for p in batch], 0.25)
+    return rounds * batch_size / (time.perf_counter() - start)
+
+def bench_visualize(image_path, output_path, repeats):
+    """Median draw_detections() time with a handful of boxes."""
+    detections = [{'bbox': [0.1 * i, 0.1 * i, 0.1 * i + 0.3, 0.1 * i + 0.3],
+                   'confidence': 0.5 + 0.1 * i, 'disease': 'cocoa_black_pod'} for i in range(5)]
+    times = []
+    for _ in range(repeats):
+        start = time.perf_counter()
+        if not draw_detections(image_path, detections, output_path):
+            raise RuntimeError('visualize.py failed to render')
+        times.append(time.perf_counter() - start)
+    return float(np.median(times)) * 1000
+
+def run_suite(model_path=None, repeats=20, batch_size=8, rounds=5):
+    """Run every benchmark and return a machine-readable report."""
+    with tempfile.TemporaryDirectory() as workdir:
+        model_path = model_path or build_tiny_model(os.path.join(workdir, 'tiny.pt'), len(load_labels()))
+        images = write_synthetic_images(workdir)
+        metrics = {}
+
+        cold_ms, child_rss = bench_cold_start(model_path, images[0], max(1, repeats // 10))
+        metrics['cold_start_ms'] = metric(cold_ms, 'ms', 'lower')
+        metrics['cold_start_peak_rss_mb'] = metric(child_rss, 'MB', 'lower')
+
+        model = load_model(model_path)
+        for name, stats in bench_warm_latency(model, images, repeats).items():
+            for q, value in stats.items():
+                metrics[f'warm_latency_{q}_ms[{name}]'] = metric(value, 'ms', 'lower')
+
+        metrics['batch_throughput_ips'] = metric(bench_batch_throughput(model, images, batch_size, rounds),
+                                                 'images/s', 'higher')
+        metrics['visualize_render_ms'] = metric(bench_visualize(images[-1], os.path.join(workdir, 'vis.jpg'),
+                                                                max(1, repeats // 2)), 'ms', 'lower')
+        metrics['peak_rss_mb'] = metric(resource.getrusage(resource.RUSAGE_SELF).ru_maxrss / 1024, 'MB', 'lower')
+
+    return {
+        'meta': {
+            'timestamp': time.time(),
+            'host': platform.node(),
+            'cpu_count': os.cpu_count(),
+            'python': platform.python_version(),
+            'torch': torch.__version__,
+            'ultralytics': ultralytics.__version__,
+            'torch_threads': torch.get_num_threads()
+        },
+        'metrics': metrics
+    }
+
+def compare(baseline, current, tolerance=DEFAULT_TOLERANCE):
+    """Flag metrics that got worse than the baseline by more than tolerance (relative)."""
+    regressions, rows = [], []
+    for name, base in baseline['metrics'].items():
+        if name not in current['metrics']:
+            continue
+        value = current['metrics'][name]['value']
+        change = (value - base['value']) / base['value'] if base['value'] else 0.0
+        worse = change > tolerance if base['better'] == 'lower' else change < -tolerance
+        row = {'metric': name, 'baseline': base['value'], 'current': value, 'change': change, 'regressed': worse}
+        rows.append(row)
+        if worse:
+            regressions.append(row)
+    return {'tolerance': tolerance, 'regressions': regressions, 'metrics': rows}
+
+def main():
+    parser = argparse.ArgumentParser()
+    parser.add_argument('--model', help='Model to benchmark (default: random-init YOLOv8n)')
+    parser.add_argument('--output', help='Write the JSON report here as well as to stdout')
+    parser.add_argument('--repeats', type=int, default=20, help='Warm latency samples per resolution')
+    parser.add_argument('--batch-size', type=int, default=8, help='Batch size for the throughput run')
+    parser.add_argument('--rounds', type=int, default=5, help='Batches for the throughput run')
+    parser.add_argument('--compare', nargs=2, metavar=('BASELINE', 'CURRENT'), help='Compare two saved reports')
+    parser.add_argument('--tolerance', type=float, default=DEFAULT_TOLERANCE, help='Allowed relative slowdown')
+    args = parser.parse_args()
+
+    try:
+        if args.compare:
+            reports = []
+            for path in args.compare:
+                with open(path, 'r', encoding='utf-8') as f:
+                    reports.append(json.load(f))
+            result = compare(reports[0], reports[1], args.tolerance)
+            print(json.dumps(result, indent=2))
+            exit(1 if result['regressions'] else 0)
+
+        report = run_suite(args.model, args.repeats, args.batch_size, args.rounds)
+        if args.output:
+            with open(args.output, 'w', encoding='utf-8') as f:
+                json.dump(report, f, indent=2)
+        print(json.dumps(report, indent=2))
+
+    except Exception as e:
+        print(json.dumps({'error': str(e)}))
+        exit(1)
+
+if __name__ == '__main__':
+    main()
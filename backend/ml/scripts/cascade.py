@@ -0,0 +1,124 @@
+import argparse
+import json
+import os
+import time
+from PIL import Image, ImageOps
+import numpy as np
+from detect import load_model, process_image, run_inference
+from phash import list_images
+
+HEALTHY = 'healthy'
+SCREEN_SIZE = 256
+
+def healthy_index(screen_model):
+    """Class index of `healthy` in the screening classifier (last class if unnamed)."""
+    names = screen_model.names
+    for index, name in names.items():
+        if name == HEALTHY:
+            return index
+    return max(names)
+
+def screen_thumbnail(image_path, size=SCREEN_SIZE):
+    """Small RGB copy for the classifier; JPEG draft mode avoids a full-size decode."""
+    try:
+        with Image.open(image_path) as image:
+            image.draft('RGB', (size, size))
+            image = ImageOps.exif_transpose(image).convert('RGB')
+            image.thumbnail((size, size), Image.BILINEAR)
+            return image
+    except Exception as e:
+        raise RuntimeError(f"Failed to load image: {str(e)}")
+
+def disease_probability(screen_model, image):
+    """1 - P(healthy) from a YOLO-cls screening model."""
+    try:
+        result = screen_model(image, verbose=False)[0]
+        return 1.0 - float(result.probs.data[healthy_index(screen_model)])
+    except Exception as e:
+        raise RuntimeError(f"Screening failed: {str(e)}")
+
+def run_cascade(detector, screen_model, image_path, conf_threshold, screen_threshold):
+    """Screen first; run full detection only when the image is likely diseased."""
+    p_disease = disease_probability(screen_model, screen_thumbnail(image_path))
+    if p_disease < screen_threshold:
+        return {'stage': 'screen', 'disease_probability': p_disease, 'detections': []}
+    return {'stage': 'detector', 'disease_probability': p_disease,
+            'detections': run_inference(detector, process_image(image_path), conf_threshold)}
+
+def labeled_images(directory):
+    """(path, is_diseased) for a folder laid out as <dir>/<disease slug>/<image>."""
+    samples = []
+    for slug in sorted(os.listdir(directory)):
+        class_dir = os.path.join(directory, slug)
+        if os.path.isdir(class_dir):
+            samples.extend((path, slug != HEALTHY) for path in list_images(class_dir))
+    return samples
+
+def evaluate(detector, screen_model, directory, thresholds, conf_threshold=0.25):
+    """Latency saved vs. diseased-image recall lost for each screening threshold.
+
+    Both stages run on every image once; the trade-off per threshold is
+    then computed from the recorded probabilities and timings.
+    """
+    samples = labeled_images(directory)
+    if not samples:
+        raise RuntimeError('No labeled images found')
+
+    # Warm up both models so the first image is not charged for setup
+    disease_probability(screen_model, screen_thumbnail(samples[0][0]))
+    run_inference(detector, process_image(samples[0][0]), conf_threshold)
+
+    probs, screen_ms, detect_ms, diseased = [], [], [], []
+    for path, is_diseased in samples:
+        start = time.perf_counter()
+        probs.append(disease_probability(screen_model, screen_thumbnail(path)))
+        screen_ms.append((time.perf_counter() - start) * 1000)
+        start = time.perf_counter()
+        run_inference(detector, process_image(path), conf_threshold)
+        detect_ms.append((time.perf_counter() - start) * 1000)
+        diseased.append(is_diseased)
+
+    probs, diseased = np.asarray(probs), np.asarray(diseased)
+    screen_ms, detect_ms = np.asarray(screen_ms), np.asarray(detect_ms)
+    baseline_ms = float(detect_ms.mean())
+    rows = []
+    for threshold in thresholds:
+        passed = probs >= threshold
+        cascade_ms = float((screen_ms + np.where(passed, detect_ms, 0.0)).mean())
+        rows.append({
+            'threshold': threshold,
+            'detector_rate': float(passed.mean()),
+            'mean_latency_ms': cascade_ms,
+            'latency_saved_pct': 100.0 * (baseline_ms - cascade_ms) / baseline_ms,
+            'diseased_recall': float(passed[diseased].mean()) if diseased.any() else None,
+            'healthy_screened_out': float((~passed[~diseased]).mean()) if (~diseased).any() else None
+        })
+    return {
+        'images': len(samples),
+        'diseased': int(diseased.sum()),
+        'detector_only_latency_ms': baseline_ms,
+        'screen_latency_ms': float(screen_ms.mean()),
+        'thresholds': rows
+    }
+
+def main():
+    parser = argparse.ArgumentParser()
+    parser.add_argument('--model', required=True, help='Path to YOLOv8 detection model')
+    parser.add_argument('--screen-model', required=True, help='Path to YOLOv8-cls healthy/diseased screening model')
+    parser.add_argument('--data', required=True, help='Labeled folder: <dir>/<disease slug>/<image>')
+    parser.add_argument('--thresholds', type=float, nargs='+', default=[0.1, 0.2, 0.3, 0.4, 0.5],
+                        help='Screening thresholds to evaluate')
+    parser.add_argument('--conf', type=float, default=0.25, help='Detector confidence threshold')
+    args = parser.parse_args()
+
+    try:
+        report = evaluate(load_model(args.model), load_model(args.screen_model), args.data,
+                          args.thresholds, args.conf)
+        print(json.dumps(report, indent=2))
+
+    except Exception as e:
+        print(json.dumps({'error': str(e)}))
+        exit(1)
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,208 @@
+import argparse
+import hashlib
+import json
+import os
+import time
+from concurrent.futures import ProcessPoolExecutor
+from PIL import Image
+import numpy as np
+from phash import list_images
+from preprocess import LetterboxBuffer
+
+IMAGES_FILE = 'images.npy'
+LABELS_FILE = 'labels.npy'
+INDEX_FILE = 'index.npy'
+META_FILE = 'meta.json'
+CHUNK = 64
+
+def label_path(images_dir, labels_dir, image_path):
+    """YOLO label file for an image: same relative path under labels/, .txt suffix."""
+    rel = os.path.splitext(os.path.relpath(image_path, images_dir))[0] + '.txt'
+    return os.path.join(labels_dir, rel)
+
+def read_labels(path):
+    """(n, 5) float32 rows of class, cx, cy, w, h; empty when the image has no objects."""
+    if not os.path.exists(path):
+        return np.zeros((0, 5), dtype=np.float32)
+    rows = np.loadtxt(path, dtype=np.float32, ndmin=2)
+    return rows[:, :5] if rows.size else np.zeros((0, 5), dtype=np.float32)
+
+def fingerprint(paths):
+    """Hash of paths, sizes and mtimes (missing files included as such); changes when any file does."""
+    digest = hashlib.sha256()
+    for path in paths:
+        if os.path.exists(path):
+            stat = os.stat(path)
+            digest.update(f'{path}|{stat.st_size}|{stat.st_mtime_ns}\n'.encode('utf-8'))
+        else:
+            digest.update(f'{path}|missing\n'.encode('utf-8'))
+    return digest.hexdigest()
+
+def drop_rows(images_path, keep, chunk=CHUNK):
+    """Rewrite the image store with only the rows in keep, in order."""
+    store = np.load(images_path, mmap_mode='r')
+    tmp_path = images_path + '.tmp'
+    with open(tmp_path, 'wb') as f:
+        np.lib.format.write_array_header_1_0(f, {'descr': np.lib.format.dtype_to_descr(store.dtype),
+                                                 'fortran_order': False,
+                                                 'shape': (len(keep),) + store.shape[1:]})
+        for i in range(0, len(keep), chunk):
+            f.write(np.ascontiguousarray(store[keep[i:i + chunk]]).tobytes())
+    del store
+    os.replace(tmp_path, images_path)
+
+_worker = {}
+
+def _init_worker(images_path, imgsz):
+    _worker['store'] = np.load(images_path, mmap_mode='r+')
+    _worker['buffer'] = LetterboxBuffer(1, imgsz)
+
+def _convert_chunk(jobs):
+    """Letterbox a chunk of images straight into the shared store; returns their labels."""
+    store, buffer = _worker['store'], _worker['buffer']
+    imgsz = buffer.imgsz
+    results = []
+    for index, image_path, labels_file in jobs:
+        try:
+            with Image.open(image_path) as image:
+                buffer.fill(0, image)
+            store[index] = buffer.staging[0]
+            width, height, scale, pad_x, pad_y = buffer.meta[0]
+
+            # Re-express the boxes relative to the letterboxed square
+            labels = read_labels(labels_file)
+            labels[:, 1] = (labels[:, 1] * width * scale + pad_x) / imgsz
+            labels[:, 2] = (labels[:, 2] * height * scale + pad_y) / imgsz
+            labels[:, 3] *= width * scale / imgsz
+            labels[:, 4] *= height * scale / imgsz
+            results.append((index, labels, None))
+        except Exception as e:
+            results.append((index, np.zeros((0, 5), dtype=np.float32), str(e)))
+    store.flush()
+    return results
+
+def prepare_cache(source_dir, cache_dir, imgsz=640, workers=None, names=None):
+    """Decode and letterbox a YOLO-layout folder once into a memory-mapped store.
+
+    source_dir holds images/ and labels/ (YOLO txt, normalised cx cy w h).
+    The cache holds images.npy (N, imgsz, imgsz, 3) uint8, labels.npy with
+    all boxes concatenated, index.npy with each image's row offsets into it,
+    and meta.json. Images that fail to convert are listed under errors and
+    left out of the store. An existing cache built from the same image and
+    label files at the same size is reused as is.
+    """
+    images_dir = os.path.join(source_dir, 'images')
+    labels_dir = os.path.join(source_dir, 'labels')
+    paths = list_images(images_dir)
+    if not paths:
+        raise RuntimeError(f"No images found in {images_dir}")
+
+    label_files = [label_path(images_dir, labels_dir, p) for p in paths]
+    meta_path = os.path.join(cache_dir, META_FILE)
+    source_hash = fingerprint(paths + label_files)
+    if os.path.exists(meta_path):
+        with open(meta_path, 'r', encoding='utf-8') as f:
+            meta = json.load(f)
+        if meta.get('source_hash') == source_hash and meta.get('imgsz') == imgsz:
+            meta['reused'] = True
+            return meta
+
+    os.makedirs(cache_dir, exist_ok=True)
+    images_path = os.path.join(cache_dir, IMAGES_FILE)
+    store = np.lib.format.open_memmap(images_path, mode='w+', dtype=np.uint8,
+                                      shape=(len(paths), imgsz, imgsz, 3))
+    del store
+
+    start = time.perf_counter()
+    jobs = [(i, p, l) for i, (p, l) in enumerate(zip(paths, label_files))]
+    chunks = [jobs[i:i + CHUNK] for i in range(0, len(jobs), CHUNK)]
+    labels, errors, failed = [None] * len(paths), [], set()
+    try:
+        with ProcessPoolExecutor(max_workers=workers, initializer=_init_worker,
+                                 initargs=(images_path, imgsz)) as pool:
+            for results in pool.map(_convert_chunk, chunks):
+                for index, rows, error in results:
+                    labels[index] = rows
+                    if error:
+                        failed.add(index)
+                        errors.append({'image': os.path.relpath(paths[index], images_dir), 'error': error})
+    except Exception as e:
+        raise RuntimeError(f"Failed to build dataset cache: {str(e)}")
+
+    # Failed images would otherwise train as blank frames with no boxes
+    keep = [i for i in range(len(paths)) if i not in failed]
+    if not keep:
+        raise RuntimeError(f"No image in {images_dir} could be converted")
+    if failed:
+        drop_rows(images_path, keep)
+        paths = [paths[i] for i in keep]
+        labels = [labels[i] for i in keep]
+
+    counts = np.array([len(rows) for rows in labels], dtype=np.int64)
+    np.save(os.path.join(cache_dir, LABELS_FILE), np.concatenate(labels).astype(np.float32))
+    np.save(os.path.join(cache_dir, INDEX_FILE), np.concatenate([[0], np.cumsum(counts)]))
+
+    meta = {
+        'images': len(paths),
+        'boxes': int(counts.sum()),
+        'imgsz': imgsz,
+        'names': names or {},
+        'source': os.path.abspath(source_dir),
+        'source_hash': source_hash,
+        'files': [os.path.relpath(p, images_dir) for p in paths],
+        'errors': errors,
+        'build_seconds': time.perf_counter() - start
+    }
+    tmp_path = meta_path + '.tmp'
+    with open(tmp_path, 'w', encoding='utf-8') as f:
+        json.dump(meta, f)
+    os.replace(tmp_path, meta_path)
+    meta['reused'] = False
+    return meta
+
+class CachedDataset:
+    """Read-only view of a prepared cache; the image store is opened lazily per process."""
+
+    def __init__(self, cache_dir):
+        self.cache_dir = cache_dir
+        with open(os.path.join(cache_dir, META_FILE), 'r', encoding='utf-8') as f:
+            self.meta = json.load(f)
+        self.labels = np.load(os.path.join(cache_dir, LABELS_FILE))
+        self.index = np.load(os.path.join(cache_dir, INDEX_FILE))
+        self._images = None
+
+    def __len__(self):
+        return self.meta['images']
+
+    @property
+    def images(self):
+        if self._images is None:
+            self._images = np.load(os.path.join(self.cache_dir, IMAGES_FILE), mmap_mode='r')
+        return self._images
+
+    def __getitem__(self, i):
+        return self.images[i], self.labels[self.index[i]:self.index[i + 1]]
+
+def main():
+    parser = argparse.ArgumentParser()
+    parser.add_argument('--source', required=True, help='YOLO-layout folder with images/ and labels/')
+    parser.add_argument('--cache', required=True, help='Output cache directory')
+    parser.add_argument('--imgsz', type=int, default=640, help='Letterboxed square size')
+    parser.add_argument('--workers', type=int, help='Conversion processes (default: CPU count)')
+    parser.add_argument('--labels', default=os.path.join(os.path.dirname(__file__), '..', 'data', 'diseases.json'),
+                        help='diseases.json; class index i is the i-th slug')
+    args = parser.parse_args()
+
+    try:
+        with open(args.labels, 'r', encoding='utf-8') as f:
+            names = dict(enumerate(json.load(f).keys()))
+        meta = prepare_cache(args.source, args.cache, args.imgsz, args.workers, names)
+        meta.pop('files')
+        print(json.dumps(meta, indent=2))
+
+    except Exception as e:
+        print(json.dumps({'error': str(e)}))
+        exit(1)
+
+if __name__ == '__main__':
+    main()
@@ -1,15 +1,54 @@
 import argparse
+import hashlib
 import json
+import os
+import queue
+import shlex
+import subprocess
+import sys
+import threading
+import time
 import torch
 from ultralytics import YOLO
 from PIL import Image
 import numpy as np
+from autotune import apply_threads, autotune, load_host_profile, resolve_model_path
+from metrics import WorkerMetrics, serve_http, write_file, write_periodically
+from mmap_weights import is_mmap_weights, load_mmap_model
+from phash import DuplicateIndex, hash_file
+from preprocess import LetterboxBuffer
+from video import scan_video
+
+DEFAULT_LABELS = os.path.join(os.path.dirname(__file__), '..', 'data', 'diseases.json')
+
+def load_labels(labels_path=DEFAULT_LABELS):
+    """Load disease slugs in class-index order from diseases.json."""
+    try:
+        with open(labels_path, 'r', encoding='utf-8') as f:
+            return list(json.load(f).keys())
+    except Exception as e:
+        raise RuntimeError(f"Failed to load labels: {str(e)}")
+
+def file_sha256(path, chunk_size=1 << 20):
+    """Content hash of a file, read in chunks."""
+    digest = hashlib.sha256()
+    with open(path, 'rb') as f:
+        for chunk in iter(lambda: f.read(chunk_size), b''):
+            digest.update(chunk)
+    return digest.hexdigest()
+
+def dedup_key(farm_id, model_hash, **settings):
+    """Near-duplicate index key; a cached result is only reused for the same farm, weights and settings."""
+    return '|'.join([str(farm_id), model_hash[:16]] + [f'{k}={settings[k]}' for k in sorted(settings)])
 
 def load_model(model_path):
     """Load YOLOv8 model."""
     try:
-        model = YOLO(model_path)
-        model.to('cuda' if torch.cuda.is_available() else 'cpu')
+        # *.mmap.pt weights are mapped from disk and shared between workers
+        model = load_mmap_model(model_path) if is_mmap_weights(model_path) else YOLO(model_path)
+        # Exported models (.onnx) cannot be moved; predict picks their device itself
+        if isinstance(model.model, torch.nn.Module):
+            model.to('cuda' if torch.cuda.is_available() else 'cpu')
         return model
     except Exception as e:
         raise RuntimeError(f"Failed to load model: {str(e)}")
@@ -22,54 +61,386 @@ def process_image(image_path):
     except Exception as e:
         raise RuntimeError(f"Failed to load image: {str(e)}")
 
+def parse_results(results):
+    """Convert one ultralytics result into a list of detection dicts."""
+    detections = []
+    for i in range(len(results.boxes)):
+        box = results.boxes[i]
+        
+        # Get bbox coordinates (normalized)
+        x1, y1, x2, y2 = box.xyxyn[0].tolist()
+        
+        # Get class and confidence
+        cls = int(box.cls[0].item())
+        conf = float(box.conf[0].item())
+        
+        detections.append({
+            'bbox': [x1, y1, x2, y2],
+            'class': cls,
+            'confidence': conf
+        })
+    
+    return detections
+
 def run_inference(model, image, conf_threshold):
     """Run YOLOv8 inference on image."""
     try:
         # Run inference
-        results = model(image, conf=conf_threshold)[0]
+        results = model(image, conf=conf_threshold, verbose=False)[0]
         
         # Process results
+        return parse_results(results)
+    except Exception as e:
+        raise RuntimeError(f"Inference failed: {str(e)}")
+
+def run_batch_inference(model, images, conf_threshold):
+    """Run YOLOv8 inference on a list of images in one forward pass."""
+    try:
+        results = model(images, conf=conf_threshold, verbose=False)
+        return [parse_results(r) for r in results]
+    except Exception as e:
+        raise RuntimeError(f"Batch inference failed: {str(e)}")
+
+def run_buffered_inference(model, buffer, images, conf_threshold, timings=None):
+    """Run inference through a reused LetterboxBuffer instead of ultralytics preprocessing.
+
+    When a timings dict is given, seconds spent per stage are added to it.
+    """
+    try:
+        timings = {} if timings is None else timings
         detections = []
-        for i in range(len(results.boxes)):
-            box = results.boxes[i]
-            
-            # Get bbox coordinates (normalized)
-            x1, y1, x2, y2 = box.xyxn[0].tolist()
-            
-            # Get class and confidence
-            cls = int(box.cls[0].item())
-            conf = float(box.conf[0].item())
-            
-            detections.append({
-                'bbox': [x1, y1, x2, y2],
-                'class': cls,
-                'confidence': conf
-            })
-        
+        for start in range(0, len(images), buffer.batch_size):
+            chunk = images[start:start + buffer.batch_size]
+
+            t0 = time.perf_counter()
+            for i, image in enumerate(chunk):
+                buffer.fill(i, image)
+            tensor = buffer.batch(len(chunk))
+            t1 = time.perf_counter()
+            results = model(tensor, conf=conf_threshold, verbose=False)
+            t2 = time.perf_counter()
+            detections.extend(buffer.restore(i, parse_results(r)) for i, r in enumerate(results))
+            t3 = time.perf_counter()
+
+            timings['preprocess'] = timings.get('preprocess', 0.0) + t1 - t0
+            timings['inference'] = timings.get('inference', 0.0) + t2 - t1
+            timings['postprocess'] = timings.get('postprocess', 0.0) + t3 - t2
         return detections
     except Exception as e:
-        raise RuntimeError(f"Inference failed: {str(e)}")
+        raise RuntimeError(f"Buffered inference failed: {str(e)}")
+
+def route_detections(detections, escalate_below):
+    """Decide whether the local result is good enough or needs the remote model."""
+    top = max(detections, key=lambda d: d['confidence'], default=None)
+    top_conf = top['confidence'] if top else 0.0
+    return {
+        'route': 'local' if top_conf >= escalate_below else 'remote',
+        'escalate': top_conf < escalate_below,
+        'top_confidence': top_conf,
+        'top_class': top['class'] if top else None
+    }
+
+def log_routing(log_path, image_path, decision, escalate_below, timings):
+    """Append one routing decision to a JSON-lines log for threshold tuning."""
+    record = {
+        'ts': time.time(),
+        'image': image_path,
+        'threshold': escalate_below,
+        'timings_ms': timings
+    }
+    record.update(decision)
+    with open(log_path, 'a', encoding='utf-8') as f:
+        f.write(json.dumps(record) + '\n')
+
+def remote_command(command, timeout=30.0):
+    """Remote model callable that runs `command <image>` and parses its JSON stdout."""
+    args = shlex.split(command)
+
+    def remote(image_path):
+        try:
+            proc = subprocess.run(args + [image_path], capture_output=True, text=True, timeout=timeout)
+        except subprocess.TimeoutExpired:
+            raise RuntimeError(f"Remote model timed out after {timeout}s")
+        if proc.returncode != 0:
+            raise RuntimeError(f"Remote model exited with {proc.returncode}: {proc.stderr.strip()[-200:]}")
+        try:
+            return json.loads(proc.stdout)
+        except ValueError:
+            raise RuntimeError('Remote model returned invalid JSON')
+    return remote
+
+def run_hybrid(model, image_path, conf_threshold, escalate_below, labels=None, log_path=None, remote=None):
+    """Run the local detector first and escalate low-confidence images to the remote model.
+
+    remote is a callable taking the image path; without one, low-confidence
+    results are only marked for escalation. If the remote call fails, the
+    local result is returned with route 'local' and the error in 'remote_error'.
+    """
+    timings = {}
+
+    start = time.perf_counter()
+    image = process_image(image_path)
+    timings['preprocess'] = (time.perf_counter() - start) * 1000
+
+    start = time.perf_counter()
+    detections = run_inference(model, image, conf_threshold)
+    timings['inference'] = (time.perf_counter() - start) * 1000
+
+    decision = route_detections(detections, escalate_below)
+    if labels and decision['top_class'] is not None and decision['top_class'] < len(labels):
+        decision['disease'] = labels[decision['top_class']]
+
+    remote_result = None
+    if decision['escalate'] and remote is not None:
+        start = time.perf_counter()
+        try:
+            remote_result = remote(image_path)
+        except Exception as e:
+            decision['route'] = 'local'
+            decision['remote_error'] = str(e)
+        timings['remote'] = (time.perf_counter() - start) * 1000
+
+    if log_path:
+        log_routing(log_path, image_path, decision, escalate_below, timings)
+
+    result = dict(decision)
+    result['detections'] = detections
+    if remote_result is not None:
+        result['remote'] = remote_result
+    result['timings_ms'] = timings
+    return result
+
+def _read_requests(stream, requests):
+    """Reader thread: queue every non-empty line, then None at end of input."""
+    for line in stream:
+        if line.strip():
+            requests.put(line)
+    requests.put(None)
+
+def _parse_request(line):
+    """Return (id, paths, single, farm_id, conf) for one request line."""
+    request = json.loads(line)
+    single = 'images' not in request
+    paths = [request['image']] if single else request['images']
+    return request.get('id'), paths, single, request.get('farm_id'), request.get('conf')
+
+def _lookup(job, metrics, dedup, dedup_radius, model_hash, imgsz):
+    """Fill cached results for a job and return the (job, index, path) items still to infer."""
+    todo = []
+    job['results'] = [None] * len(job['paths'])
+    job['hashes'] = [None] * len(job['paths'])
+    if dedup is not None and job['farm_id'] is not None:
+        job['dedup_key'] = dedup_key(job['farm_id'], model_hash, mode='local', conf=job['conf'],
+                                     imgsz=imgsz, pre='letterbox')
+    for i, path in enumerate(job['paths']):
+        if 'dedup_key' in job:
+            job['hashes'][i] = hash_file(path)
+            match = dedup.lookup(job['dedup_key'], job['hashes'][i], dedup_radius)
+            metrics.cache.inc(1, 'hit' if match else 'miss')
+            if match:
+                job['results'][i] = match[2]
+                continue
+        todo.append((job, i, path))
+    return todo
+
+def _infer(model, buffer, todo, metrics, dedup):
+    """One forward pass over the pending images of several jobs."""
+    if not todo:
+        return
+    # Run at the lowest requested threshold and filter per request afterwards
+    batch_conf = min(job['conf'] for job, _, _ in todo)
+    timings = {}
+    images = [process_image(path) for _, _, path in todo]
+    detections = run_buffered_inference(model, buffer, images, batch_conf, timings)
+    for stage, seconds in timings.items():
+        metrics.stage_seconds.observe(seconds, stage)
+    metrics.batch_size.observe(len(todo))
+    for (job, i, _), dets in zip(todo, detections):
+        job['results'][i] = [d for d in dets if d['confidence'] >= job['conf']]
+        if job['hashes'][i] is not None:
+            dedup.add(job['dedup_key'], job['hashes'][i], job['results'][i])
+
+def serve(model, conf_threshold, batch_size=8, imgsz=640, metrics=None, dedup=None, dedup_radius=6,
+          model_hash=''):
+    """Persistent worker: one JSON request per stdin line, one JSON response per stdout line.
+
+    A request is {"id": ..., "image": path} or {"id": ..., "images": [paths]},
+    optionally with "conf" and "farm_id" (for the near-duplicate cache, which
+    is keyed by model_hash, the request's threshold and the letterbox size,
+    so it never shares entries with single-image runs).
+    Requests that are already waiting are batched into one forward pass.
+    """
+    metrics = metrics or WorkerMetrics()
+    metrics.model_events.inc(1, 'load')
+    buffer = LetterboxBuffer(batch_size, imgsz)
+    requests = queue.Queue()
+    threading.Thread(target=_read_requests, args=(sys.stdin, requests), daemon=True).start()
+
+    finished = False
+    while not finished:
+        # Block for one request, then take whatever else is already waiting
+        lines = [requests.get()]
+        while len(lines) < batch_size and lines[-1] is not None:
+            try:
+                lines.append(requests.get_nowait())
+            except queue.Empty:
+                break
+        if lines[-1] is None:
+            finished = True
+            lines.pop()
+        metrics.queue_depth.set(requests.qsize())
+
+        jobs, todo = [], []
+        for line in lines:
+            metrics.requests.inc()
+            job = {'id': None}
+            jobs.append(job)
+            try:
+                job['id'], job['paths'], job['single'], job['farm_id'], conf = _parse_request(line)
+                job['conf'] = conf_threshold if conf is None else conf
+                todo.extend(_lookup(job, metrics, dedup, dedup_radius, model_hash, imgsz))
+            except Exception as e:
+                job['error'] = str(e)
+
+        try:
+            _infer(model, buffer, todo, metrics, dedup)
+        except Exception:
+            # Retry job by job so a single bad image only fails its own request
+            for job in jobs:
+                try:
+                    _infer(model, buffer, [item for item in todo if item[0] is job], metrics, dedup)
+                except Exception as e:
+                    job['error'] = str(e)
+
+        for job in jobs:
+            if 'error' in job:
+                metrics.errors.inc()
+                response = {'id': job['id'], 'error': job['error']}
+            else:
+                response = {'id': job['id'], 'detections': job['results'][0] if job['single'] else job['results']}
+            sys.stdout.write(json.dumps(response) + '\n')
+        sys.stdout.flush()
+
+    metrics.model_events.inc(1, 'evict')
 
 def main():
     parser = argparse.ArgumentParser()
     parser.add_argument('--model', required=True, help='Path to YOLOv8 model')
-    parser.add_argument('--image', required=True, help='Path to input image')
+    parser.add_argument('--image', help='Path to input image (required unless --serve, --video or --autotune)')
     parser.add_argument('--conf', type=float, default=0.25, help='Confidence threshold')
+    parser.add_argument('--mode', choices=['local', 'hybrid'], default='local',
+                        help='local: plain detections; hybrid: local first, mark low-confidence for remote')
+    parser.add_argument('--escalate-below', type=float, default=0.6,
+                        help='Hybrid mode: escalate when the top detection is below this confidence')
+    parser.add_argument('--labels', default=DEFAULT_LABELS, help='Path to diseases.json for class names')
+    parser.add_argument('--routing-log', help='Hybrid mode: append routing decisions to this JSON-lines file')
+    parser.add_argument('--remote-cmd', help='Hybrid mode: command run as `<cmd> <image>` for escalated images; '
+                                             'prints the remote result as JSON')
+    parser.add_argument('--remote-timeout', type=float, default=30.0, help='Hybrid mode: seconds before the remote call fails')
+    parser.add_argument('--dedup-index', help='Near-duplicate index (JSON) used to reuse earlier results')
+    parser.add_argument('--farm-id', default='default', help='Farm key for the near-duplicate index')
+    parser.add_argument('--dedup-radius', type=int, default=6, help='Max Hamming distance for a near-duplicate')
+    parser.add_argument('--serve', action='store_true', help='Run as a persistent JSON-lines worker on stdin/stdout')
+    parser.add_argument('--batch-size', type=int, help='Serve mode: preallocated batch size (default: host profile or 8)')
+    parser.add_argument('--imgsz', type=int, help='Serve mode: letterbox size, multiple of 32 (default: host profile or 640)')
+    parser.add_argument('--metrics-port', type=int, help='Serve mode: expose Prometheus metrics on this local port')
+    parser.add_argument('--metrics-file', help='Serve mode: periodically write Prometheus metrics to this file')
+    parser.add_argument('--metrics-interval', type=float, default=15.0, help='Seconds between metrics file writes')
+    parser.add_argument('--screen-model', help='YOLOv8-cls healthy/diseased model run before full detection (local mode only)')
+    parser.add_argument('--screen-threshold', type=float, default=0.3,
+                        help='Cascade: run the detector only when P(diseased) reaches this value')
+    parser.add_argument('--video', help='Scan a video file or folder of frames and summarise diseases over time')
+    parser.add_argument('--change-threshold', type=float, default=6.0,
+                        help='Video mode: min mean pixel change (0-255) vs last inferred frame')
+    parser.add_argument('--min-interval', type=float, default=0.0, help='Video mode: min seconds between inferred frames')
+    parser.add_argument('--autotune', action='store_true', help='Benchmark CPU settings and save a host profile')
+    parser.add_argument('--latency-target', type=float, default=1000.0, help='Autotune: max p95 batch latency (ms)')
+    parser.add_argument('--no-profile', action='store_true', help='Ignore the saved host profile')
     args = parser.parse_args()
+    if not (args.serve or args.video or args.autotune) and not args.image:
+        parser.error('--image is required unless --serve, --video or --autotune is given')
+    if args.mode == 'hybrid' and args.screen_model:
+        parser.error('--screen-model cannot be combined with --mode hybrid')
 
     try:
+        if args.autotune:
+            print(json.dumps(autotune(args.model, [args.image] if args.image else [], args.latency_target)))
+            return
+
+        # Apply the tuned settings for this host, if any
+        profile = None if args.no_profile else load_host_profile()
+        model_path = args.model
+        if profile:
+            apply_threads(profile['intra_op_threads'], profile['inter_op_threads'])
+            model_path = resolve_model_path(args.model, profile['backend'])
+        batch_size = args.batch_size or (profile or {}).get('batch_size', 8)
+        imgsz = args.imgsz or (profile or {}).get('imgsz', 640)
+
+        if args.video:
+            summary = scan_video(load_model(model_path), args.video, load_labels(args.labels), args.conf,
+                                 args.change_threshold, args.min_interval, batch_size, imgsz)
+            print(json.dumps(summary))
+            return
+
+        if args.serve:
+            metrics = WorkerMetrics()
+            if args.metrics_port:
+                serve_http(metrics.registry, args.metrics_port)
+            if args.metrics_file:
+                write_periodically(metrics.registry, args.metrics_file, args.metrics_interval)
+            dedup = DuplicateIndex(args.dedup_index) if args.dedup_index else None
+            serve(load_model(model_path), args.conf, batch_size, imgsz, metrics, dedup, args.dedup_radius,
+                  file_sha256(model_path) if dedup is not None else '')
+            if dedup is not None:
+                dedup.save()
+            if args.metrics_file:
+                write_file(metrics.registry, args.metrics_file)
+            return
+
+        # Reuse the earlier result for a near-identical photo from the same farm,
+        # produced by the same weights with the same mode and thresholds
+        dedup, image_hash, key = None, None, None
+        if args.dedup_index:
+            dedup = DuplicateIndex(args.dedup_index)
+            image_hash = hash_file(args.image)
+            settings = {'mode': args.mode, 'conf': args.conf}
+            if args.mode == 'hybrid':
+                settings.update(escalate_below=args.escalate_below, remote=args.remote_cmd or '')
+            elif args.screen_model:
+                settings.update(mode='cascade', screen=file_sha256(args.screen_model)[:16],
+                                screen_threshold=args.screen_threshold)
+            key = dedup_key(args.farm_id, file_sha256(model_path), **settings)
+            match = dedup.lookup(key, image_hash, args.dedup_radius)
+            if match:
+                print(json.dumps(match[2]))
+                return
+
         # Load model
-        model = load_model(args.model)
-        
-        # Process image
-        image = process_image(args.image)
-        
-        # Run inference
-        detections = run_inference(model, image, args.conf)
-        
+        model = load_model(model_path)
+
+        if args.mode == 'hybrid':
+            remote = remote_command(args.remote_cmd, args.remote_timeout) if args.remote_cmd else None
+            output = run_hybrid(model, args.image, args.conf, args.escalate_below,
+                                labels=load_labels(args.labels), log_path=args.routing_log, remote=remote)
+        elif args.screen_model:
+            # Imported here because cascade.py builds on this module
+            from cascade import run_cascade
+            output = run_cascade(model, load_model(args.screen_model), args.image,
+                                 args.conf, args.screen_threshold)
+        else:
+            # Process image
+            image = process_image(args.image)
+
+            # Run inference
+            output = run_inference(model, image, args.conf)
+
+        if dedup is not None:
+            dedup.add(key, image_hash, output)
+            dedup.save()
+
         # Output results as JSON
-        print(json.dumps(detections))
-        
+        print(json.dumps(output))
+
     except Exception as e:
         print(json.dumps({'error': str(e)}))
         exit(1)
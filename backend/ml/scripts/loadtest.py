@@ -0,0 +1,217 @@
+import argparse
+import json
+import os
+import random
+import shlex
+import subprocess
+import sys
+import tempfile
+import threading
+import time
+import numpy as np
+from phash import list_images
+
+PATTERNS = ('steady', 'poisson', 'burst')
+
+def arrival_times(pattern, rate, duration, burst_factor=5.0, burst_period=10.0, burst_share=0.15, seed=0):
+    """Offsets (seconds) at which requests are sent.
+
+    steady: fixed spacing. poisson: exponential gaps. burst: Poisson whose
+    rate is burst_factor times higher for the first burst_share of every
+    burst_period, lower in between, with the same mean rate (harvest-season
+    mornings when everyone uploads at once).
+    """
+    rng = random.Random(seed)
+    times = []
+    t = 0.0
+    if pattern == 'steady':
+        step = 1.0 / rate
+        while t < duration:
+            times.append(t)
+            t += step
+        return times
+
+    if pattern == 'poisson':
+        while True:
+            t += rng.expovariate(rate)
+            if t >= duration:
+                return times
+            times.append(t)
+
+    # Non-homogeneous Poisson by thinning: draw at the peak rate, keep each
+    # arrival with probability current_rate / peak_rate
+    quiet_factor = max((1.0 - burst_factor * burst_share) / (1.0 - burst_share), 0.0)
+    peak = rate * max(burst_factor, quiet_factor)
+    while True:
+        t += rng.expovariate(peak)
+        if t >= duration:
+            return times
+        in_burst = (t % burst_period) < burst_period * burst_share
+        if rng.random() < rate * (burst_factor if in_burst else quiet_factor) / peak:
+            times.append(t)
+
+class WorkerClient:
+    """A JSON-lines worker (detect.py --serve compatible) with one reader thread."""
+
+    def __init__(self, command):
+        self.proc = subprocess.Popen(command, stdin=subprocess.PIPE, stdout=subprocess.PIPE,
+                                     stderr=subprocess.DEVNULL, text=True, bufsize=1)
+        self.received = {}
+        self.arrived = threading.Condition()
+        self.next_id = 0
+        threading.Thread(target=self._read, daemon=True).start()
+
+    def _read(self):
+        for line in self.proc.stdout:
+            now = time.perf_counter()
+            try:
+                response = json.loads(line)
+            except ValueError:
+                continue
+            with self.arrived:
+                self.received[response.get('id')] = (now, 'error' in response)
+                self.arrived.notify_all()
+
+    def send(self, image):
+        self.next_id += 1
+        self.proc.stdin.write(json.dumps({'id': self.next_id, 'image': image}) + '\n')
+        self.proc.stdin.flush()
+        return self.next_id
+
+    def wait_for(self, request_ids, deadline):
+        with self.arrived:
+            while not all(r in self.received for r in request_ids):
+                remaining = deadline - time.perf_counter()
+                if remaining <= 0:
+                    break
+                self.arrived.wait(remaining)
+
+    def close(self):
+        self.proc.stdin.close()
+        self.proc.wait(timeout=30)
+
+def run_step(client, images, offsets, timeout=120.0, duration=0.0):
+    """Send requests at the given offsets and collect per-request latency.
+
+    Latency is measured from the *scheduled* send time, so a worker that
+    stops reading (full pipe) is charged for the wait instead of hiding it
+    (avoids coordinated omission). Throughput is completions over the whole
+    step (duration, or longer if responses arrive after it ends), so idle
+    time after the last arrival still counts.
+    """
+    scheduled = {}
+    start = time.perf_counter()
+    for n, offset in enumerate(offsets):
+        delay = start + offset - time.perf_counter()
+        if delay > 0:
+            time.sleep(delay)
+        scheduled[client.send(images[n % len(images)])] = start + offset
+    client.wait_for(list(scheduled), time.perf_counter() + timeout)
+
+    latencies, errors, last = [], 0, start
+    for request_id, sent in scheduled.items():
+        if request_id in client.received:
+            received, failed = client.received.pop(request_id)
+            latencies.append(received - sent)
+            errors += failed
+            last = max(last, received)
+
+    values = np.asarray(latencies) * 1000 if latencies else np.asarray([float('inf')])
+    return {
+        'requests': len(offsets),
+        'completed': len(latencies),
+        'errors': errors,
+        'achieved_rps': len(latencies) / max(duration, last - start, 1e-9),
+        'p50_ms': float(np.percentile(values, 50)),
+        'p95_ms': float(np.percentile(values, 95)),
+        'p99_ms': float(np.percentile(values, 99))
+    }
+
+def find_saturation(steps, slo_ms):
+    """First offered rate where p99 breaks the SLO or throughput stops keeping up."""
+    for step in steps:
+        if step['p99_ms'] > slo_ms or step['completed'] < step['requests'] \
+                or step['achieved_rps'] < 0.9 * step['offered_rps']:
+            return step
+    return None
+
+def synthetic_folder(directory, count=8, seed=0):
+    """Write a few phone-sized noise JPEGs when no image folder is given."""
+    from PIL import Image
+    rng = np.random.default_rng(seed)
+    for i in range(count):
+        width, height = [(640, 480), (1280, 960), (4000, 3000)][i % 3]
+        Image.fromarray(rng.integers(0, 256, (height, width, 3), dtype=np.uint8)).save(
+            os.path.join(directory, f'synthetic_{i}.jpg'), quality=85)
+    return list_images(directory)
+
+def load_test(command, images, pattern, rates, duration, slo_ms, warmup=3, **pattern_args):
+    """Sweep offered request rates against one worker and report the latency/throughput curve."""
+    client = WorkerClient(command)
+    try:
+        # Warm the model so the first step is not charged for lazy initialisation
+        run_step(client, images, [0.0] * warmup)
+        steps = []
+        for rate in rates:
+            step = run_step(client, images, arrival_times(pattern, rate, duration, **pattern_args),
+                            duration=duration)
+            step['offered_rps'] = rate
+            steps.append(step)
+            print(json.dumps(step), file=sys.stderr)
+    finally:
+        client.close()
+
+    saturation = find_saturation(steps, slo_ms)
+    within = [s for s in steps if s['p99_ms'] <= slo_ms and s is not saturation and
+              (saturation is None or s['offered_rps'] < saturation['offered_rps'])]
+    return {
+        'pattern': pattern,
+        'slo_p99_ms': slo_ms,
+        'duration_s': duration,
+        'steps': steps,
+        # Offered rate of the highest step that kept up within the SLO
+        'max_sustainable_rps': max((s['offered_rps'] for s in within), default=0.0),
+        'saturation_rps': saturation['offered_rps'] if saturation else None
+    }
+
+def main():
+    parser = argparse.ArgumentParser()
+    parser.add_argument('--model', help='Model for a local `detect.py --serve` worker')
+    parser.add_argument('--command', help='Worker command line instead of detect.py --serve')
+    parser.add_argument('--images', help='Folder of images to replay (default: synthetic)')
+    parser.add_argument('--pattern', choices=PATTERNS, default='poisson', help='Arrival pattern')
+    parser.add_argument('--rates', type=float, nargs='+', default=[0.5, 1, 2, 4, 8], help='Offered requests/s')
+    parser.add_argument('--duration', type=float, default=30.0, help='Seconds per rate step')
+    parser.add_argument('--slo', type=float, default=8000.0, help='p99 latency the mobile app will wait (ms)')
+    parser.add_argument('--burst-factor', type=float, default=5.0, help='Burst pattern: peak/mean rate')
+    parser.add_argument('--burst-period', type=float, default=10.0, help='Burst pattern: cycle length (s)')
+    parser.add_argument('--output', help='Write the JSON report here as well as to stdout')
+    args = parser.parse_args()
+    if not (args.model or args.command):
+        parser.error('--model or --command is required')
+
+    try:
+        if args.command:
+            command = shlex.split(args.command)
+        else:
+            script = os.path.join(os.path.dirname(os.path.abspath(__file__)), 'detect.py')
+            command = [sys.executable, script, '--model', args.model, '--serve']
+
+        with tempfile.TemporaryDirectory() as workdir:
+            images = list_images(args.images) if args.images else synthetic_folder(workdir)
+            if not images:
+                raise RuntimeError('No images to replay')
+            report = load_test(command, images, args.pattern, args.rates, args.duration, args.slo,
+                               burst_factor=args.burst_factor, burst_period=args.burst_period)
+
+        if args.output:
+            with open(args.output, 'w', encoding='utf-8') as f:
+                json.dump(report, f, indent=2)
+        print(json.dumps(report, indent=2))
+
+    except Exception as e:
+        print(json.dumps({'error': str(e)}))
+        exit(1)
+
+if __name__ == '__main__':
+    main()
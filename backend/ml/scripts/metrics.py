@@ -0,0 +1,147 @@
+import bisect
+import os
+import threading
+import time
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+
+LATENCY_BUCKETS = (0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1.0, 2.5, 5.0, 10.0)
+BATCH_BUCKETS = (1, 2, 4, 8, 16, 32, 64)
+
+def _label_text(names, values, extra=''):
+    pairs = [f'{n}="{v}"' for n, v in zip(names, values)]
+    if extra:
+        pairs.append(extra)
+    return '{' + ','.join(pairs) + '}' if pairs else ''
+
+class Counter:
+    """Monotonic counter. Updates are a dict get/set under the GIL, no lock."""
+
+    kind = 'counter'
+
+    def __init__(self, name, help_text, labels=()):
+        self.name = name
+        self.help = help_text
+        self.labels = tuple(labels)
+        # Unlabelled series start at zero so they are exported before the first event
+        self.values = {} if self.labels else {(): 0}
+
+    def inc(self, amount=1, *label_values):
+        self.values[label_values] = self.values.get(label_values, 0) + amount
+
+    def samples(self):
+        for key, value in list(self.values.items()):
+            yield self.name, _label_text(self.labels, key), value
+
+class Gauge(Counter):
+    """Value that can go up and down."""
+
+    kind = 'gauge'
+
+    def set(self, value, *label_values):
+        self.values[label_values] = value
+
+class Histogram:
+    """Cumulative-bucket histogram; observe() is one bisect and two adds."""
+
+    kind = 'histogram'
+
+    def __init__(self, name, help_text, labels=(), buckets=LATENCY_BUCKETS):
+        self.name = name
+        self.help = help_text
+        self.labels = tuple(labels)
+        self.buckets = tuple(buckets)
+        self.values = {}
+
+    def observe(self, value, *label_values):
+        entry = self.values.get(label_values)
+        if entry is None:
+            entry = self.values[label_values] = [[0] * (len(self.buckets) + 1), 0.0]
+        entry[0][bisect.bisect_left(self.buckets, value)] += 1
+        entry[1] += value
+
+    def samples(self):
+        for key, (counts, total) in list(self.values.items()):
+            cumulative = 0
+            for bound, count in zip(self.buckets + (float('inf'),), list(counts)):
+                cumulative += count
+                le = '+Inf' if bound == float('inf') else repr(bound)
+                yield self.name + '_bucket', _label_text(self.labels, key, f'le="{le}"'), cumulative
+            yield self.name + '_sum', _label_text(self.labels, key), total
+            yield self.name + '_count', _label_text(self.labels, key), cumulative
+
+class Registry:
+    """Collection of metrics rendered in the Prometheus text exposition format."""
+
+    def __init__(self, prefix='ycd_detect_'):
+        self.prefix = prefix
+        self.metrics = []
+
+    def _register(self, metric):
+        self.metrics.append(metric)
+        return metric
+
+    def counter(self, name, help_text, labels=()):
+        return self._register(Counter(self.prefix + name, help_text, labels))
+
+    def gauge(self, name, help_text, labels=()):
+        return self._register(Gauge(self.prefix + name, help_text, labels))
+
+    def histogram(self, name, help_text, labels=(), buckets=LATENCY_BUCKETS):
+        return self._register(Histogram(self.prefix + name, help_text, labels, buckets))
+
+    def render(self):
+        lines = []
+        for metric in self.metrics:
+            lines.append(f'# HELP {metric.name} {metric.help}')
+            lines.append(f'# TYPE {metric.name} {metric.kind}')
+            for name, labels, value in metric.samples():
+                lines.append(f'{name}{labels} {value}')
+        return '\n'.join(lines) + '\n'
+
+class WorkerMetrics:
+    """The metric set exported by detect.py --serve."""
+
+    def __init__(self):
+        self.registry = Registry()
+        self.requests = self.registry.counter('requests_total', 'Detection requests received')
+        self.errors = self.registry.counter('errors_total', 'Requests that returned an error')
+        self.stage_seconds = self.registry.histogram('stage_seconds', 'Per-stage latency', ('stage',))
+        self.batch_size = self.registry.histogram('batch_size', 'Images per forward pass', buckets=BATCH_BUCKETS)
+        self.queue_depth = self.registry.gauge('queue_depth', 'Requests waiting after the current batch was taken')
+        self.cache = self.registry.counter('cache_lookups_total', 'Near-duplicate cache lookups', ('result',))
+        self.model_events = self.registry.counter('model_events_total', 'Model load/evict events', ('event',))
+
+def serve_http(registry, port, host='127.0.0.1'):
+    """Expose /metrics on a local port from a daemon thread."""
+    class Handler(BaseHTTPRequestHandler):
+        def do_GET(self):
+            body = registry.render().encode('utf-8')
+            self.send_response(200 if self.path == '/metrics' else 404)
+            self.send_header('Content-Type', 'text/plain; version=0.0.4')
+            self.send_header('Content-Length', str(len(body)))
+            self.end_headers()
+            self.wfile.write(body)
+
+        def log_message(self, *args):
+            pass
+
+    server = ThreadingHTTPServer((host, port), Handler)
+    threading.Thread(target=server.serve_forever, daemon=True).start()
+    return server
+
+def write_periodically(registry, path, interval=15.0):
+    """Atomically rewrite a textfile-collector file every interval seconds."""
+    def loop():
+        while True:
+            write_file(registry, path)
+            time.sleep(interval)
+
+    thread = threading.Thread(target=loop, daemon=True)
+    thread.start()
+    return thread
+
+def write_file(registry, path):
+    tmp_path = path + '.tmp'
+    with open(tmp_path, 'w', encoding='utf-8') as f:
+        f.write(registry.render())
+    os.replace(tmp_path, path)
@@ -0,0 +1,126 @@
+import argparse
+import json
+import os
+import subprocess
+import sys
+import time
+import torch
+import torch.utils.serialization
+from ultralytics import YOLO
+
+MMAP_SUFFIX = '.mmap.pt'
+
+def is_mmap_weights(model_path):
+    """True for weights written by export_mmap()."""
+    return str(model_path).endswith(MMAP_SUFFIX)
+
+def export_mmap(model_path, output_path=None):
+    """Rewrite a YOLOv8 checkpoint so every worker can mmap the same pages.
+
+    Stock checkpoints hold FP16 weights with unfused BatchNorm, so loading
+    them always produces fresh private FP32 copies (.float(), then fuse()).
+    Here the model is fused and converted once, and saved in torch's zip
+    format, so loading with mmap=True gives tensors backed by the file and
+    nothing at inference time writes to them.
+    """
+    output_path = output_path or os.path.splitext(model_path)[0] + MMAP_SUFFIX
+    try:
+        source = YOLO(model_path)
+        model = source.model.fuse(verbose=False).float().eval()
+        for param in model.parameters():
+            param.requires_grad_(False)
+        torch.save({
+            'model': model,
+            'train_args': (source.ckpt or {}).get('train_args', {}),
+            'date': time.strftime('%Y-%m-%dT%H:%M:%S')
+        }, output_path)
+        return output_path
+    except Exception as e:
+        raise RuntimeError(f"Failed to export mmap weights: {str(e)}")
+
+def load_mmap_model(model_path):
+    """Load exported weights with storages mapped from the file (MAP_PRIVATE, shared via page cache)."""
+    config = torch.utils.serialization.config.load
+    previous = config.mmap
+    config.mmap = True
+    try:
+        return YOLO(model_path)
+    finally:
+        config.mmap = previous
+
+def read_memory(pid):
+    """Rss/Pss/Shared/Private figures (kB) from /proc/<pid>/smaps_rollup."""
+    fields = {}
+    with open(f'/proc/{pid}/smaps_rollup', 'r', encoding='utf-8') as f:
+        for line in f:
+            parts = line.split()
+            if len(parts) == 3 and parts[2] == 'kB':
+                fields[parts[0].rstrip(':')] = int(parts[1])
+    return {
+        'rss_mb': fields.get('Rss', 0) / 1024,
+        'pss_mb': fields.get('Pss', 0) / 1024,
+        'shared_mb': (fields.get('Shared_Clean', 0) + fields.get('Shared_Dirty', 0)) / 1024,
+        'private_mb': (fields.get('Private_Clean', 0) + fields.get('Private_Dirty', 0)) / 1024
+    }
+
+def measure(model_path, workers=4):
+    """Start several idle workers per load mode and compare their memory."""
+    mmap_path = os.path.splitext(model_path)[0] + MMAP_SUFFIX
+    if not os.path.exists(mmap_path):
+        export_mmap(model_path, mmap_path)
+
+    report = {}
+    for mode, path in (('plain', model_path), ('mmap', mmap_path)):
+        procs = [subprocess.Popen([sys.executable, os.path.abspath(__file__), '--worker', path],
+                                  stdout=subprocess.PIPE, stderr=subprocess.DEVNULL, text=True)
+                 for _ in range(workers)]
+        try:
+            for proc in procs:
+                proc.stdout.readline()
+            samples = [read_memory(proc.pid) for proc in procs]
+        finally:
+            for proc in procs:
+                proc.kill()
+                proc.wait()
+        report[mode] = {key: sum(s[key] for s in samples) / workers for key in samples[0]}
+        report[mode]['total_pss_mb'] = sum(s['pss_mb'] for s in samples)
+    report['workers'] = workers
+    report['weights_mb'] = os.path.getsize(mmap_path) / 2**20
+    return report
+
+def worker(model_path):
+    """Load a model, run one warm-up inference and idle until killed."""
+    from detect import load_model
+    import numpy as np
+
+    model = load_model(model_path)
+    model(np.zeros((640, 640, 3), dtype=np.uint8), verbose=False)
+    print('ready', flush=True)
+    while True:
+        time.sleep(60)
+
+def main():
+    parser = argparse.ArgumentParser()
+    parser.add_argument('--model', help='Path to YOLOv8 .pt weights')
+    parser.add_argument('--output', help='Output path (default: <model>.mmap.pt)')
+    parser.add_argument('--measure', action='store_true', help='Compare per-worker memory, plain vs mmap')
+    parser.add_argument('--workers', type=int, default=4, help='Workers per mode when measuring')
+    parser.add_argument('--worker', help=argparse.SUPPRESS)
+    args = parser.parse_args()
+
+    try:
+        if args.worker:
+            worker(args.worker)
+        elif not args.model:
+            parser.error('--model is required')
+        elif args.measure:
+            print(json.dumps(measure(args.model, args.workers)))
+        else:
+            print(json.dumps({'output': export_mmap(args.model, args.output)}))
+
+    except Exception as e:
+        print(json.dumps({'error': str(e)}))
+        exit(1)
+
+if __name__ == '__main__':
+    main()
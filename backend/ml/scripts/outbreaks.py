@@ -0,0 +1,192 @@
+import argparse
+import csv
+import datetime
+import json
+import math
+import time
+import numpy as np
+
+KM_PER_DEG_LAT = 111.32
+DAY = 86400.0
+# Photos classified as healthy say nothing about an outbreak
+HEALTHY = 'healthy'
+
+def parse_ts(value):
+    """Epoch seconds from a number or ISO-8601 string."""
+    if isinstance(value, (int, float)):
+        return float(value)
+    try:
+        return float(value)
+    except (TypeError, ValueError):
+        return datetime.datetime.fromisoformat(str(value).replace('Z', '+00:00')).timestamp()
+
+def load_records(path):
+    """Columns lat, lon, disease, ts from a CSV or JSON-lines file."""
+    lat, lon, disease, ts = [], [], [], []
+    with open(path, 'r', encoding='utf-8') as f:
+        rows = csv.DictReader(f) if path.endswith('.csv') else (json.loads(line) for line in f if line.strip())
+        for row in rows:
+            lat.append(float(row['lat']))
+            lon.append(float(row['lon']))
+            disease.append(row['disease'])
+            ts.append(parse_ts(row['ts']))
+    return np.asarray(lat), np.asarray(lon), np.asarray(disease), np.asarray(ts)
+
+def synthetic_records(n_background=200000, outbreaks=((4.05, 9.7, 'cocoa_black_pod', 1500),
+                                                      (3.87, 11.52, 'cassava_mosaic', 800)),
+                      bbox=(2.0, 8.5, 13.0, 16.0), days=90, seed=0):
+    """Uniform background noise over Cameroon plus a few tight space-time outbreaks."""
+    rng = np.random.default_rng(seed)
+    slugs = np.array(['cocoa_black_pod', 'cassava_mosaic', 'maize_streak', 'banana_sigatoka',
+                      'tomato_blight', 'coffee_rust'])
+    start = time.time() - days * DAY
+    lat = [rng.uniform(bbox[0], bbox[2], n_background)]
+    lon = [rng.uniform(bbox[1], bbox[3], n_background)]
+    disease = [rng.choice(slugs, n_background)]
+    ts = [rng.uniform(start, start + days * DAY, n_background)]
+    for o_lat, o_lon, slug, count in outbreaks:
+        onset = rng.uniform(start, start + (days - 10) * DAY)
+        lat.append(rng.normal(o_lat, 0.03, count))
+        lon.append(rng.normal(o_lon, 0.03, count))
+        disease.append(np.full(count, slug))
+        ts.append(onset + rng.uniform(0, 7 * DAY, count))
+    return np.concatenate(lat), np.concatenate(lon), np.concatenate(disease), np.concatenate(ts)
+
+class SpaceTimeGrid:
+    """Uniform (lat, lon, time) grid over one disease's points.
+
+    Cells are cell_km square (longitude scaled at the data's mean latitude)
+    and window_days long. Binning is vectorised; afterwards only non-empty
+    cells exist, held in a dict from cell key to point indices.
+    """
+
+    def __init__(self, lat, lon, ts, cell_km=5.0, window_days=7.0):
+        self.cell_lat = cell_km / KM_PER_DEG_LAT
+        mean_lat = float(np.mean(lat)) if len(lat) else 0.0
+        self.cell_lon = cell_km / (KM_PER_DEG_LAT * max(math.cos(math.radians(mean_lat)), 1e-6))
+        self.window = window_days * DAY
+        keys = np.stack([np.floor(lat / self.cell_lat), np.floor(lon / self.cell_lon),
+                         np.floor(ts / self.window)], axis=1).astype(np.int64)
+        unique, inverse, counts = np.unique(keys, axis=0, return_inverse=True, return_counts=True)
+        order = np.argsort(inverse.ravel(), kind='stable')
+        bounds = np.concatenate([[0], np.cumsum(counts)])
+        self.cells = {tuple(k): order[bounds[i]:bounds[i + 1]] for i, k in enumerate(unique.tolist())}
+
+    def hot_cells(self, min_points):
+        return {key for key, members in self.cells.items() if len(members) >= min_points}
+
+    def components(self, hot):
+        """Connected groups of hot cells (26-neighbourhood in space and time)."""
+        offsets = [(a, b, c) for a in (-1, 0, 1) for b in (-1, 0, 1) for c in (-1, 0, 1) if (a, b, c) != (0, 0, 0)]
+        seen, groups = set(), []
+        for start in hot:
+            if start in seen:
+                continue
+            seen.add(start)
+            stack, group = [start], []
+            while stack:
+                cell = stack.pop()
+                group.append(cell)
+                for da, db, dc in offsets:
+                    neighbour = (cell[0] + da, cell[1] + db, cell[2] + dc)
+                    if neighbour in hot and neighbour not in seen:
+                        seen.add(neighbour)
+                        stack.append(neighbour)
+            groups.append(group)
+        return groups
+
+    def cell_corners(self, cells):
+        """(lon, lat) corners of the spatial footprint of a set of cells."""
+        corners = set()
+        for i, j, _ in cells:
+            for di in (0, 1):
+                for dj in (0, 1):
+                    corners.add(((j + dj) * self.cell_lon, (i + di) * self.cell_lat))
+        return list(corners)
+
+def convex_hull(points):
+    """Andrew's monotone chain; returns a closed ring of (x, y)."""
+    points = sorted(set(points))
+    if len(points) < 3:
+        return points + points[:1]
+
+    def cross(o, a, b):
+        return (a[0] - o[0]) * (b[1] - o[1]) - (a[1] - o[1]) * (b[0] - o[0])
+
+    lower, upper = [], []
+    for p in points:
+        while len(lower) >= 2 and cross(lower[-2], lower[-1], p) <= 0:
+            lower.pop()
+        lower.append(p)
+    for p in reversed(points):
+        while len(upper) >= 2 and cross(upper[-2], upper[-1], p) <= 0:
+            upper.pop()
+        upper.append(p)
+    ring = lower[:-1] + upper[:-1]
+    return ring + ring[:1]
+
+def detect_outbreaks(lat, lon, disease, ts, cell_km=5.0, window_days=7.0, min_cell_points=10,
+                     min_cluster_points=30, exclude=(HEALTHY,)):
+    """Space-time clusters of the same disease, as alert dicts; classes in exclude are never clustered."""
+    alerts = []
+    for slug in np.unique(disease):
+        if slug in exclude:
+            continue
+        mask = disease == slug
+        d_lat, d_lon, d_ts = lat[mask], lon[mask], ts[mask]
+        grid = SpaceTimeGrid(d_lat, d_lon, d_ts, cell_km, window_days)
+        for cells in grid.components(grid.hot_cells(min_cell_points)):
+            members = np.concatenate([grid.cells[c] for c in cells])
+            if len(members) < min_cluster_points:
+                continue
+            alerts.append({
+                'disease': str(slug),
+                'points': int(len(members)),
+                'centroid': [float(d_lon[members].mean()), float(d_lat[members].mean())],
+                'start': float(d_ts[members].min()),
+                'end': float(d_ts[members].max()),
+                'cells': len(cells),
+                'polygon': [list(p) for p in convex_hull(grid.cell_corners(cells))]
+            })
+    alerts.sort(key=lambda a: a['points'], reverse=True)
+    return alerts
+
+def to_geojson(alerts, centroids_only=False):
+    """GeoJSON FeatureCollection of alert polygons (or centroid points)."""
+    features = []
+    for alert in alerts:
+        properties = {k: v for k, v in alert.items() if k not in ('polygon', 'centroid')}
+        geometry = {'type': 'Point', 'coordinates': alert['centroid']} if centroids_only else \
+            {'type': 'Polygon', 'coordinates': [alert['polygon']]}
+        features.append({'type': 'Feature', 'geometry': geometry, 'properties': properties})
+    return {'type': 'FeatureCollection', 'features': features}
+
+def main():
+    parser = argparse.ArgumentParser()
+    parser.add_argument('--input', help='CSV or JSON-lines with lat, lon, disease, ts')
+    parser.add_argument('--synthetic', type=int, help='Use N synthetic background points plus planted outbreaks')
+    parser.add_argument('--cell-km', type=float, default=5.0, help='Grid cell size (km)')
+    parser.add_argument('--window-days', type=float, default=7.0, help='Grid time window (days)')
+    parser.add_argument('--min-cell-points', type=int, default=10, help='Detections for a cell to count as hot')
+    parser.add_argument('--min-cluster-points', type=int, default=30, help='Detections for a cluster to alert')
+    parser.add_argument('--centroids', action='store_true', help='Emit centroid points instead of polygons')
+    args = parser.parse_args()
+    if not (args.input or args.synthetic):
+        parser.error('--input or --synthetic is required')
+
+    try:
+        records = load_records(args.input) if args.input else synthetic_records(args.synthetic)
+        start = time.perf_counter()
+        alerts = detect_outbreaks(*records, cell_km=args.cell_km, window_days=args.window_days,
+                                  min_cell_points=args.min_cell_points, min_cluster_points=args.min_cluster_points)
+        result = to_geojson(alerts, args.centroids)
+        result['stats'] = {'points': int(len(records[0])), 'alerts': len(alerts),
+                           'seconds': time.perf_counter() - start}
+        print(json.dumps(result))
+
+    except Exception as e:
+        print(json.dumps({'error': str(e)}))
+        exit(1)
+
+if __name__ == '__main__':
+    main()
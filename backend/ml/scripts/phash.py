@@ -0,0 +1,193 @@
+import argparse
+import json
+import os
+from PIL import Image, ImageOps
+import numpy as np
+
+IMAGE_EXTENSIONS = ('.jpg', '.jpeg', '.png', '.webp', '.bmp')
+
+def _grayscale(image, size):
+    """Downscale to a grayscale float array of (height, width)."""
+    image = ImageOps.exif_transpose(image).convert('L')
+    return np.asarray(image.resize(size, Image.LANCZOS), dtype=np.float32)
+
+def _pack_bits(bits):
+    """Pack a boolean array into a Python int (first bit is most significant)."""
+    return int.from_bytes(np.packbits(bits.ravel()).tobytes(), 'big')
+
+def dhash(image, hash_size=8):
+    """Difference hash: sign of horizontal gradients on a (hash_size+1) x hash_size thumbnail."""
+    pixels = _grayscale(image, (hash_size + 1, hash_size))
+    return _pack_bits(pixels[:, 1:] > pixels[:, :-1])
+
+_DCT_CACHE = {}
+
+def _dct_matrix(n):
+    """Orthonormal DCT-II basis, cached per size."""
+    if n not in _DCT_CACHE:
+        k = np.arange(n)[:, None]
+        x = np.arange(n)[None, :]
+        m = np.cos(np.pi * (2 * x + 1) * k / (2 * n)) * np.sqrt(2.0 / n)
+        m[0] /= np.sqrt(2.0)
+        _DCT_CACHE[n] = m.astype(np.float32)
+    return _DCT_CACHE[n]
+
+def phash(image, hash_size=8, highfreq_factor=4):
+    """Perceptual hash: low-frequency 2D DCT coefficients compared to their median."""
+    size = hash_size * highfreq_factor
+    pixels = _grayscale(image, (size, size))
+    dct = _dct_matrix(size)
+    low = (dct @ pixels @ dct.T)[:hash_size, :hash_size]
+    # Skip the DC term when picking the median, it only tracks brightness
+    median = np.median(low.ravel()[1:])
+    return _pack_bits(low > median)
+
+def hamming(a, b):
+    """Number of differing bits between two hashes."""
+    return (a ^ b).bit_count()
+
+class BKTree:
+    """Burkhard-Keller tree over integer hashes with Hamming distance.
+
+    Radius queries only descend into children whose edge distance lies in
+    [d - radius, d + radius], so small radii touch a small part of the tree.
+    """
+
+    def __init__(self):
+        self.root = None
+        self.size = 0
+
+    def __len__(self):
+        return self.size
+
+    def add(self, value, item=None):
+        """Insert a hash with an arbitrary payload."""
+        node = (value, item, {})
+        self.size += 1
+        if self.root is None:
+            self.root = node
+            return
+        current = self.root
+        while True:
+            d = hamming(value, current[0])
+            child = current[2].get(d)
+            if child is None:
+                current[2][d] = node
+                return
+            current = child
+
+    def query(self, value, radius):
+        """Return (distance, hash, item) for every entry within radius, nearest first."""
+        if self.root is None:
+            return []
+        matches = []
+        stack = [self.root]
+        while stack:
+            node_value, node_item, children = stack.pop()
+            d = hamming(value, node_value)
+            if d <= radius:
+                matches.append((d, node_value, node_item))
+            for edge, child in children.items():
+                if d - radius <= edge <= d + radius:
+                    stack.append(child)
+        matches.sort(key=lambda m: m[0])
+        return matches
+
+    def nearest(self, value, radius):
+        """Closest entry within radius, or None."""
+        matches = self.query(value, radius)
+        return matches[0] if matches else None
+
+class DuplicateIndex:
+    """BK-trees of photo hashes per key (a farm, or a farm plus model and settings), persisted as JSON."""
+
+    def __init__(self, path=None):
+        self.path = path
+        self.trees = {}
+        self.entries = {}
+        if path and os.path.exists(path):
+            self.load(path)
+
+    def add(self, key, value, item):
+        """Record a hash (and payload, e.g. a detection result) under a farm key."""
+        self.trees.setdefault(key, BKTree()).add(value, item)
+        self.entries.setdefault(key, []).append([format(value, 'x'), item])
+
+    def lookup(self, key, value, radius):
+        """Nearest earlier entry for the same farm within radius, or None."""
+        tree = self.trees.get(key)
+        return tree.nearest(value, radius) if tree else None
+
+    def load(self, path):
+        """Rebuild the trees from a saved index."""
+        try:
+            with open(path, 'r', encoding='utf-8') as f:
+                data = json.load(f)
+        except Exception as e:
+            raise RuntimeError(f"Failed to load duplicate index: {str(e)}")
+        for key, entries in data.items():
+            for value, item in entries:
+                self.add(key, int(value, 16), item)
+
+    def save(self, path=None):
+        """Write the index atomically."""
+        path = path or self.path
+        tmp_path = path + '.tmp'
+        with open(tmp_path, 'w', encoding='utf-8') as f:
+            json.dump(self.entries, f)
+        os.replace(tmp_path, path)
+
+HASHERS = {'dhash': dhash, 'phash': phash}
+
+def hash_file(image_path, method='phash'):
+    """Hash an image file with the given method."""
+    try:
+        with Image.open(image_path) as image:
+            return HASHERS[method](image)
+    except Exception as e:
+        raise RuntimeError(f"Failed to hash image: {str(e)}")
+
+def list_images(directory):
+    """Sorted image paths under a directory (recursive)."""
+    paths = []
+    for root, _, files in os.walk(directory):
+        for name in files:
+            if name.lower().endswith(IMAGE_EXTENSIONS):
+                paths.append(os.path.join(root, name))
+    return sorted(paths)
+
+def find_duplicates(paths, radius=6, method='phash'):
+    """Split paths into unique images and near-duplicates of an earlier unique image."""
+    tree = BKTree()
+    unique, duplicates = [], []
+    for path in paths:
+        value = hash_file(path, method)
+        match = tree.nearest(value, radius)
+        if match:
+            duplicates.append({'image': path, 'duplicate_of': match[2], 'distance': match[0]})
+        else:
+            tree.add(value, path)
+            unique.append(path)
+    return unique, duplicates
+
+def main():
+    parser = argparse.ArgumentParser()
+    parser.add_argument('--dir', required=True, help='Directory of images to deduplicate')
+    parser.add_argument('--radius', type=int, default=6, help='Max Hamming distance for a near-duplicate')
+    parser.add_argument('--method', choices=sorted(HASHERS), default='phash', help='Hash function')
+    parser.add_argument('--output', help='Write the list of unique images to this file')
+    args = parser.parse_args()
+
+    try:
+        unique, duplicates = find_duplicates(list_images(args.dir), args.radius, args.method)
+        if args.output:
+            with open(args.output, 'w', encoding='utf-8') as f:
+                f.write('\n'.join(unique) + '\n')
+        print(json.dumps({'unique': len(unique), 'duplicates': duplicates}))
+
+    except Exception as e:
+        print(json.dumps({'error': str(e)}))
+        exit(1)
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,185 @@
+import argparse
+import json
+import os
+import sys
+import time
+from autotune import apply_threads, load_host_profile, resolve_model_path
+from detect import file_sha256, load_model, process_image, run_buffered_inference
+from phash import list_images
+from preprocess import LetterboxBuffer
+
+def load_manifest(manifest_path):
+    """Read the checkpoint manifest, or None when starting fresh."""
+    if not os.path.exists(manifest_path):
+        return None
+    try:
+        with open(manifest_path, 'r', encoding='utf-8') as f:
+            return json.load(f)
+    except Exception as e:
+        raise RuntimeError(f"Failed to load manifest: {str(e)}")
+
+def save_manifest(manifest_path, manifest):
+    """Write the manifest atomically so a kill never leaves it half-written."""
+    tmp_path = manifest_path + '.tmp'
+    with open(tmp_path, 'w', encoding='utf-8') as f:
+        json.dump(manifest, f, indent=2)
+    os.replace(tmp_path, manifest_path)
+
+def complete_lines_end(path, chunk_size=1 << 16):
+    """Byte offset just past the file's last newline (0 if it has none)."""
+    with open(path, 'rb') as f:
+        end = f.seek(0, os.SEEK_END)
+        while end > 0:
+            start = max(end - chunk_size, 0)
+            f.seek(start)
+            newline = f.read(end - start).rfind(b'\n')
+            if newline >= 0:
+                return start + newline + 1
+            end = start
+    return 0
+
+def recover_output(output_path, manifest):
+    """Drop anything written after the last checkpoint and return the finished keys.
+
+    The manifest records the byte offset of the results file at each
+    checkpoint, so a partial line from a killed run is truncated away and
+    those images are simply redone. A run killed before its first checkpoint
+    has no manifest; its results are kept up to the last complete line.
+    """
+    done = set()
+    if not os.path.exists(output_path):
+        return done
+    if manifest is not None:
+        offset = min(manifest['output_offset'], os.path.getsize(output_path))
+    else:
+        offset = complete_lines_end(output_path)
+    with open(output_path, 'r+b') as f:
+        f.truncate(offset)
+    with open(output_path, 'r', encoding='utf-8') as f:
+        for line in f:
+            try:
+                record = json.loads(line)
+            except ValueError:
+                continue
+            done.add((record['image'], record['model_hash']))
+    return done
+
+def error_record(path, source_dir, model_hash, error):
+    """Result line for an image that could not be processed; it counts as done on resume."""
+    return {'image': os.path.relpath(path, source_dir), 'model_hash': model_hash, 'error': str(error)}
+
+def format_progress(done, total, skipped, started):
+    """Throughput and ETA for the images processed in this run."""
+    elapsed = time.perf_counter() - started
+    rate = done / elapsed if elapsed > 0 else 0.0
+    remaining = total - skipped - done
+    return {
+        'done': done + skipped,
+        'total': total,
+        'images_per_sec': round(rate, 2),
+        'eta_s': round(remaining / rate, 1) if rate > 0 else None
+    }
+
+def reprocess(model_path, source_dir, output_path, manifest_path, conf_threshold=0.25,
+              batch_size=None, checkpoint_every=64, imgsz=None):
+    """Run detection over every image under source_dir, resuming from the last checkpoint."""
+    model_hash = file_sha256(model_path)
+    profile = load_host_profile()
+    batch_size = batch_size or (profile or {}).get('batch_size', 8)
+    imgsz = imgsz or (profile or {}).get('imgsz', 640)
+    images = list_images(source_dir)
+    manifest = load_manifest(manifest_path)
+    done = recover_output(output_path, manifest)
+
+    pending = [p for p in images if (os.path.relpath(p, source_dir), model_hash) not in done]
+    skipped = len(images) - len(pending)
+    weights_path = model_path
+    if profile:
+        apply_threads(profile['intra_op_threads'], profile['inter_op_threads'])
+        weights_path = resolve_model_path(model_path, profile['backend'])
+    model = load_model(weights_path) if pending else None
+    buffer = LetterboxBuffer(batch_size, imgsz) if pending else None
+
+    processed, errors = 0, 0
+    started = time.perf_counter()
+    last_checkpoint = 0
+    with open(output_path, 'a', encoding='utf-8') as out:
+        for i in range(0, len(pending), batch_size):
+            batch = pending[i:i + batch_size]
+            records = []
+            loaded = []
+            for path in batch:
+                # Decode here so a corrupt or truncated file becomes an error record
+                # instead of failing the whole batch before it is checkpointed
+                try:
+                    loaded.append((path, buffer.decode(process_image(path))))
+                except Exception as e:
+                    errors += 1
+                    records.append(error_record(path, source_dir, model_hash, e))
+
+            if loaded:
+                try:
+                    results = run_buffered_inference(model, buffer, [image for _, image in loaded], conf_threshold)
+                except RuntimeError:
+                    # Fall back to one image at a time so only the failing image is lost
+                    results = []
+                    for path, image in loaded:
+                        try:
+                            results.append(run_buffered_inference(model, buffer, [image], conf_threshold)[0])
+                        except RuntimeError as e:
+                            results.append(e)
+                for (path, _), detections in zip(loaded, results):
+                    if isinstance(detections, Exception):
+                        errors += 1
+                        records.append(error_record(path, source_dir, model_hash, detections))
+                    else:
+                        records.append({'image': os.path.relpath(path, source_dir), 'model_hash': model_hash,
+                                        'detections': detections})
+
+            for record in records:
+                out.write(json.dumps(record) + '\n')
+            processed += len(batch)
+
+            if processed - last_checkpoint >= checkpoint_every or i + batch_size >= len(pending):
+                out.flush()
+                os.fsync(out.fileno())
+                save_manifest(manifest_path, {
+                    'model_hash': model_hash,
+                    'source': os.path.abspath(source_dir),
+                    'output_offset': out.tell(),
+                    'processed': processed + skipped,
+                    'total': len(images),
+                    'updated_at': time.time()
+                })
+                last_checkpoint = processed
+                print(json.dumps(format_progress(processed, len(images), skipped, started)),
+                      file=sys.stderr)
+
+    summary = format_progress(processed, len(images), skipped, started)
+    summary.update({'processed': processed, 'skipped': skipped, 'errors': errors, 'model_hash': model_hash})
+    return summary
+
+def main():
+    parser = argparse.ArgumentParser()
+    parser.add_argument('--model', required=True, help='Path to YOLOv8 model')
+    parser.add_argument('--source', required=True, help='Directory of exported images')
+    parser.add_argument('--output', required=True, help='Append-only JSON-lines results file')
+    parser.add_argument('--manifest', help='Checkpoint manifest (default: <output>.manifest.json)')
+    parser.add_argument('--conf', type=float, default=0.25, help='Confidence threshold')
+    parser.add_argument('--batch-size', type=int, help='Images per forward pass (default: host profile or 8)')
+    parser.add_argument('--imgsz', type=int, help='Letterbox size, multiple of 32 (default: host profile or 640)')
+    parser.add_argument('--checkpoint-every', type=int, default=64, help='Images between checkpoints')
+    args = parser.parse_args()
+
+    try:
+        summary = reprocess(args.model, args.source, args.output,
+                            args.manifest or args.output + '.manifest.json',
+                            args.conf, args.batch_size, args.checkpoint_every, args.imgsz)
+        print(json.dumps(summary))
+
+    except Exception as e:
+        print(json.dumps({'error': str(e)}))
+        exit(1)
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,139 @@
+import argparse
+import copy
+import json
+import os
+import sys
+import time
+import torch
+from ultralytics import YOLO
+from ultralytics.cfg import get_cfg
+from ultralytics.nn.tasks import DetectionModel
+import numpy as np
+from dataset import CachedDataset, prepare_cache
+
+def collate(samples):
+    """uint8 images stay uint8 here; normalisation happens on the training device."""
+    images = torch.from_numpy(np.stack([image for image, _ in samples]))
+    batch_idx, cls, bboxes = [], [], []
+    for i, (_, labels) in enumerate(samples):
+        labels = torch.from_numpy(np.array(labels))
+        batch_idx.append(torch.full((len(labels),), float(i)))
+        cls.append(labels[:, :1])
+        bboxes.append(labels[:, 1:5])
+    return {'img': images, 'batch_idx': torch.cat(batch_idx), 'cls': torch.cat(cls), 'bboxes': torch.cat(bboxes)}
+
+def to_device(batch, device, flip):
+    """NHWC uint8 -> NCHW float on device, with an optional horizontal flip of the whole batch."""
+    images = batch['img'].to(device, non_blocking=True).permute(0, 3, 1, 2).float().div_(255.0)
+    bboxes = batch['bboxes'].to(device)
+    if flip:
+        images = images.flip(3)
+        bboxes = bboxes.clone()
+        bboxes[:, 0] = 1.0 - bboxes[:, 0]
+    return {'img': images, 'batch_idx': batch['batch_idx'].to(device), 'cls': batch['cls'].to(device),
+            'bboxes': bboxes}
+
+def build_model(base, names):
+    """Detection model for names, reusing every base weight whose shape still fits."""
+    source = YOLO(base)
+    model = source.model
+    if len(model.names) != len(names):
+        fresh = DetectionModel(copy.deepcopy(model.yaml), nc=len(names), verbose=False)
+        fresh.load(model, verbose=False)
+        model = fresh
+    model.names = names
+    model.args = get_cfg()
+    for param in model.parameters():
+        param.requires_grad_(True)
+    return model.float()
+
+def save_checkpoint(model, path, epoch, metrics):
+    tmp_path = path + '.tmp'
+    torch.save({
+        'model': copy.deepcopy(model).half().eval(),
+        'epoch': epoch,
+        'train_metrics': metrics,
+        'train_args': {'task': 'detect'},
+        'date': time.strftime('%Y-%m-%dT%H:%M:%S')
+    }, tmp_path)
+    os.replace(tmp_path, path)
+
+def train(cache_dir, base, output_dir, epochs=30, batch_size=16, lr=0.001, workers=2, device=None):
+    """Fine-tune from a prepared cache; no JPEG is decoded during training."""
+    dataset = CachedDataset(cache_dir)
+    names = {int(k): v for k, v in dataset.meta['names'].items()}
+    device = torch.device(device or ('cuda' if torch.cuda.is_available() else 'cpu'))
+    model = build_model(base, names).to(device).train()
+    optimizer = torch.optim.AdamW([p for p in model.parameters() if p.requires_grad], lr=lr, weight_decay=0.0005)
+    scheduler = torch.optim.lr_scheduler.CosineAnnealingLR(optimizer, T_max=epochs)
+    loader = torch.utils.data.DataLoader(dataset, batch_size=batch_size, shuffle=True, collate_fn=collate,
+                                         num_workers=workers, pin_memory=device.type == 'cuda',
+                                         persistent_workers=workers > 0)
+
+    os.makedirs(output_dir, exist_ok=True)
+    history, best = [], None
+    for epoch in range(epochs):
+        start = time.perf_counter()
+        wait, total, steps = 0.0, 0.0, 0
+        fetched = time.perf_counter()
+        for batch in loader:
+            wait += time.perf_counter() - fetched
+            batch = to_device(batch, device, flip=bool(torch.rand(1) < 0.5))
+            loss, _ = model.loss(batch)
+            loss = loss.sum()
+            optimizer.zero_grad(set_to_none=True)
+            loss.backward()
+            torch.nn.utils.clip_grad_norm_(model.parameters(), 10.0)
+            optimizer.step()
+            total += float(loss)
+            steps += 1
+            fetched = time.perf_counter()
+        scheduler.step()
+
+        elapsed = time.perf_counter() - start
+        row = {'epoch': epoch + 1, 'loss': total / max(steps, 1), 'seconds': elapsed,
+               'images_per_s': len(dataset) / elapsed, 'data_wait_pct': 100.0 * wait / elapsed}
+        history.append(row)
+        print(json.dumps(row), file=sys.stderr)
+
+        save_checkpoint(model, os.path.join(output_dir, 'last.pt'), epoch + 1, row)
+        if best is None or row['loss'] < best:
+            best = row['loss']
+            save_checkpoint(model, os.path.join(output_dir, 'best.pt'), epoch + 1, row)
+
+    return {'images': len(dataset), 'epochs': history, 'best_loss': best,
+            'weights': os.path.join(output_dir, 'best.pt')}
+
+def main():
+    parser = argparse.ArgumentParser()
+    parser.add_argument('--cache', required=True, help='Dataset cache directory (built from --source if given)')
+    parser.add_argument('--source', help='YOLO-layout folder to prepare into --cache first')
+    parser.add_argument('--model', default='yolov8n.pt', help='Base weights or model yaml')
+    parser.add_argument('--output', default='runs/finetune', help='Where best.pt and last.pt are written')
+    parser.add_argument('--epochs', type=int, default=30)
+    parser.add_argument('--batch-size', type=int, default=16)
+    parser.add_argument('--lr', type=float, default=0.001)
+    parser.add_argument('--imgsz', type=int, default=640, help='Cache image size when preparing')
+    parser.add_argument('--workers', type=int, default=2, help='DataLoader workers')
+    parser.add_argument('--device', help='torch device (default: cuda if available)')
+    parser.add_argument('--labels', default=os.path.join(os.path.dirname(__file__), '..', 'data', 'diseases.json'),
+                        help='diseases.json; class index i is the i-th slug')
+    args = parser.parse_args()
+
+    try:
+        report = {}
+        if args.source:
+            with open(args.labels, 'r', encoding='utf-8') as f:
+                names = dict(enumerate(json.load(f).keys()))
+            meta = prepare_cache(args.source, args.cache, args.imgsz, names=names)
+            report['cache'] = {k: meta[k] for k in ('images', 'boxes', 'reused') if k in meta}
+        report.update(train(args.cache, args.model, args.output, args.epochs, args.batch_size,
+                            args.lr, args.workers, args.device))
+        print(json.dumps(report, indent=2))
+
+    except Exception as e:
+        print(json.dumps({'error': str(e)}))
+        exit(1)
+
+if __name__ == '__main__':
+    main()
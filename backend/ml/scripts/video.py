@@ -0,0 +1,125 @@
+import os
+import cv2
+from PIL import Image
+import numpy as np
+from phash import list_images
+
+THUMB_SIZE = (32, 32)
+MAX_INTERVALS = 100
+
+def iter_frames(source, fallback_fps=2.0):
+    """Yield (timestamp_s, rgb_frame) one at a time from a video file or a folder of frames.
+
+    Only the current frame is held in memory; a folder is read in filename
+    order and spaced at fallback_fps.
+    """
+    if os.path.isdir(source):
+        for n, path in enumerate(list_images(source)):
+            with Image.open(path) as image:
+                yield n / fallback_fps, np.asarray(image.convert('RGB'))
+        return
+
+    capture = cv2.VideoCapture(source)
+    if not capture.isOpened():
+        raise RuntimeError(f"Failed to open video: {source}")
+    fps = capture.get(cv2.CAP_PROP_FPS) or fallback_fps
+    n = 0
+    try:
+        while True:
+            ok, frame = capture.read()
+            if not ok:
+                break
+            msec = capture.get(cv2.CAP_PROP_POS_MSEC)
+            yield (msec / 1000.0 if msec > 0 else n / fps), cv2.cvtColor(frame, cv2.COLOR_BGR2RGB)
+            n += 1
+    finally:
+        capture.release()
+
+def thumbnail(frame):
+    """Small grayscale float copy used for change detection."""
+    gray = cv2.cvtColor(frame, cv2.COLOR_RGB2GRAY)
+    return cv2.resize(gray, THUMB_SIZE, interpolation=cv2.INTER_AREA).astype(np.float32)
+
+class DiseaseTimeline:
+    """Running per-disease counts and time intervals; size does not grow with video length."""
+
+    def __init__(self, labels, gap):
+        self.labels = labels
+        self.gap = gap
+        self.diseases = {}
+
+    def add(self, timestamp, detections):
+        for cls in {d['class'] for d in detections}:
+            slug = self.labels[cls] if cls < len(self.labels) else str(cls)
+            dets = [d for d in detections if d['class'] == cls]
+            entry = self.diseases.setdefault(slug, {
+                'frames': 0, 'detections': 0, 'max_confidence': 0.0,
+                'first_seen_s': timestamp, 'last_seen_s': timestamp, 'intervals': []
+            })
+            entry['frames'] += 1
+            entry['detections'] += len(dets)
+            entry['max_confidence'] = max(entry['max_confidence'], max(d['confidence'] for d in dets))
+            entry['last_seen_s'] = timestamp
+
+            # Extend the open interval or start a new one (bounded list)
+            intervals = entry['intervals']
+            if intervals and timestamp - intervals[-1][1] <= self.gap:
+                intervals[-1][1] = timestamp
+            elif len(intervals) < MAX_INTERVALS:
+                intervals.append([timestamp, timestamp])
+
+def scan_video(model, source, labels, conf_threshold=0.25, change_threshold=6.0,
+               min_interval=0.0, batch_size=8, imgsz=640, merge_gap=2.0):
+    """Diagnose a walk-through video, skipping frames that barely changed.
+
+    A frame is inferred only if the mean absolute difference between its
+    32x32 grayscale thumbnail and that of the last inferred frame is at
+    least change_threshold (0-255 scale), and at least min_interval seconds
+    have passed. Kept frames are batched through the preallocated buffer.
+    A skipped frame reuses the detections of the last inferred frame, so
+    counts and intervals cover the whole stretch it stood for.
+    """
+    from detect import run_buffered_inference
+    from preprocess import LetterboxBuffer
+
+    buffer = LetterboxBuffer(batch_size, imgsz)
+    timeline = DiseaseTimeline(labels, merge_gap)
+    # (timestamp, frame, timestamps of the skipped frames that followed it)
+    pending = []
+    carried = []
+    last_thumb, last_time = None, None
+    stats = {'frames_total': 0, 'frames_inferred': 0, 'frames_skipped': 0, 'duration_s': 0.0}
+
+    def flush():
+        nonlocal carried
+        detections = run_buffered_inference(model, buffer, [Image.fromarray(f) for _, f, _ in pending],
+                                            conf_threshold)
+        for (timestamp, _, skipped), dets in zip(pending, detections):
+            for t in [timestamp] + skipped:
+                timeline.add(t, dets)
+            carried = dets
+        stats['frames_inferred'] += len(pending)
+        pending.clear()
+
+    for timestamp, frame in iter_frames(source):
+        stats['frames_total'] += 1
+        stats['duration_s'] = timestamp
+        thumb = thumbnail(frame)
+        if last_thumb is not None:
+            changed = float(np.mean(np.abs(thumb - last_thumb))) >= change_threshold
+            if not changed or timestamp - last_time < min_interval:
+                stats['frames_skipped'] += 1
+                if pending:
+                    pending[-1][2].append(timestamp)
+                else:
+                    timeline.add(timestamp, carried)
+                continue
+        last_thumb, last_time = thumb, timestamp
+        pending.append((timestamp, frame, []))
+        if len(pending) == batch_size:
+            flush()
+    if pending:
+        flush()
+
+    stats['diseases'] = timeline.diseases
+    return stats
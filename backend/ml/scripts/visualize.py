@@ -44,7 +44,8 @@ def draw_detections(image_path, detections, output_path):
             
             # Draw label
             label = f"{det.get('disease', 'Unknown')} ({conf:.2f})"
-            label_size = draw.textsize(label, font=font)
+            left, top, right, bottom = draw.textbbox((0, 0), label, font=font)
+            label_size = (right - left, bottom - top)
             draw.rectangle([x1, y1 - label_size[1], x1 + label_size[0], y1],
                          fill=color)
             draw.text((x1, y1 - label_size[1]), label, fill='black', font=font)
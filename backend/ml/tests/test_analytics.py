@@ -0,0 +1,83 @@
+import json
+
+from analytics import IncidenceAggregates, consume, load_state, merge_shard, save_state
+
+LABELS = ['cocoa_black_pod', 'maize_rust']
+
+
+def write_lines(path, records, mode='w'):
+    with open(path, mode, encoding='utf-8') as f:
+        for record in records:
+            f.write((record if isinstance(record, str) else json.dumps(record)) + '\n')
+
+
+def record(slug, region='ashanti'):
+    return {'ts': '2026-03-02T08:00:00Z', 'region': region,
+            'detections': [{'disease': slug, 'confidence': 0.9}]}
+
+
+def build_shard(tmp_path, name, records):
+    log, state = tmp_path / f'{name}.jsonl', str(tmp_path / f'{name}.state.json')
+    write_lines(log, records)
+    aggregates, offsets, _ = load_state(state, LABELS)
+    consume(str(log), aggregates, offsets)
+    save_state(state, aggregates, offsets)
+    return log, state
+
+
+def test_consume_skips_records_that_are_not_objects(tmp_path):
+    log = tmp_path / 'results.jsonl'
+    write_lines(log, [[{'class': 0, 'confidence': 0.8}], '"text"', 'not json', record('cocoa_black_pod')])
+    aggregates = IncidenceAggregates(LABELS)
+
+    assert consume(str(log), aggregates, {}) == 1
+    assert aggregates.by_region == {'ashanti|cocoa_black_pod': 1}
+
+
+def test_repeated_merge_counts_each_shard_once(tmp_path):
+    log_a, shard_a = build_shard(tmp_path, 'a', [record('cocoa_black_pod')] * 2)
+    _, shard_b = build_shard(tmp_path, 'b', [record('maize_rust', 'volta')])
+    aggregates, offsets, shards = IncidenceAggregates(LABELS), {}, {}
+
+    for _ in range(3):
+        merge_shard(aggregates, shards, shard_a, LABELS)
+        merge_shard(aggregates, shards, shard_b, LABELS)
+    assert aggregates.by_region == {'ashanti|cocoa_black_pod': 2, 'volta|maize_rust': 1}
+    assert aggregates.confidence['cocoa_black_pod'].total() == 2
+
+    # Shard a reads one more line; only that line is added on the next merge
+    write_lines(log_a, [record('cocoa_black_pod')], mode='a')
+    other, other_offsets, _ = load_state(shard_a, LABELS)
+    consume(str(log_a), other, other_offsets)
+    save_state(shard_a, other, other_offsets)
+    merge_shard(aggregates, shards, shard_a, LABELS)
+
+    assert aggregates.by_region == {'ashanti|cocoa_black_pod': 3, 'volta|maize_rust': 1}
+    assert offsets == {}
+    assert shards[shard_a]['offsets'] == {str(log_a): log_a.stat().st_size}
+
+
+def test_healthy_is_not_counted_as_a_disease(tmp_path):
+    log = tmp_path / 'results.jsonl'
+    write_lines(log, [record('healthy'), record('cocoa_black_pod'),
+                      {'ts': 1772438400, 'region': 'ashanti', 'crop': 'cocoa',
+                       'detections': [{'class': 2, 'confidence': 0.95}]}])
+    aggregates = IncidenceAggregates(LABELS + ['healthy'])
+    consume(str(log), aggregates, {})
+
+    report = aggregates.report()
+    assert report['region']['ashanti'] == {'cocoa_black_pod': {'images': 1, 'incidence': 1 / 3},
+                                           'none': {'images': 2, 'incidence': 2 / 3}}
+    assert 'healthy' not in report['confidence']
+    assert not [key for key in aggregates.by_crop_week if 'healthy' in key]
+
+
+def test_missing_log_is_skipped_with_a_warning(tmp_path, capsys):
+    log = tmp_path / 'results.jsonl'
+    write_lines(log, [record('cocoa_black_pod')])
+    aggregates, offsets = IncidenceAggregates(LABELS), {}
+
+    assert consume(str(tmp_path / 'missing.jsonl'), aggregates, offsets) == 0
+    assert consume(str(log), aggregates, offsets) == 1
+    assert 'missing.jsonl' in capsys.readouterr().err
+    assert offsets == {str(log): log.stat().st_size}
@@ -0,0 +1,38 @@
+import pytest
+
+import autotune
+
+
+@pytest.fixture
+def weights(tmp_path):
+    pt = tmp_path / 'best.pt'
+    pt.write_bytes(b'')
+    (tmp_path / 'best.onnx').write_bytes(b'')
+    return str(pt)
+
+
+def test_onnx_profile_uses_exported_model(weights, monkeypatch):
+    monkeypatch.setattr(autotune, 'available_backends', lambda: ['torch', 'onnx'])
+    assert autotune.resolve_model_path(weights, 'onnx').endswith('best.onnx')
+    assert autotune.resolve_model_path(weights, 'torch') == weights
+
+
+def test_onnx_profile_falls_back_without_runtime(weights, monkeypatch):
+    monkeypatch.setattr(autotune, 'available_backends', lambda: ['torch'])
+    assert autotune.resolve_model_path(weights, 'onnx') == weights
+    with pytest.raises(RuntimeError, match='onnx'):
+        autotune.autotune(weights, backends=['onnx'])
+
+
+def test_tuned_profile_is_saved_where_it_is_loaded_from(tmp_path, monkeypatch):
+    env_path = tmp_path / 'profiles.json'
+    monkeypatch.setenv('YCD_ML_PROFILE', str(env_path))
+    autotune.save_host_profile({'backend': 'torch', 'batch_size': 4})
+
+    assert env_path.exists()
+    assert autotune.load_host_profile() == {'backend': 'torch', 'batch_size': 4}
+    # An explicit path still wins over the environment
+    other = tmp_path / 'other.json'
+    autotune.save_host_profile({'batch_size': 2}, str(other))
+    assert autotune.load_host_profile(str(other)) == {'batch_size': 2}
+    assert autotune.load_host_profile()['batch_size'] == 4
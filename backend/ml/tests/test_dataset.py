@@ -0,0 +1,41 @@
+import numpy as np
+from PIL import Image
+
+from dataset import CachedDataset, prepare_cache
+
+
+def make_source(tmp_path):
+    images, labels = tmp_path / 'src' / 'images', tmp_path / 'src' / 'labels'
+    images.mkdir(parents=True)
+    labels.mkdir()
+    for name, value in (('a', 60), ('c', 200)):
+        Image.new('RGB', (64, 32), (value,) * 3).save(images / f'{name}.jpg')
+        (labels / f'{name}.txt').write_text('1 0.5 0.5 0.2 0.2\n')
+    (images / 'b.jpg').write_bytes(b'\xff\xd8 not a jpeg')
+    (labels / 'b.txt').write_text('2 0.5 0.5 0.1 0.1\n')
+    return tmp_path / 'src'
+
+
+def test_failed_images_are_left_out_of_the_store(tmp_path):
+    meta = prepare_cache(str(make_source(tmp_path)), str(tmp_path / 'cache'), imgsz=64, workers=1)
+
+    assert meta['images'] == 2 and meta['files'] == ['a.jpg', 'c.jpg']
+    assert [e['image'] for e in meta['errors']] == ['b.jpg']
+    dataset = CachedDataset(str(tmp_path / 'cache'))
+    assert dataset.images.shape == (2, 64, 64, 3)
+    assert dataset.labels[:, 0].tolist() == [1, 1]
+    # The second row is c.jpg, not a blank frame left by b.jpg
+    assert dataset[1][0][32, 32].tolist() == [200, 200, 200]
+
+
+def test_label_edits_invalidate_the_cache(tmp_path):
+    source = make_source(tmp_path)
+    cache = str(tmp_path / 'cache')
+    prepare_cache(str(source), cache, imgsz=64, workers=1)
+    assert prepare_cache(str(source), cache, imgsz=64, workers=1)['reused']
+
+    (source / 'labels' / 'a.txt').write_text('3 0.5 0.5 0.2 0.2\n0 0.1 0.1 0.1 0.1\n')
+    meta = prepare_cache(str(source), cache, imgsz=64, workers=1)
+
+    assert not meta['reused'] and meta['boxes'] == 3
+    assert np.load(tmp_path / 'cache' / 'labels.npy')[:, 0].tolist() == [3, 0, 1]
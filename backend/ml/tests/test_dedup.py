@@ -0,0 +1,40 @@
+from PIL import Image
+
+import detect
+from metrics import WorkerMetrics
+from phash import DuplicateIndex, hash_file
+
+
+def test_cached_result_is_scoped_to_model_and_settings(tmp_path):
+    index = DuplicateIndex(str(tmp_path / 'dedup.json'))
+    local = detect.dedup_key('farm-1', 'a' * 64, mode='local', conf=0.25)
+    index.add(local, 0b1011, [{'class': 1, 'confidence': 0.9}])
+
+    assert index.lookup(local, 0b1010, 2) is not None
+    for other in (detect.dedup_key('farm-1', 'a' * 64, mode='hybrid', conf=0.25, escalate_below=0.6),
+                  detect.dedup_key('farm-1', 'a' * 64, mode='local', conf=0.5),
+                  detect.dedup_key('farm-1', 'b' * 64, mode='local', conf=0.25),
+                  detect.dedup_key('farm-2', 'a' * 64, mode='local', conf=0.25)):
+        assert index.lookup(other, 0b1011, 2) is None
+
+
+def test_key_does_not_depend_on_setting_order():
+    assert detect.dedup_key('f', 'c' * 64, conf=0.25, mode='local') == \
+        detect.dedup_key('f', 'c' * 64, mode='local', conf=0.25)
+
+
+def test_serve_entries_are_not_shared_with_single_image_runs(tmp_path):
+    image = tmp_path / 'leaf.jpg'
+    Image.new('RGB', (64, 48), (30, 120, 40)).save(image)
+    index = DuplicateIndex(str(tmp_path / 'dedup.json'))
+    # What `detect.py --image leaf.jpg --farm-id farm-1` stores
+    local = detect.dedup_key('farm-1', 'a' * 64, mode='local', conf=0.25)
+    index.add(local, hash_file(str(image)), [{'class': 1, 'confidence': 0.9}])
+
+    job = {'paths': [str(image)], 'farm_id': 'farm-1', 'conf': 0.25}
+    todo = detect._lookup(job, WorkerMetrics(), index, 6, 'a' * 64, imgsz=320)
+
+    assert len(todo) == 1 and job['results'] == [None]
+    assert job['dedup_key'] != local
+    assert job['dedup_key'] != detect.dedup_key('farm-1', 'a' * 64, mode='local', conf=0.25, imgsz=640,
+                                                pre='letterbox')
@@ -0,0 +1,138 @@
+import json
+import shlex
+import sys
+
+import pytest
+import torch
+from PIL import Image
+
+import detect
+
+
+class StubBoxes:
+    """Just enough of ultralytics' Boxes for parse_results."""
+
+    def __init__(self, detections):
+        self.detections = detections
+
+    def __len__(self):
+        return len(self.detections)
+
+    def __getitem__(self, i):
+        cls, conf = self.detections[i]
+        box = type('Box', (), {})()
+        box.xyxyn = torch.tensor([[0.1, 0.1, 0.5, 0.5]])
+        box.cls = torch.tensor([float(cls)])
+        box.conf = torch.tensor([conf])
+        return box
+
+
+class StubModel:
+    """Local detector returning fixed (class, confidence) detections above the threshold."""
+
+    def __init__(self, detections):
+        self.detections = detections
+
+    def __call__(self, image, conf=0.25, verbose=False):
+        kept = [d for d in self.detections if d[1] >= conf]
+        return [type('Result', (), {'boxes': StubBoxes(kept)})()]
+
+
+class StubRemote:
+    """Remote vision model: records calls, returns a fixed answer or raises."""
+
+    def __init__(self, answer=None, error=None):
+        self.answer = answer or {'disease': 'remote-answer'}
+        self.error = error
+        self.calls = []
+
+    def __call__(self, image_path):
+        self.calls.append(image_path)
+        if self.error:
+            raise RuntimeError(self.error)
+        return self.answer
+
+
+@pytest.fixture
+def image_path(tmp_path):
+    path = tmp_path / 'leaf.png'
+    Image.new('RGB', (64, 64), (40, 120, 40)).save(path)
+    return str(path)
+
+
+def test_confident_local_result_is_not_escalated(image_path):
+    remote = StubRemote()
+    result = detect.run_hybrid(StubModel([(2, 0.9)]), image_path, 0.25, 0.6, remote=remote)
+
+    assert result['route'] == 'local'
+    assert not result['escalate']
+    assert result['top_class'] == 2
+    assert remote.calls == []
+    assert 'remote' not in result
+
+
+@pytest.mark.parametrize('confidence, route', [(0.59, 'remote'), (0.6, 'local'), (0.61, 'local')])
+def test_threshold_decides_route(image_path, confidence, route):
+    remote = StubRemote()
+    result = detect.run_hybrid(StubModel([(1, confidence)]), image_path, 0.25, 0.6, remote=remote)
+
+    assert result['route'] == route
+    assert len(remote.calls) == (1 if route == 'remote' else 0)
+
+
+def test_no_detections_escalates_to_remote(image_path):
+    remote = StubRemote({'disease': 'late-blight'})
+    result = detect.run_hybrid(StubModel([]), image_path, 0.25, 0.6, remote=remote)
+
+    assert result['route'] == 'remote'
+    assert result['top_confidence'] == 0.0
+    assert result['remote'] == {'disease': 'late-blight'}
+    assert remote.calls == [image_path]
+
+
+def test_remote_failure_falls_back_to_local(image_path):
+    remote = StubRemote(error='connection refused')
+    result = detect.run_hybrid(StubModel([(3, 0.4)]), image_path, 0.25, 0.6, remote=remote)
+
+    assert result['route'] == 'local'
+    assert result['escalate']
+    assert result['remote_error'] == 'connection refused'
+    assert [d['class'] for d in result['detections']] == [3]
+    assert 'remote' not in result
+
+
+def test_without_remote_low_confidence_is_only_marked(image_path):
+    result = detect.run_hybrid(StubModel([(3, 0.4)]), image_path, 0.25, 0.6)
+
+    assert result['route'] == 'remote'
+    assert 'remote' not in result
+    assert 'remote' not in result['timings_ms']
+
+
+def test_routing_log_records_decision_and_timings(image_path, tmp_path):
+    log_path = tmp_path / 'routing.jsonl'
+    labels = ['healthy', 'leaf-spot']
+    detect.run_hybrid(StubModel([(1, 0.9)]), image_path, 0.25, 0.6, labels=labels, log_path=str(log_path))
+    detect.run_hybrid(StubModel([(1, 0.3)]), image_path, 0.25, 0.6, labels=labels, log_path=str(log_path),
+                      remote=StubRemote(error='timeout'))
+
+    records = [json.loads(line) for line in log_path.read_text().splitlines()]
+    assert [r['route'] for r in records] == ['local', 'local']
+    assert [r['escalate'] for r in records] == [False, True]
+    assert records[0]['disease'] == 'leaf-spot'
+    assert records[1]['remote_error'] == 'timeout'
+    for record in records:
+        assert record['image'] == image_path
+        assert record['threshold'] == 0.6
+        assert {'preprocess', 'inference'} <= set(record['timings_ms'])
+    assert 'remote' in records[1]['timings_ms']
+
+
+def test_remote_command_parses_json_and_reports_failures(image_path, tmp_path):
+    python = shlex.quote(sys.executable)
+    ok = detect.remote_command(python + ' -c "import json,sys; print(json.dumps({\'image\': sys.argv[1]}))"')
+    assert ok(image_path) == {'image': image_path}
+
+    failing = detect.remote_command(python + ' -c "import sys; sys.exit(3)"')
+    with pytest.raises(RuntimeError, match='exited with 3'):
+        failing(image_path)
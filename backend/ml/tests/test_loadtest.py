@@ -0,0 +1,33 @@
+import sys
+
+import pytest
+
+from loadtest import WorkerClient, find_saturation, run_step
+
+# Answers every JSON-lines request at once, like an idle detect.py --serve worker
+ECHO_WORKER = [sys.executable, '-c', (
+    'import json, sys\n'
+    'for line in sys.stdin:\n'
+    '    print(json.dumps({"id": json.loads(line)["id"], "detections": []}), flush=True)\n')]
+
+
+@pytest.fixture
+def client():
+    worker = WorkerClient(ECHO_WORKER)
+    yield worker
+    worker.close()
+
+
+def test_idle_time_after_last_arrival_counts_towards_the_step(client):
+    # 1 rps offered over 3 s: all arrivals land in the first two seconds
+    step = run_step(client, ['unused.jpg'], [0.0, 1.0, 2.0], duration=3.0)
+    step['offered_rps'] = 1.0
+
+    assert step['completed'] == 3
+    assert step['achieved_rps'] == pytest.approx(1.0, rel=0.05)
+    assert find_saturation([step], slo_ms=8000.0) is None
+
+
+def test_step_that_falls_behind_is_reported_as_saturation():
+    step = {'requests': 30, 'completed': 30, 'p99_ms': 100.0, 'achieved_rps': 2.0, 'offered_rps': 4.0}
+    assert find_saturation([step], slo_ms=8000.0) is step
@@ -0,0 +1,31 @@
+import numpy as np
+
+from outbreaks import detect_outbreaks, synthetic_records
+
+PLANTED = ((4.05, 9.7, 'cocoa_black_pod', 600), (3.87, 11.52, 'cassava_mosaic', 400),
+           (5.5, 12.0, 'healthy', 800))
+
+
+def test_reports_exactly_the_planted_outbreaks():
+    lat, lon, disease, ts = synthetic_records(n_background=20000, outbreaks=PLANTED, seed=1)
+    # Healthy photos scattered as background noise too
+    rng = np.random.default_rng(2)
+    lat = np.concatenate([lat, rng.uniform(2.0, 13.0, 5000)])
+    lon = np.concatenate([lon, rng.uniform(8.5, 16.0, 5000)])
+    disease = np.concatenate([disease, np.full(5000, 'healthy')])
+    ts = np.concatenate([ts, rng.uniform(ts.min(), ts.max(), 5000)])
+
+    alerts = detect_outbreaks(lat, lon, disease, ts)
+
+    assert sorted(a['disease'] for a in alerts) == ['cassava_mosaic', 'cocoa_black_pod']
+    for o_lat, o_lon, slug, count in PLANTED[:2]:
+        alert = next(a for a in alerts if a['disease'] == slug)
+        assert abs(alert['centroid'][0] - o_lon) < 0.02 and abs(alert['centroid'][1] - o_lat) < 0.02
+        assert 0.8 * count <= alert['points'] <= count + 10
+        assert alert['end'] - alert['start'] <= 7 * 86400
+
+
+def test_healthy_is_never_reported():
+    lat, lon, disease, ts = synthetic_records(n_background=0, outbreaks=PLANTED[2:], seed=3)
+    assert detect_outbreaks(lat, lon, disease, ts) == []
+    assert len(detect_outbreaks(lat, lon, disease, ts, exclude=())) == 1
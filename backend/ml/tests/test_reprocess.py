@@ -0,0 +1,35 @@
+import json
+
+import pytest
+
+from reprocess import complete_lines_end, recover_output
+
+
+def record(image):
+    return json.dumps({'image': image, 'model_hash': 'h', 'detections': []}) + '\n'
+
+
+@pytest.mark.parametrize('chunk_size', [4, 1 << 16])
+def test_complete_lines_end(tmp_path, chunk_size):
+    path = tmp_path / 'results.jsonl'
+    path.write_text(record('a.jpg') + '{"image": "b.j')
+    assert complete_lines_end(str(path), chunk_size) == len(record('a.jpg'))
+    path.write_text('{"image": "b.j')
+    assert complete_lines_end(str(path), chunk_size) == 0
+
+
+def test_partial_line_without_manifest_is_truncated(tmp_path):
+    path = tmp_path / 'results.jsonl'
+    path.write_text(record('a.jpg') + record('b.jpg') + '{"image": "c.jpg", "mod')
+
+    assert recover_output(str(path), None) == {('a.jpg', 'h'), ('b.jpg', 'h')}
+    # The next run appends after a clean line break, so c.jpg is not lost
+    with open(path, 'a', encoding='utf-8') as f:
+        f.write(record('c.jpg'))
+    assert recover_output(str(path), None) == {('a.jpg', 'h'), ('b.jpg', 'h'), ('c.jpg', 'h')}
+
+
+def test_manifest_offset_still_wins(tmp_path):
+    path = tmp_path / 'results.jsonl'
+    path.write_text(record('a.jpg') + record('b.jpg'))
+    assert recover_output(str(path), {'output_offset': len(record('a.jpg'))}) == {('a.jpg', 'h')}
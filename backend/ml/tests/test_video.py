@@ -0,0 +1,28 @@
+import numpy as np
+import pytest
+from PIL import Image
+
+import detect
+from video import scan_video
+
+
+def stub_inference(model, buffer, images, conf_threshold):
+    """Dark frames show one blight lesion, bright frames nothing."""
+    return [[{'class': 0, 'confidence': 0.8}] if np.asarray(image).mean() < 128 else [] for image in images]
+
+
+@pytest.mark.parametrize('batch_size', [1, 8])
+def test_skipped_frames_carry_last_detections(tmp_path, monkeypatch, batch_size):
+    monkeypatch.setattr(detect, 'run_buffered_inference', stub_inference)
+    # 2 fps: dark for 0.0-1.5s (one inferred + three skipped), bright for 2.0-3.0s
+    for n, value in enumerate([0, 0, 0, 0, 255, 255, 255]):
+        Image.new('RGB', (64, 64), (value,) * 3).save(tmp_path / f'{n:03d}.png')
+
+    stats = scan_video(None, str(tmp_path), ['blight'], batch_size=batch_size, merge_gap=0.5)
+
+    assert (stats['frames_inferred'], stats['frames_skipped']) == (2, 5)
+    blight = stats['diseases']['blight']
+    assert blight['frames'] == 4
+    assert blight['detections'] == 4
+    assert (blight['first_seen_s'], blight['last_seen_s']) == (0.0, 1.5)
+    assert blight['intervals'] == [[0.0, 1.5]]
@@ -0,0 +1,225 @@
+import argparse
+import hashlib
+import json
+import os
+import time
+from offline_bundles import DEFAULT_DISEASES, pack, unpack
+from region_crop import DATA_DIR, DEFAULT_DATA
+
+DEFAULT_STORE = os.path.join(DATA_DIR, 'versions')
+DELTA_FORMAT = 1
+DATASETS = {'region_crop': DEFAULT_DATA, 'diseases': DEFAULT_DISEASES}
+
+def keyed_records(dataset, data):
+    """Records keyed the way deltas address them: 'Region|Crop' rows or disease slugs."""
+    if dataset == 'region_crop':
+        return {f"{row['Region']}|{row['Crop']}": row for row in data}
+    if dataset == 'diseases':
+        return dict(data)
+    raise RuntimeError(f"Unknown dataset: {dataset}")
+
+def version_of(records):
+    """Hash of the canonical JSON of the keyed records; independent of row order and whitespace."""
+    canonical = json.dumps(records, sort_keys=True, separators=(',', ':'), ensure_ascii=False)
+    return hashlib.sha256(canonical.encode('utf-8')).hexdigest()[:16]
+
+def diff(old, new):
+    """Row-level ops turning old into new.
+
+    {'k', 'row'} sets a whole record (insert), {'k', 'set', 'unset'} changes
+    only some fields of an existing record, {'k', 'del'} removes it.
+    """
+    ops = []
+    for key in sorted(old.keys() - new.keys()):
+        ops.append({'k': key, 'del': True})
+    for key in sorted(new):
+        if key not in old:
+            ops.append({'k': key, 'row': new[key]})
+        elif old[key] != new[key]:
+            before, after = old[key], new[key]
+            if not isinstance(before, dict) or not isinstance(after, dict):
+                ops.append({'k': key, 'row': after})
+                continue
+            op = {'k': key, 'set': {f: v for f, v in after.items() if before.get(f, object()) != v}}
+            unset = sorted(before.keys() - after.keys())
+            if unset:
+                op['unset'] = unset
+            ops.append(op)
+    return ops
+
+def apply_ops(records, ops):
+    """New record map with ops applied; the input is not modified."""
+    records = dict(records)
+    for op in ops:
+        key = op['k']
+        if op.get('del'):
+            records.pop(key, None)
+        elif 'row' in op:
+            records[key] = op['row']
+        else:
+            if key not in records:
+                raise RuntimeError(f"Delta patches missing record: {key}")
+            row = dict(records[key])
+            row.update(op.get('set', {}))
+            for field in op.get('unset', []):
+                row.pop(field, None)
+            records[key] = row
+    return records
+
+def compose(first, second):
+    """Single op list equivalent to applying first, then second."""
+    merged = {op['k']: op for op in first}
+    for op in second:
+        key, prev = op['k'], merged.get(op['k'])
+        if prev is None or op.get('del') or 'row' in op:
+            merged[key] = op
+        elif prev.get('del'):
+            raise RuntimeError(f"Delta patches deleted record: {key}")
+        elif 'row' in prev:
+            merged[key] = {'k': key, 'row': apply_ops({key: prev['row']}, [op])[key]}
+        else:
+            unset = (set(prev.get('unset', [])) - set(op.get('set', {}))) | set(op.get('unset', []))
+            fields = {f: v for f, v in prev.get('set', {}).items() if f not in op.get('unset', [])}
+            fields.update(op.get('set', {}))
+            merged[key] = {'k': key, 'set': fields}
+            if unset:
+                merged[key]['unset'] = sorted(unset)
+    return [merged[k] for k in sorted(merged)]
+
+def apply_delta(records, delta):
+    """Apply a delta after checking the base version; verify the result hashes to delta['to']."""
+    if version_of(records) != delta['from']:
+        raise RuntimeError(f"Delta is for version {delta['from']}, records are {version_of(records)}")
+    result = apply_ops(records, delta['ops'])
+    if version_of(result) != delta['to']:
+        raise RuntimeError(f"Applied delta does not produce version {delta['to']}")
+    return result
+
+class VersionStore:
+    """Version chain and patch files for one dataset.
+
+    <store>/<dataset>/chain.json lists versions oldest first; head.json is
+    the newest keyed record map; <from>-<to>.delta.gz holds each step, and
+    since-<version>.delta.gz the composed delta from that version to head,
+    which is what a client at that version downloads.
+    """
+
+    def __init__(self, root, dataset):
+        self.dataset = dataset
+        self.dir = os.path.join(root, dataset)
+        self.chain_path = os.path.join(self.dir, 'chain.json')
+        self.head_path = os.path.join(self.dir, 'head.json')
+
+    def chain(self):
+        if not os.path.exists(self.chain_path):
+            return []
+        with open(self.chain_path, 'r', encoding='utf-8') as f:
+            return json.load(f)['versions']
+
+    def head(self):
+        if not os.path.exists(self.head_path):
+            return {}
+        with open(self.head_path, 'r', encoding='utf-8') as f:
+            return json.load(f)
+
+    def _write(self, path, data, binary=False):
+        tmp_path = path + '.tmp'
+        with open(tmp_path, 'wb' if binary else 'w', **({} if binary else {'encoding': 'utf-8'})) as f:
+            if binary:
+                f.write(data)
+            else:
+                json.dump(data, f, ensure_ascii=False, indent=None if path == self.head_path else 2)
+        os.replace(tmp_path, path)
+
+    def read_delta(self, name):
+        with open(os.path.join(self.dir, name), 'rb') as f:
+            return unpack(f.read())
+
+    def record(self, records):
+        """Append records as a new version if they differ from head; returns (version, ops or None)."""
+        os.makedirs(self.dir, exist_ok=True)
+        chain, head = self.chain(), self.head()
+        version = version_of(records)
+        if chain and chain[-1]['version'] == version:
+            return version, None
+
+        ops = diff(head, records)
+        base = chain[-1]['version'] if chain else version_of({})
+        step = {'format': DELTA_FORMAT, 'dataset': self.dataset, 'from': base, 'to': version, 'ops': ops}
+        self._write(os.path.join(self.dir, f'{base}-{version}.delta.gz'), pack(step)[1], binary=True)
+
+        # Re-point every older version's "since" file at the new head
+        for entry in chain:
+            since_name = f"since-{entry['version']}.delta.gz"
+            previous = self.read_delta(since_name)['ops'] if entry is not chain[-1] else []
+            since = {'format': DELTA_FORMAT, 'dataset': self.dataset, 'from': entry['version'], 'to': version,
+                     'ops': compose(previous, ops)}
+            self._write(os.path.join(self.dir, since_name), pack(since)[1], binary=True)
+
+        chain.append({'version': version, 'parent': base if chain else None,
+                      'created': time.strftime('%Y-%m-%dT%H:%M:%S'), 'ops': len(ops)})
+        self._write(self.head_path, records)
+        self._write(self.chain_path, {'dataset': self.dataset, 'versions': chain})
+        return version, ops
+
+    def since(self, version):
+        """Delta from version to head (empty ops when already current)."""
+        chain = self.chain()
+        if not chain:
+            raise RuntimeError(f"No versions recorded for {self.dataset}")
+        if chain[-1]['version'] == version:
+            return {'format': DELTA_FORMAT, 'dataset': self.dataset, 'from': version, 'to': version, 'ops': []}
+        if version not in {e['version'] for e in chain}:
+            raise RuntimeError(f"Unknown version {version}; download the full dataset")
+        return self.read_delta(f'since-{version}.delta.gz')
+
+    def verify(self):
+        """Replay every step from empty and check each version hash; returns failures."""
+        records, failed = {}, []
+        for entry in self.chain():
+            try:
+                parent = entry['parent'] or version_of({})
+                records = apply_delta(records, self.read_delta(f"{parent}-{entry['version']}.delta.gz"))
+                if entry['version'] != self.chain()[-1]['version']:
+                    apply_delta(records, self.since(entry['version']))
+            except Exception as e:
+                failed.append({'version': entry['version'], 'error': str(e)})
+                break
+        if not failed and records != self.head():
+            failed.append({'version': 'head', 'error': 'head.json does not match the replayed chain'})
+        return failed
+
+def main():
+    parser = argparse.ArgumentParser()
+    parser.add_argument('--dataset', choices=sorted(DATASETS), required=True)
+    parser.add_argument('--data', help='Dataset file (default: the repo copy)')
+    parser.add_argument('--store', default=DEFAULT_STORE, help='Version store directory')
+    parser.add_argument('--record', action='store_true', help='Record the current file as a new version')
+    parser.add_argument('--since', help='Print the delta from this version to head')
+    parser.add_argument('--verify', action='store_true', help='Replay the chain and check every version hash')
+    args = parser.parse_args()
+
+    try:
+        store = VersionStore(args.store, args.dataset)
+        result = {'dataset': args.dataset}
+        if args.record:
+            with open(args.data or DATASETS[args.dataset], 'r', encoding='utf-8') as f:
+                records = keyed_records(args.dataset, json.load(f))
+            version, ops = store.record(records)
+            result.update(version=version, changed=ops is not None, ops=len(ops or []))
+        if args.since:
+            delta = store.since(args.since)
+            result.update(delta=delta, delta_bytes=len(pack(delta)[1]))
+        if args.verify:
+            result['failed'] = store.verify()
+        result['head'] = store.chain()[-1]['version'] if store.chain() else None
+        print(json.dumps(result, indent=2, ensure_ascii=False))
+        if result.get('failed'):
+            exit(1)
+
+    except Exception as e:
+        print(json.dumps({'error': str(e)}))
+        exit(1)
+
+if __name__ == '__main__':
+    main()
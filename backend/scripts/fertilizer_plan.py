@@ -0,0 +1,298 @@
+import argparse
+import contextlib
+import csv
+import gc
+import io
+import json
+import os
+import re
+import time
+import numpy as np
+from region_crop import DEFAULT_DATA, RegionCropTable
+
+try:
+    import pyarrow.parquet as pq
+except ImportError:
+    pq = None
+
+NUTRIENTS = ('N_kg_per_ha', 'P2O5_kg_per_ha', 'K2O_kg_per_ha')
+SOIL_TYPES = ('Clay', 'Sandy', 'Silty', 'Loamy', 'Chalky', 'Peaty', 'Saline', 'Other')
+UREA_N = 0.46
+MOP_K2O = 0.60
+BAG_KG = 50.0
+CSV_SPECIAL = re.compile('[,"\r\n]')
+FARM_COLUMNS = {'region': ('region',), 'crop': ('crop', 'crop_type', 'main_crop'),
+                'hectares': ('hectares', 'size_hectares', 'size'), 'soil_type': ('soil_type', 'soil'),
+                'group': ('cooperative', 'cooperative_id', 'group')}
+# Integer-coded columns that aggregate() can total by; hectares and id are per-farm values
+GROUP_COLUMNS = ('region', 'crop', 'soil_type', 'group')
+
+def _column(names, wanted):
+    for alias in FARM_COLUMNS[wanted]:
+        if alias in names:
+            return alias
+    return None
+
+@contextlib.contextmanager
+def paused_gc():
+    """Building a million small row lists otherwise triggers repeated full collections."""
+    enabled = gc.isenabled()
+    gc.disable()
+    try:
+        yield
+    finally:
+        if enabled:
+            gc.enable()
+
+def _encode(values, codes):
+    """Integer code per value, growing the shared value -> code dict."""
+    return np.fromiter((codes.setdefault(v, len(codes)) for v in values), dtype=np.int32, count=len(values))
+
+def _read_columns(path):
+    """Raw farm columns by logical name, the id column if present, and the number of short CSV rows skipped."""
+    if path.endswith('.parquet'):
+        if pq is None:
+            raise RuntimeError('pyarrow is required to read Parquet files')
+        table = pq.read_table(path)
+        names = table.column_names
+        raw = {key: table.column(_column(names, key)).to_pylist()
+               for key in FARM_COLUMNS if _column(names, key)}
+        return raw, table.column('id').to_pylist() if 'id' in names else None, 0
+
+    with open(path, 'r', encoding='utf-8', newline='') as f:
+        reader = csv.reader(f)
+        header = next(reader)
+        positions = {key: header.index(_column(header, key)) for key in FARM_COLUMNS if _column(header, key)}
+        id_pos = header.index('id') if 'id' in header else None
+        width = max(list(positions.values()) + [id_pos or 0]) + 1
+        rows = [row for row in reader if row]
+    # Rows missing trailing cells are skipped, not padded
+    complete = [row for row in rows if len(row) >= width]
+    raw = {key: [row[pos] for row in complete] for key, pos in positions.items()}
+    return raw, [row[id_pos] for row in complete] if id_pos is not None else None, len(rows) - len(complete)
+
+def parse_hectares(values):
+    """float64 farm sizes; blank, non-numeric and negative entries become NaN."""
+    try:
+        hectares = np.asarray(values, dtype=np.float64)
+    except (TypeError, ValueError):
+        hectares = np.empty(len(values))
+        for i, value in enumerate(values):
+            try:
+                hectares[i] = float(value)
+            except (TypeError, ValueError):
+                hectares[i] = np.nan
+    hectares[~(hectares >= 0) | np.isinf(hectares)] = np.nan
+    return hectares
+
+def load_farms(path):
+    """Farm columns as arrays: string columns integer-coded, hectares as float64.
+
+    Farms whose size cannot be used are kept with NaN hectares and planned as
+    unmatched; CSV rows with too few cells are dropped and counted. Returns
+    (columns, vocab, short_rows) where vocab maps each coded column to its code -> string list.
+    """
+    try:
+        with paused_gc():
+            raw, ids, short_rows = _read_columns(path)
+        for key in ('region', 'crop', 'hectares'):
+            if key not in raw:
+                raise RuntimeError(f"no {key} column")
+        hectares = parse_hectares(raw.pop('hectares'))
+    except Exception as e:
+        raise RuntimeError(f"Failed to load farms: {str(e)}")
+
+    columns, vocab = {'hectares': hectares}, {}
+    for key, values in raw.items():
+        codes = {}
+        columns[key] = _encode(values, codes)
+        vocab[key] = list(codes)
+    columns['id'] = ids
+    return columns, vocab, short_rows
+
+def rate_matrix(table):
+    """(regions, crops, 3) kg/ha array plus region and crop name -> axis index maps."""
+    regions = sorted({region for region, _ in table.by_key})
+    crops = sorted({crop for _, crop in table.by_key})
+    region_axis = {name: i for i, name in enumerate(regions)}
+    crop_axis = {name: i for i, name in enumerate(crops)}
+    rates = np.full((len(regions), len(crops), len(NUTRIENTS)), np.nan)
+    for (region, crop), row in table.by_key.items():
+        for n, column in enumerate(NUTRIENTS):
+            value = table.data[column][row]
+            rates[region_axis[region], crop_axis[crop], n] = float(value) if value not in ('', None) else np.nan
+    return rates, region_axis, crop_axis
+
+def resolve_codes(names, index, axis):
+    """Table axis position for each distinct farm spelling (-1 when unknown); resolved once per spelling."""
+    positions = np.full(len(names), -1, dtype=np.int32)
+    for code, name in enumerate(names):
+        canonical, _ = index.resolve(name)
+        if canonical in axis:
+            positions[code] = axis[canonical]
+    return positions
+
+def soil_factor_table(vocab, factors):
+    """(soil codes, 3) multipliers; soils without an entry keep the table rates."""
+    table = np.ones((max(len(vocab), 1), len(NUTRIENTS)))
+    lowered = {k.lower(): v for k, v in (factors or {}).items()}
+    for code, soil in enumerate(vocab):
+        if str(soil).lower() in lowered:
+            table[code] = lowered[str(soil).lower()]
+    return table
+
+def plan(columns, vocab, table, npk_grade=(15, 15, 15), bag_kg=BAG_KG, soil_factors=None):
+    """Per-farm nutrient and product quantities in one vectorised pass.
+
+    NPK is sized to meet the P2O5 need; the N it does not cover comes from
+    urea and the K2O it does not cover from muriate of potash.
+    """
+    rates, region_axis, crop_axis = rate_matrix(table)
+    region_codes = resolve_codes(vocab['region'], table.regions, region_axis)
+    crop_codes = resolve_codes(vocab['crop'], table.crops, crop_axis)
+    region_pos, crop_pos = region_codes[columns['region']], crop_codes[columns['crop']]
+    matched = (region_pos >= 0) & (crop_pos >= 0)
+
+    per_ha = np.full((len(matched), len(NUTRIENTS)), np.nan)
+    per_ha[matched] = rates[region_pos[matched], crop_pos[matched]]
+    if 'soil_type' in columns and soil_factors:
+        per_ha *= soil_factor_table(vocab['soil_type'], soil_factors)[columns['soil_type']]
+    matched &= ~np.isnan(per_ha).any(axis=1)
+    valid_size = ~np.isnan(columns['hectares'])
+    matched &= valid_size
+
+    need = np.nan_to_num(per_ha) * np.where(valid_size, columns['hectares'], 0.0)[:, None]
+    n_grade, p_grade, k_grade = (g / 100.0 for g in npk_grade)
+    npk = need[:, 1] / p_grade if p_grade else np.zeros(len(need))
+    urea = np.maximum(need[:, 0] - npk * n_grade, 0.0) / UREA_N
+    mop = np.maximum(need[:, 2] - npk * k_grade, 0.0) / MOP_K2O
+    products = np.stack([npk, urea, mop], axis=1)
+    return {
+        'matched': matched,
+        'nutrients_kg': need,
+        'products_kg': products,
+        'bags': np.ceil(products / bag_kg).astype(np.int64),
+        'invalid_hectares': int((~valid_size).sum()),
+        'unknown': {'region': [vocab['region'][c] for c in np.flatnonzero(region_codes < 0)],
+                    'crop': [vocab['crop'][c] for c in np.flatnonzero(crop_codes < 0)]}
+    }
+
+def aggregate(result, columns, vocab, key):
+    """Totals per distinct value of a coded farm column, via bincount."""
+    codes = columns[key]
+    names = vocab[key]
+    totals = {}
+    sums = {
+        'farms': np.bincount(codes, minlength=len(names)),
+        'unmatched_farms': np.bincount(codes, weights=~result['matched'], minlength=len(names)),
+        'hectares': np.bincount(codes, weights=np.where(result['matched'], columns['hectares'], 0.0),
+                                minlength=len(names))
+    }
+    for n, nutrient in enumerate(NUTRIENTS):
+        sums[nutrient.replace('_per_ha', '')] = np.bincount(codes, weights=result['nutrients_kg'][:, n],
+                                                           minlength=len(names))
+    for p, product in enumerate(('npk', 'urea', 'mop')):
+        sums[f'{product}_kg'] = np.bincount(codes, weights=result['products_kg'][:, p], minlength=len(names))
+        sums[f'{product}_bags'] = np.bincount(codes, weights=result['bags'][:, p], minlength=len(names))
+    for code, name in enumerate(names):
+        totals[name] = {k: round(float(v[code]), 2) for k, v in sums.items()}
+    return totals
+
+def _csv_field(value):
+    """One value as csv.writer would write it (quoted only when it needs to be)."""
+    out = io.StringIO()
+    csv.writer(out, lineterminator='').writerow([value])
+    return out.getvalue()
+
+def write_farm_plan(path, result, columns, vocab):
+    """Per-farm CSV, one format operation per row.
+
+    Region and crop names go through csv.writer once per distinct spelling and
+    ids only when they contain a delimiter or quote, so names with commas
+    keep their columns without quoting a million rows one field at a time.
+    """
+    region = np.asarray([_csv_field(v) for v in vocab['region']], dtype=object)[columns['region']]
+    crop = np.asarray([_csv_field(v) for v in vocab['crop']], dtype=object)[columns['crop']]
+    ids = columns['id'] if columns['id'] is not None else range(len(region))
+    ids = [_csv_field(i) if isinstance(i, str) and CSV_SPECIAL.search(i) else i for i in ids]
+    numbers = np.column_stack([columns['hectares'], result['nutrients_kg'], result['products_kg']]).round(2)
+    row_format = '%s,%s,%s,%d,' + ','.join(['%.2f'] * numbers.shape[1]) + ',%d,%d,%d\n'
+    blank_format = '%s,%s,%s,%d,,' + ','.join(['%.2f'] * (numbers.shape[1] - 1)) + ',%d,%d,%d\n'
+    tmp_path = path + '.tmp'
+    with paused_gc(), open(tmp_path, 'w', encoding='utf-8', newline='') as f:
+        f.write('id,region,crop,matched,hectares,N_kg,P2O5_kg,K2O_kg,npk_kg,urea_kg,mop_kg,'
+                'npk_bags,urea_bags,mop_bags\n')
+        # Unusable (NaN) sizes are left blank
+        f.writelines(row_format % (i, r, c, m, *values, *bags) if values[0] == values[0] else
+                     blank_format % (i, r, c, m, *values[1:], *bags)
+                     for i, r, c, m, values, bags in
+                     zip(ids, region, crop, result['matched'].tolist(), numbers.tolist(), result['bags'].tolist()))
+    os.replace(tmp_path, path)
+
+def synthetic_farms(path, count, table, seed=0):
+    """CSV of random farms over the table's regions and crops, with some misspellings."""
+    rng = np.random.default_rng(seed)
+    regions = sorted(set(table.data['Region'])) + ['Extreme-Nord', 'Sud Ouest', 'Litoral']
+    crops = sorted(set(table.data['Crop'])) + ['corn', 'manioc', 'Casava']
+    region = np.asarray(regions)[rng.integers(0, len(regions), count)]
+    crop = np.asarray(crops)[rng.integers(0, len(crops), count)]
+    soil = np.asarray(SOIL_TYPES)[rng.integers(0, len(SOIL_TYPES), count)]
+    hectares = np.round(rng.lognormal(0.3, 0.8, count), 2)
+    cooperative = rng.integers(0, 200, count)
+    with open(path, 'w', encoding='utf-8') as f:
+        f.write('id,region,crop,size_hectares,soil_type,cooperative\n')
+        f.writelines(f'{i},{r},{c},{h},{s},coop-{g}\n'
+                     for i, (r, c, h, s, g) in enumerate(zip(region, crop, hectares, soil, cooperative)))
+    return path
+
+def main():
+    parser = argparse.ArgumentParser()
+    parser.add_argument('--farms', required=True, help='CSV or Parquet with region, crop, hectares[, soil_type, cooperative]')
+    parser.add_argument('--data', default=DEFAULT_DATA, help='region_crop_full.json')
+    parser.add_argument('--synthetic', type=int, help='Write N random farms to --farms first')
+    parser.add_argument('--group-by', nargs='+', default=['group', 'region'], choices=GROUP_COLUMNS,
+                        help='Coded farm columns to total by')
+    parser.add_argument('--npk-grade', default='15-15-15', help='NPK compound grade N-P2O5-K2O')
+    parser.add_argument('--bag-kg', type=float, default=BAG_KG, help='Bag size for all products')
+    parser.add_argument('--soil-factors', type=json.loads,
+                        help='JSON {soil_type: [N, P2O5, K2O] multipliers}; table rates are used otherwise')
+    parser.add_argument('--farms-out', help='Write the per-farm plan CSV here')
+    args = parser.parse_args()
+
+    try:
+        table = RegionCropTable.from_json(args.data)
+        if args.synthetic:
+            synthetic_farms(args.farms, args.synthetic, table)
+
+        timings = {}
+        start = time.perf_counter()
+        columns, vocab, short_rows = load_farms(args.farms)
+        timings['load_s'] = time.perf_counter() - start
+
+        start = time.perf_counter()
+        grade = tuple(float(g) for g in args.npk_grade.split('-'))
+        result = plan(columns, vocab, table, grade, args.bag_kg, args.soil_factors)
+        timings['plan_s'] = time.perf_counter() - start
+
+        report = {'farms': len(columns['hectares']), 'matched': int(result['matched'].sum()),
+                  'invalid_hectares': result['invalid_hectares'], 'short_rows': short_rows,
+                  'unknown_spellings': result['unknown']}
+        report['totals'] = aggregate(result, {**columns, 'all': np.zeros(len(columns['hectares']), np.int32)},
+                                     {**vocab, 'all': ['all']}, 'all')['all']
+        for key in args.group_by:
+            if key in vocab:
+                report[f'by_{key}'] = aggregate(result, columns, vocab, key)
+
+        if args.farms_out:
+            start = time.perf_counter()
+            write_farm_plan(args.farms_out, result, columns, vocab)
+            timings['write_s'] = time.perf_counter() - start
+        report['timings'] = timings
+        print(json.dumps(report, indent=2))
+
+    except Exception as e:
+        print(json.dumps({'error': str(e)}))
+        exit(1)
+
+if __name__ == '__main__':
+    main()
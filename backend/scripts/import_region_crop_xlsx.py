@@ -0,0 +1,187 @@
+import argparse
+import hashlib
+import json
+import os
+import sys
+from region_crop import DATA_DIR
+
+try:
+    from openpyxl import load_workbook
+except ImportError:
+    load_workbook = None
+
+FULL_PATH = os.path.join(DATA_DIR, 'region_crop_full.json')
+SUMMARY_PATH = os.path.join(DATA_DIR, 'region_crop_data.json')
+COLUMNS_PATH = os.path.join(DATA_DIR, 'region_crop_columns.json')
+KEY_COLUMNS = ('Region', 'Crop')
+NUMERIC_COLUMNS = ('N_kg_per_ha', 'P2O5_kg_per_ha', 'K2O_kg_per_ha')
+
+def row_key(row):
+    return f"{row['Region']}|{row['Crop']}"
+
+def row_hash(row):
+    return hashlib.sha256(json.dumps(row, sort_keys=True, ensure_ascii=False).encode('utf-8')).hexdigest()
+
+def clean_cell(value):
+    """Trimmed strings, integral floats as ints, empty cells as ''. Matches the JS importer's output."""
+    if value is None:
+        return ''
+    if isinstance(value, str):
+        return value.strip()
+    if isinstance(value, float) and value.is_integer():
+        return int(value)
+    return value
+
+def iter_sheet_rows(path, sheet=None):
+    """(row_number, {header: value}) from a workbook opened in read-only streaming mode."""
+    if load_workbook is None:
+        raise RuntimeError('openpyxl is required to read .xlsx files')
+    workbook = load_workbook(path, read_only=True, data_only=True)
+    try:
+        worksheet = workbook[sheet] if sheet else workbook.worksheets[0]
+        rows = worksheet.iter_rows(values_only=True)
+        header = [clean_cell(h) for h in next(rows, ())]
+        yield 1, header
+        for number, values in enumerate(rows, 2):
+            if values is None or all(v is None or v == '' for v in values):
+                continue
+            yield number, {h: clean_cell(v) for h, v in zip(header, values) if h != ''}
+    finally:
+        workbook.close()
+
+def validate(number, row):
+    """Problems with one sheet row, as strings."""
+    problems = []
+    for col in KEY_COLUMNS:
+        if not row.get(col):
+            problems.append(f'row {number}: {col} is empty')
+    for col in NUMERIC_COLUMNS:
+        value = row.get(col, '')
+        if value != '' and (not isinstance(value, (int, float)) or value < 0):
+            problems.append(f'row {number}: {col} must be a non-negative number, got {value!r}')
+    return problems
+
+def summary_row(row):
+    """Condensed record in region_crop_data.json, built like import_region_crop_xlsx.js does.
+
+    Like the JS `||` fallbacks, a 0 kg/ha nutrient is left out of the fertilizer text.
+    """
+    parts = [f'{label} {row[col]} kg/ha' for label, col in (('N', 'N_kg_per_ha'), ('P2O5', 'P2O5_kg_per_ha'),
+                                                            ('K2O', 'K2O_kg_per_ha')) if row.get(col)]
+    if row.get('Split_Timing'):
+        parts.append(f"Timing: {row['Split_Timing']}")
+    if row.get('Application_Method'):
+        parts.append(f"Method: {row['Application_Method']}")
+    first = lambda *cols: next((str(row[c]) for c in cols if row.get(c)), '')
+    return {
+        'region': row['Region'],
+        'crop': row['Crop'],
+        'fertilizer': '; '.join(parts),
+        'pests': first('Common_Pests', 'Pests'),
+        'diseases': first('Common_Diseases', 'Diseases'),
+        'pest_control': first('Pest_Control_Methods', 'Easy_Treatments'),
+        'notes': first('Notes', 'Adaptation_Notes', 'Soil_Type_Notes')
+    }
+
+def read_json(path, default):
+    if not os.path.exists(path):
+        return default
+    with open(path, 'r', encoding='utf-8') as f:
+        return json.load(f)
+
+def write_json(path, data):
+    tmp_path = path + '.tmp'
+    with open(tmp_path, 'w', encoding='utf-8') as f:
+        json.dump(data, f, indent=2, ensure_ascii=False)
+    os.replace(tmp_path, path)
+
+def import_workbook(xlsx_path, sheet=None, allow_new_columns=False, dry_run=False,
+                    full_path=FULL_PATH, summary_path=SUMMARY_PATH, columns_path=COLUMNS_PATH):
+    """Stream the sheet, validate it, and rewrite only the output files whose content changed.
+
+    Rows are compared to the current output by (Region, Crop) and content
+    hash; the report lists added, changed (with the fields that differ)
+    and removed keys. Nothing is written if any row fails validation.
+    """
+    columns = read_json(columns_path, [])
+    old_rows = {row_key(r): r for r in read_json(full_path, [])}
+    old_hashes = {k: row_hash(r) for k, r in old_rows.items()}
+
+    rows, seen, errors, warnings = [], {}, [], []
+    header = None
+    for number, row in iter_sheet_rows(xlsx_path, sheet):
+        if header is None:
+            header = [h for h in row if h != '']
+            missing = [c for c in columns if c not in header]
+            extra = [c for c in header if c not in columns]
+            if missing:
+                errors.append(f"missing columns: {', '.join(missing)}")
+            if extra and not allow_new_columns:
+                errors.append(f"unexpected columns (use --allow-new-columns): {', '.join(extra)}")
+            elif extra:
+                warnings.append(f"new columns: {', '.join(extra)}")
+            if errors:
+                break
+            continue
+        problems = validate(number, row)
+        if not problems and row_key(row) in seen:
+            problems.append(f'row {number}: duplicate of row {seen[row_key(row)]} ({row_key(row)})')
+        if problems:
+            errors.extend(problems)
+            continue
+        seen[row_key(row)] = number
+        rows.append({col: row.get(col, '') for col in header})
+
+    new_hashes = {row_key(r): row_hash(r) for r in rows}
+    added = [k for k in new_hashes if k not in old_hashes]
+    removed = [k for k in old_hashes if k not in new_hashes]
+    by_key = {row_key(r): r for r in rows}
+    changed = {}
+    for key, digest in new_hashes.items():
+        if key in old_hashes and old_hashes[key] != digest:
+            new, old = by_key[key], old_rows[key]
+            changed[key] = sorted(f for f in set(new) | set(old) if new.get(f) != old.get(f))
+
+    report = {'rows': len(rows), 'added': added, 'changed': changed, 'removed': removed,
+              'errors': errors, 'warnings': warnings, 'written': []}
+    if errors or dry_run:
+        return report
+
+    outputs = [
+        (full_path, rows),
+        (summary_path, [summary_row(r) for r in rows]),
+        (columns_path, header)
+    ]
+    for path, data in outputs:
+        if read_json(path, None) != data:
+            write_json(path, data)
+            report['written'].append(os.path.basename(path))
+    return report
+
+def main():
+    parser = argparse.ArgumentParser()
+    parser.add_argument('workbook', help='Agronomy .xlsx workbook')
+    parser.add_argument('--sheet', help='Worksheet name (default: first sheet)')
+    parser.add_argument('--allow-new-columns', action='store_true', help='Accept columns not in region_crop_columns.json')
+    parser.add_argument('--dry-run', action='store_true', help='Report changes without writing')
+    parser.add_argument('--record-version', help='Also record the new data in this dataset_delta.py store')
+    args = parser.parse_args()
+
+    try:
+        report = import_workbook(args.workbook, args.sheet, args.allow_new_columns, args.dry_run)
+        if args.record_version and 'region_crop_full.json' in report['written']:
+            from dataset_delta import VersionStore, keyed_records
+            version, _ = VersionStore(args.record_version, 'region_crop').record(
+                keyed_records('region_crop', read_json(FULL_PATH, [])))
+            report['version'] = version
+        print(json.dumps(report, indent=2, ensure_ascii=False))
+        if report['errors']:
+            print(f"{len(report['errors'])} invalid rows; nothing written", file=sys.stderr)
+            exit(1)
+
+    except Exception as e:
+        print(json.dumps({'error': str(e)}))
+        exit(1)
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,176 @@
+import argparse
+import gzip
+import hashlib
+import json
+import os
+import re
+import time
+from region_crop import DEFAULT_DATA, DATA_DIR, normalize
+
+DEFAULT_DISEASES = os.path.join(DATA_DIR, '..', 'ml', 'data', 'diseases.json')
+DEFAULT_OUTPUT = os.path.join(DATA_DIR, 'bundles')
+BUNDLE_FORMAT = 1
+MANIFEST_FILE = 'manifest.json'
+
+def slug(name):
+    return normalize(name).replace(' ', '-')
+
+def encode_rows(rows):
+    """Rows -> column list, per-column type, a shared string table and positional rows.
+
+    Every string cell is replaced by its index in the string table, so text
+    repeated across crops (soil notes, split timing, treatments) is stored once.
+    Numeric columns are kept as numbers.
+    """
+    columns = list(rows[0].keys()) if rows else []
+    types = {col: 'n' if all(isinstance(r.get(col), (int, float)) for r in rows) else 's' for col in columns}
+    strings, positions = [], {}
+    encoded = []
+    for row in rows:
+        out = []
+        for col in columns:
+            value = row.get(col, '')
+            if types[col] == 's':
+                value = str(value)
+                if value not in positions:
+                    positions[value] = len(strings)
+                    strings.append(value)
+                value = positions[value]
+            out.append(value)
+        encoded.append(out)
+    return {'columns': columns, 'types': [types[c] for c in columns], 'strings': strings, 'rows': encoded}
+
+def decode_rows(table):
+    """Inverse of encode_rows."""
+    strings = table['strings']
+    return [{col: strings[v] if kind == 's' else v for col, kind, v in zip(table['columns'], table['types'], row)}
+            for row in table['rows']]
+
+def pack(payload):
+    """Compact JSON, gzip with a fixed header so identical content gives identical bytes."""
+    raw = json.dumps(payload, separators=(',', ':'), ensure_ascii=False, sort_keys=True).encode('utf-8')
+    return raw, gzip.compress(raw, compresslevel=9, mtime=0)
+
+def unpack(data):
+    return json.loads(gzip.decompress(data))
+
+def build_bundles(rows, diseases):
+    """One bundle per region plus a shared disease-knowledge bundle, keyed by bundle name."""
+    by_region = {}
+    for row in rows:
+        by_region.setdefault(row['Region'], []).append(row)
+
+    bundles = {}
+    for region, region_rows in sorted(by_region.items()):
+        bundles[f'region-{slug(region)}'] = {'format': BUNDLE_FORMAT, 'kind': 'region_crop', 'region': region,
+                                             'table': encode_rows(region_rows)}
+    disease_rows = [dict(slug=key, **{k: json.dumps(v) if isinstance(v, list) else v for k, v in entry.items()})
+                    for key, entry in diseases.items()]
+    bundles['diseases'] = {'format': BUNDLE_FORMAT, 'kind': 'diseases', 'list_columns': ['recommendations'],
+                           'table': encode_rows(disease_rows)}
+    return bundles
+
+def write_bundles(bundles, output_dir, prune=False):
+    """Write content-addressed bundle files and the manifest; unchanged bundles are not rewritten."""
+    os.makedirs(output_dir, exist_ok=True)
+    manifest_path = os.path.join(output_dir, MANIFEST_FILE)
+    previous = {}
+    if os.path.exists(manifest_path):
+        with open(manifest_path, 'r', encoding='utf-8') as f:
+            previous = json.load(f).get('bundles', {})
+
+    entries, changed = {}, []
+    for name, payload in bundles.items():
+        raw, packed = pack(payload)
+        digest = hashlib.sha256(packed).hexdigest()
+        filename = f'{name}.{digest[:16]}.json.gz'
+        path = os.path.join(output_dir, filename)
+        if not os.path.exists(path):
+            tmp_path = path + '.tmp'
+            with open(tmp_path, 'wb') as f:
+                f.write(packed)
+            os.replace(tmp_path, path)
+        if previous.get(name, {}).get('sha256') != digest:
+            changed.append(name)
+        table = payload['table']
+        entries[name] = {
+            'file': filename,
+            'sha256': digest,
+            'bytes': len(packed),
+            'raw_bytes': len(raw),
+            'rows': len(table['rows']),
+            'strings': len(table['strings'])
+        }
+        if 'region' in payload:
+            entries[name]['region'] = payload['region']
+
+    manifest = {'format': BUNDLE_FORMAT, 'generated': time.strftime('%Y-%m-%dT%H:%M:%S'), 'bundles': entries}
+    tmp_path = manifest_path + '.tmp'
+    with open(tmp_path, 'w', encoding='utf-8') as f:
+        json.dump(manifest, f, indent=2)
+    os.replace(tmp_path, manifest_path)
+
+    removed = []
+    if prune:
+        live = {e['file'] for e in entries.values()}
+        pattern = re.compile(r'.+\.[0-9a-f]{16}\.json\.gz$')
+        for filename in os.listdir(output_dir):
+            if pattern.match(filename) and filename not in live:
+                os.remove(os.path.join(output_dir, filename))
+                removed.append(filename)
+    return manifest, changed, removed
+
+def verify(output_dir):
+    """Re-hash every bundle and check it decodes; returns the names that fail."""
+    with open(os.path.join(output_dir, MANIFEST_FILE), 'r', encoding='utf-8') as f:
+        manifest = json.load(f)
+    failed = []
+    for name, entry in manifest['bundles'].items():
+        try:
+            with open(os.path.join(output_dir, entry['file']), 'rb') as f:
+                data = f.read()
+            if hashlib.sha256(data).hexdigest() != entry['sha256']:
+                raise ValueError('hash mismatch')
+            decode_rows(unpack(data)['table'])
+        except Exception as e:
+            failed.append({'bundle': name, 'error': str(e)})
+    return failed
+
+def main():
+    parser = argparse.ArgumentParser()
+    parser.add_argument('--data', default=DEFAULT_DATA, help='region_crop_full.json')
+    parser.add_argument('--diseases', default=DEFAULT_DISEASES, help='diseases.json')
+    parser.add_argument('--output', default=DEFAULT_OUTPUT, help='Bundle directory (manifest.json + bundles)')
+    parser.add_argument('--prune', action='store_true', help='Delete bundle files no longer in the manifest')
+    parser.add_argument('--verify', action='store_true', help='Only check existing bundles against the manifest')
+    args = parser.parse_args()
+
+    try:
+        if args.verify:
+            failed = verify(args.output)
+            print(json.dumps({'ok': not failed, 'failed': failed}))
+            exit(1 if failed else 0)
+
+        with open(args.data, 'r', encoding='utf-8') as f:
+            rows = json.load(f)
+        with open(args.diseases, 'r', encoding='utf-8') as f:
+            diseases = json.load(f)
+        manifest, changed, removed = write_bundles(build_bundles(rows, diseases), args.output, args.prune)
+
+        bundles = manifest['bundles']
+        regions = [e for e in bundles.values() if 'region' in e]
+        print(json.dumps({
+            'bundles': len(bundles),
+            'changed': changed,
+            'removed': removed,
+            'source_bytes': os.path.getsize(args.data) + os.path.getsize(args.diseases),
+            'mean_region_bytes': sum(e['bytes'] for e in regions) // max(len(regions), 1),
+            'total_bytes': sum(e['bytes'] for e in bundles.values())
+        }, indent=2))
+
+    except Exception as e:
+        print(json.dumps({'error': str(e)}))
+        exit(1)
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,288 @@
+import argparse
+import bisect
+import hashlib
+import json
+import os
+import pickle
+import re
+import time
+import unicodedata
+from collections import defaultdict
+
+DATA_DIR = os.path.join(os.path.dirname(__file__), '..', 'data')
+DEFAULT_DATA = os.path.join(DATA_DIR, 'region_crop_full.json')
+SNAPSHOT_VERSION = 1
+FUZZY_THRESHOLD = 0.65
+MEMO_SIZE = 4096
+
+# Same spirit as CROP_ALIASES in regionCropService.js, plus French names used in the app
+CROP_ALIASES = {
+    'corn': 'maize', 'field corn': 'maize', 'sweet corn': 'maize', 'mais': 'maize',
+    'yardlong bean': 'beans dry', 'cow pea': 'beans dry', 'cowpea': 'beans dry', 'haricot': 'beans dry',
+    'sorghum bicolor': 'sorghum', 'sorgho': 'sorghum',
+    'manioc': 'cassava', 'cacao': 'cocoa', 'cafe': 'coffee', 'coton': 'cotton',
+    'peanut': 'groundnuts', 'peanuts': 'groundnuts', 'arachide': 'groundnuts', 'arachides': 'groundnuts',
+    'mil': 'millet', 'palm': 'oil palm', 'palmier a huile': 'oil palm',
+    'banane': 'plantain banana', 'irish potato': 'potato', 'pomme de terre': 'potato',
+    'riz': 'rice paddy', 'hevea': 'rubber', 'soya': 'soybean', 'soja': 'soybean',
+    'legumes': 'vegetables mixed', 'igname': 'yam'
+}
+REGION_ALIASES = {
+    'adamaoua': 'adamawa', 'extreme nord': 'far north', 'extreme north': 'far north', 'est': 'east',
+    'nord': 'north', 'nord ouest': 'northwest', 'north west': 'northwest', 'nw': 'northwest',
+    'sud': 'south', 'sud ouest': 'southwest', 'south west': 'southwest', 'sw': 'southwest', 'ouest': 'west'
+}
+
+def normalize(value):
+    """Lowercase, strip accents and collapse punctuation: 'Plantain/Banana' -> 'plantain banana'."""
+    text = unicodedata.normalize('NFKD', str(value or '')).encode('ascii', 'ignore').decode('ascii')
+    return ' '.join(re.sub(r'[^a-z0-9]+', ' ', text.lower()).split())
+
+def trigrams(text):
+    padded = f'  {text} '
+    return {padded[i:i + 3] for i in range(len(padded) - 2)}
+
+def levenshtein(a, b, limit=None):
+    """Edit distance with two rows; stops early once every cell exceeds limit."""
+    if len(a) < len(b):
+        a, b = b, a
+    previous = list(range(len(b) + 1))
+    for i, ca in enumerate(a, 1):
+        current = [i]
+        for j, cb in enumerate(b, 1):
+            current.append(min(previous[j] + 1, current[j - 1] + 1, previous[j - 1] + (ca != cb)))
+        if limit is not None and min(current) > limit:
+            return limit + 1
+        previous = current
+    return previous[-1]
+
+class NameIndex:
+    """Exact, prefix and fuzzy resolution of free text to one canonical name."""
+
+    def __init__(self, names, aliases):
+        self.canonical = {}
+        for name in names:
+            key = normalize(name)
+            self.canonical[key] = key
+            # 'plantain banana' also answers to 'plantain'; 'rice paddy' to 'rice'
+            for part in re.split(r'[/()]', name):
+                part = normalize(part)
+                if part:
+                    self.canonical.setdefault(part, key)
+        for alias, target in aliases.items():
+            if target in self.canonical.values():
+                self.canonical.setdefault(normalize(alias), target)
+
+        self.sorted_keys = sorted(self.canonical)
+        self.grams = defaultdict(set)
+        for key in self.canonical:
+            for gram in trigrams(key):
+                self.grams[gram].add(key)
+        self.memo = {}
+
+    def state(self):
+        return {'canonical': self.canonical, 'sorted_keys': self.sorted_keys, 'grams': dict(self.grams)}
+
+    @classmethod
+    def from_state(cls, state):
+        index = cls.__new__(cls)
+        index.canonical, index.sorted_keys, index.grams = state['canonical'], state['sorted_keys'], state['grams']
+        index.memo = {}
+        return index
+
+    def exact(self, text):
+        return self.canonical.get(normalize(text))
+
+    def prefix(self, text):
+        """Canonical names with any spelling that starts with text."""
+        text = normalize(text)
+        start = bisect.bisect_left(self.sorted_keys, text)
+        found = []
+        for key in self.sorted_keys[start:]:
+            if not key.startswith(text):
+                break
+            if self.canonical[key] not in found:
+                found.append(self.canonical[key])
+        return found
+
+    def fuzzy(self, text, threshold=FUZZY_THRESHOLD):
+        """(canonical, similarity) of the closest spelling, trigram candidates verified by edit distance."""
+        text = normalize(text)
+        if not text:
+            return None, 0.0
+        shared = defaultdict(int)
+        for gram in trigrams(text):
+            for key in self.grams.get(gram, ()):
+                shared[key] += 1
+        best, best_score = None, 0.0
+        for key in sorted(shared, key=shared.get, reverse=True)[:8]:
+            longest = max(len(key), len(text))
+            limit = int(longest * (1 - threshold))
+            score = 1 - levenshtein(text, key, limit) / longest
+            if score > best_score:
+                best, best_score = key, score
+        if best_score < threshold:
+            return None, best_score
+        return self.canonical[best], best_score
+
+    def resolve(self, text):
+        """(canonical, how) using exact/alias first, fuzzy second."""
+        hit = self.exact(text)
+        if hit:
+            return hit, 'exact' if hit == normalize(text) else 'alias'
+        # Misspellings repeat (the same farmer, the same village), so remember fuzzy answers
+        if text not in self.memo:
+            if len(self.memo) >= MEMO_SIZE:
+                self.memo.clear()
+            hit, score = self.fuzzy(text)
+            self.memo[text] = (hit, f'fuzzy:{score:.2f}') if hit else (None, None)
+        return self.memo[text]
+
+class RegionCropTable:
+    """Columnar copy of region_crop_full.json with hash, prefix and fuzzy indexes.
+
+    Columns are plain lists indexed by row id; numeric columns stay numbers.
+    Indexes are keyed on normalised names, so lookups never scan rows.
+    """
+
+    def __init__(self, rows, source_hash=None):
+        self.columns = list(rows[0].keys()) if rows else []
+        self.data = {col: [row.get(col, '') for row in rows] for col in self.columns}
+        self.size = len(rows)
+        self.source_hash = source_hash
+
+        self.by_key = {}
+        self.by_region = defaultdict(list)
+        self.by_crop = defaultdict(list)
+        for i in range(self.size):
+            region, crop = normalize(self.data['Region'][i]), normalize(self.data['Crop'][i])
+            self.by_key[(region, crop)] = i
+            self.by_region[region].append(i)
+            self.by_crop[crop].append(i)
+        self.by_region, self.by_crop = dict(self.by_region), dict(self.by_crop)
+
+        self.regions = NameIndex(set(self.data.get('Region', [])), REGION_ALIASES)
+        self.crops = NameIndex(set(self.data.get('Crop', [])), CROP_ALIASES)
+
+    @classmethod
+    def from_json(cls, path=DEFAULT_DATA):
+        try:
+            with open(path, 'rb') as f:
+                raw = f.read()
+            return cls(json.loads(raw), hashlib.sha256(raw).hexdigest())
+        except Exception as e:
+            raise RuntimeError(f"Failed to load region/crop table: {str(e)}")
+
+    def row(self, i):
+        return {col: self.data[col][i] for col in self.columns}
+
+    def get(self, region, crop):
+        """Point lookup on exact normalised names; None if absent."""
+        i = self.by_key.get((normalize(region), normalize(crop)))
+        return None if i is None else self.row(i)
+
+    def lookup(self, region, crop):
+        """Resolve region and crop independently (exact, alias, fuzzy) and return the row with how it matched."""
+        region_key, region_how = self.regions.resolve(region)
+        crop_key, crop_how = self.crops.resolve(crop)
+        if region_key is None or crop_key is None:
+            return None
+        i = self.by_key.get((region_key, crop_key))
+        if i is None:
+            return None
+        return {'row': self.row(i), 'match': {'region': region_how, 'crop': crop_how}}
+
+    def region_rows(self, region):
+        region_key, _ = self.regions.resolve(region)
+        return [self.row(i) for i in self.by_region.get(region_key, [])]
+
+    def crop_rows(self, crop):
+        crop_key, _ = self.crops.resolve(crop)
+        return [self.row(i) for i in self.by_crop.get(crop_key, [])]
+
+    def save_snapshot(self, path):
+        """Pickle columns and built indexes as plain containers so loading is a single unpickle."""
+        state = {key: getattr(self, key) for key in ('columns', 'data', 'size', 'source_hash',
+                                                      'by_key', 'by_region', 'by_crop')}
+        state.update(version=SNAPSHOT_VERSION, regions=self.regions.state(), crops=self.crops.state())
+        tmp_path = path + '.tmp'
+        with open(tmp_path, 'wb') as f:
+            pickle.dump(state, f, protocol=pickle.HIGHEST_PROTOCOL)
+        os.replace(tmp_path, path)
+
+    @staticmethod
+    def load_snapshot(path):
+        try:
+            with open(path, 'rb') as f:
+                snapshot = pickle.load(f)
+        except Exception as e:
+            raise RuntimeError(f"Failed to load snapshot: {str(e)}")
+        if snapshot.pop('version', None) != SNAPSHOT_VERSION:
+            raise RuntimeError('Unsupported snapshot version')
+        table = RegionCropTable.__new__(RegionCropTable)
+        table.regions = NameIndex.from_state(snapshot.pop('regions'))
+        table.crops = NameIndex.from_state(snapshot.pop('crops'))
+        table.__dict__.update(snapshot)
+        return table
+
+def load_table(data_path=DEFAULT_DATA, snapshot_path=None):
+    """Snapshot if it was built from the current data file, else the JSON (refreshing the snapshot)."""
+    if snapshot_path and os.path.exists(snapshot_path):
+        table = RegionCropTable.load_snapshot(snapshot_path)
+        with open(data_path, 'rb') as f:
+            if hashlib.sha256(f.read()).hexdigest() == table.source_hash:
+                return table
+    table = RegionCropTable.from_json(data_path)
+    if snapshot_path:
+        table.save_snapshot(snapshot_path)
+    return table
+
+def bench(table, rounds=10000):
+    """Mean microseconds per lookup kind."""
+    cases = {
+        'point': lambda: table.get('Centre', 'Cocoa'),
+        'alias': lambda: table.lookup('Extreme-Nord', 'corn'),
+        'prefix': lambda: table.crops.prefix('ri'),
+        'fuzzy': lambda: table.lookup('Litoral', 'Casava'),
+        'fuzzy_cold': lambda: (table.regions.fuzzy('Litoral'), table.crops.fuzzy('Casava'))
+    }
+    timings = {}
+    for name, fn in cases.items():
+        start = time.perf_counter()
+        for _ in range(rounds):
+            fn()
+        timings[f'{name}_us'] = (time.perf_counter() - start) / rounds * 1e6
+    return timings
+
+def main():
+    parser = argparse.ArgumentParser()
+    parser.add_argument('--data', default=DEFAULT_DATA, help='region_crop_full.json')
+    parser.add_argument('--snapshot', help='Compiled snapshot to load (rebuilt when the data changes)')
+    parser.add_argument('--region', help='Region to look up')
+    parser.add_argument('--crop', help='Crop to look up')
+    parser.add_argument('--prefix', help='Crop and region names starting with this text')
+    parser.add_argument('--bench', action='store_true', help='Time point, alias, prefix and fuzzy lookups')
+    args = parser.parse_args()
+
+    try:
+        start = time.perf_counter()
+        table = load_table(args.data, args.snapshot)
+        result = {'rows': table.size, 'load_ms': (time.perf_counter() - start) * 1000}
+        if args.region and args.crop:
+            result['result'] = table.lookup(args.region, args.crop)
+        elif args.region:
+            result['result'] = table.region_rows(args.region)
+        elif args.crop:
+            result['result'] = table.crop_rows(args.crop)
+        if args.prefix:
+            result['prefix'] = {'regions': table.regions.prefix(args.prefix), 'crops': table.crops.prefix(args.prefix)}
+        if args.bench:
+            result['bench'] = bench(table)
+        print(json.dumps(result, indent=2, ensure_ascii=False))
+
+    except Exception as e:
+        print(json.dumps({'error': str(e)}))
+        exit(1)
+
+if __name__ == '__main__':
+    main()
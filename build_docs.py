@@ -0,0 +1,187 @@
+#!/usr/bin/env python3
+"""
+Incremental build driver for the PDF generators
+
+Each target lists the files it reads. Their content hashes are stored in a
+manifest; a target is rebuilt only when one of them changed or its output is
+missing or was modified, and out-of-date targets build in parallel.
+"""
+import argparse
+import glob
+import hashlib
+import json
+import os
+import subprocess
+import sys
+import time
+from concurrent.futures import ThreadPoolExecutor
+
+ROOT = os.path.dirname(os.path.abspath(__file__))
+MANIFEST = os.path.join(ROOT, '.pdf_build_manifest.json')
+PITCH_MD = 'YCD_FARMER_GUIDE_PITCH.md'
+GRAPHICS = 'graphics/*.svg'
+
+# Paths are relative to the repository root; scripts run from their own directory
+TARGETS = {
+    'pitch-simple': {
+        'script': 'create_pdf_simple.py',
+        'inputs': [PITCH_MD, GRAPHICS, 'svg_cache.py', 'pdf_images.py'],
+        'outputs': ['YCD_Pitch_Final_v2.pdf']
+    },
+    'pitch-weasyprint': {
+        'script': 'convert_to_pdf.py',
+        'inputs': [PITCH_MD, GRAPHICS, 'render_pdfs.py', 'pdf_images.py', 'styles/pitch.css'],
+        'outputs': ['YCD_FARMER_GUIDE_PITCH.pdf']
+    },
+    'pitch-deck': {
+        'script': 'create_pdf.py',
+        'inputs': [PITCH_MD, GRAPHICS, 'render_pdfs.py', 'pdf_images.py', 'styles/pitch_deck.css'],
+        'outputs': ['YCD_FARMER_GUIDE_PITCH_DECK.pdf']
+    },
+    'deployment-costs': {
+        'script': 'generate_deployment_costs_bw.py',
+        'inputs': [],
+        'outputs': ['YCD_Deployment_Costs_FCFA.pdf']
+    },
+    'agritech-challenge': {
+        'script': 'competition_docs/generate_agritech_challenge.py',
+        'inputs': [],
+        'outputs': ['competition_docs/YCD_FarmerGuide_AgriTechChallenge_2026.pdf']
+    },
+    'auyair-submission': {
+        'script': 'competition_docs/generate_auyair_submission.py',
+        'inputs': [],
+        'outputs': ['competition_docs/YCD_FarmerGuide_AUYAIR_2026.pdf']
+    }
+}
+
+def load_manifest():
+    if not os.path.exists(MANIFEST):
+        return {'files': {}, 'targets': {}}
+    with open(MANIFEST, 'r', encoding='utf-8') as f:
+        return json.load(f)
+
+def save_manifest(manifest):
+    tmp_path = MANIFEST + '.tmp'
+    with open(tmp_path, 'w', encoding='utf-8') as f:
+        json.dump(manifest, f, indent=2, sort_keys=True)
+    os.replace(tmp_path, MANIFEST)
+
+def file_hash(path, cache):
+    """sha256 of a file, reusing the cached digest while size and mtime are unchanged."""
+    stat = os.stat(os.path.join(ROOT, path))
+    entry = cache.get(path)
+    if entry and entry['size'] == stat.st_size and entry['mtime_ns'] == stat.st_mtime_ns:
+        return entry['sha256']
+    digest = hashlib.sha256()
+    with open(os.path.join(ROOT, path), 'rb') as f:
+        for block in iter(lambda: f.read(1 << 20), b''):
+            digest.update(block)
+    cache[path] = {'size': stat.st_size, 'mtime_ns': stat.st_mtime_ns, 'sha256': digest.hexdigest()}
+    return cache[path]['sha256']
+
+def target_inputs(target):
+    """Script plus every file matched by the input patterns, sorted."""
+    paths = {target['script']}
+    for pattern in target['inputs']:
+        matches = glob.glob(os.path.join(ROOT, pattern))
+        paths.update(os.path.relpath(m, ROOT).replace(os.sep, '/') for m in matches)
+    return sorted(paths)
+
+def inputs_hash(target, cache):
+    digest = hashlib.sha256()
+    for path in target_inputs(target):
+        digest.update(f'{path}\0{file_hash(path, cache)}\n'.encode('utf-8'))
+    return digest.hexdigest()
+
+def stale_reason(name, target, manifest):
+    """Why a target must be rebuilt, or None if it is up to date."""
+    recorded = manifest['targets'].get(name)
+    if recorded is None:
+        return 'never built'
+    if recorded['inputs'] != inputs_hash(target, manifest['files']):
+        return 'inputs changed'
+    for output in target['outputs']:
+        if not os.path.exists(os.path.join(ROOT, output)):
+            return f'{output} missing'
+        if recorded['outputs'].get(output) != file_hash(output, manifest['files']):
+            return f'{output} modified'
+    return None
+
+def build_target(name, target):
+    """Run one generator in its own interpreter; returns (name, ok, seconds, log tail)."""
+    script = os.path.join(ROOT, target['script'])
+    start = time.perf_counter()
+    proc = subprocess.run([sys.executable, script], cwd=os.path.dirname(script),
+                          capture_output=True, text=True, encoding='utf-8', errors='replace')
+    elapsed = time.perf_counter() - start
+    missing = [o for o in target['outputs'] if not os.path.exists(os.path.join(ROOT, o))]
+    ok = proc.returncode == 0 and not missing
+    log = (proc.stdout + proc.stderr).strip().splitlines()[-5:]
+    return name, ok, elapsed, log
+
+def build(names=None, force=False, jobs=None, dry_run=False):
+    manifest = load_manifest()
+    names = names or list(TARGETS)
+    unknown = [n for n in names if n not in TARGETS]
+    if unknown:
+        raise RuntimeError(f"Unknown targets: {', '.join(unknown)}")
+
+    todo = {}
+    for name in names:
+        reason = 'forced' if force else stale_reason(name, TARGETS[name], manifest)
+        if reason:
+            todo[name] = reason
+        else:
+            print(f"⏭  {name}: up to date")
+    if dry_run or not todo:
+        for name, reason in todo.items():
+            print(f"🔄 {name}: would build ({reason})")
+        return True
+
+    # Hash inputs before building so edits made during the build trigger the next one
+    hashes = {name: inputs_hash(TARGETS[name], manifest['files']) for name in todo}
+    failed = []
+    start = time.perf_counter()
+    with ThreadPoolExecutor(max_workers=jobs or os.cpu_count()) as pool:
+        futures = [pool.submit(build_target, name, TARGETS[name]) for name in todo]
+        for future in futures:
+            name, ok, elapsed, log = future.result()
+            if ok:
+                outputs = {o: file_hash(o, manifest['files']) for o in TARGETS[name]['outputs']}
+                manifest['targets'][name] = {'inputs': hashes[name], 'outputs': outputs,
+                                             'built': time.strftime('%Y-%m-%dT%H:%M:%S')}
+                print(f"✅ {name}: built in {elapsed:.1f}s ({todo[name]})")
+            else:
+                failed.append(name)
+                manifest['targets'].pop(name, None)
+                print(f"❌ {name}: failed after {elapsed:.1f}s")
+                for line in log:
+                    print(f"   {line}")
+    save_manifest(manifest)
+    print(f"\n{len(todo) - len(failed)} built, {len(failed)} failed, {len(names) - len(todo)} skipped "
+          f"in {time.perf_counter() - start:.1f}s")
+    return not failed
+
+def main():
+    parser = argparse.ArgumentParser(description='Build the PDF documents that are out of date')
+    parser.add_argument('targets', nargs='*', help=f"Targets to build (default: all): {', '.join(TARGETS)}")
+    parser.add_argument('--force', action='store_true', help='Rebuild even if up to date')
+    parser.add_argument('--jobs', '-j', type=int, help='Parallel builds (default: CPU count)')
+    parser.add_argument('--dry-run', '-n', action='store_true', help='Only show what would be built')
+    parser.add_argument('--list', action='store_true', help='List targets with their inputs')
+    args = parser.parse_args()
+
+    if args.list:
+        for name, target in TARGETS.items():
+            print(f"{name}: {', '.join(target_inputs(target))} -> {', '.join(target['outputs'])}")
+        return
+    try:
+        if not build(args.targets, args.force, args.jobs, args.dry_run):
+            exit(1)
+    except Exception as e:
+        print(f"❌ Error: {e}")
+        exit(1)
+
+if __name__ == '__main__':
+    main()
@@ -4,32 +4,215 @@ Convert Markdown with SVG graphics to PDF using reportlab and svglib
 """
 import os
 import re
+from xml.sax.saxutils import escape
 from reportlab.lib.pagesizes import letter
 from reportlab.lib.styles import getSampleStyleSheet, ParagraphStyle
 from reportlab.lib.units import inch
-from reportlab.platypus import SimpleDocTemplate, Paragraph, Spacer, Image, PageBreak
+from reportlab.platypus import SimpleDocTemplate, Paragraph, Image, Preformatted, Table, TableStyle
 from reportlab.lib import colors
-from reportlab.lib.enums import TA_CENTER, TA_JUSTIFY
-from svglib.svglib import svg2rlg
-from reportlab.graphics import renderPDF
+from reportlab.lib.enums import TA_CENTER, TA_JUSTIFY, TA_LEFT, TA_RIGHT
+from svg_cache import load_drawing
+from pdf_images import optimize_image, format_report
+
+ALIGNMENTS = {'LEFT': TA_LEFT, 'CENTER': TA_CENTER, 'RIGHT': TA_RIGHT}
 
 def convert_svg_to_pdf_image(svg_path):
-    """Convert SVG to drawable using svglib"""
+    """Convert SVG to drawable using svglib, reusing the cached conversion when the file is unchanged"""
     try:
-        drawing = svg2rlg(svg_path)
+        drawing = load_drawing(svg_path)
         if drawing:
             return drawing
     except Exception as e:
         print(f"Warning: Could not convert {svg_path}: {e}")
     return None
 
-def md_to_pdf():
+# Line-level block syntax. Each alternative is wrapped in an outer group, so
+# match.lastgroup names the block type of the line in one match
+LINE_RE = re.compile(r"""
+    (?P<fenced>(?P<fence>```|~~~)[^`]*)$
+  | (?P<heading>(?P<hashes>\#{1,6})\s+(?P<title>.*?)\s*\#*)$
+  | (?P<rule>(?:-\s*){3,}|(?:\*\s*){3,}|(?:_\s*){3,})$
+  | (?P<image>!\[(?P<alt>[^\]]*)\]\((?P<src>[^)\s]+)(?:\s+"[^"]*")?\))$
+  | (?P<item>(?P<marker>[-*+]|\d{1,9}[.)])\s+(?P<text>.*))
+  | (?P<row>\|.*)
+  | (?P<placeholder>\[INSERT[^\]]*\])$
+""", re.VERBOSE)
+# First characters that can start a non-paragraph line; anything else skips LINE_RE
+BLOCK_START_CHARS = frozenset('`~#-*_+!|[0123456789')
+TABLE_SEPARATOR_RE = re.compile(r'^\|?\s*:?-{3,}:?\s*(\|\s*:?-{3,}:?\s*)*\|?$')
+# The leading lookahead lets the scan skip plain text without trying every alternative
+INLINE_RE = re.compile(r"""
+    (?=[`\[*_])
+    (?:
+    `(?P<code>[^`]+)`
+  | (?P<link>\[(?P<label>[^\]]+)\]\((?P<href>[^)\s]+)\))
+  | \*\*(?P<bold>.+?)\*\*
+  | __(?P<underline>.+?)__
+  | (?<![\w*])\*(?P<em>[^*\s](?:.*?[^*\s])?)\*(?![\w*])
+  | (?<![\w_])_(?P<em2>[^_\s](?:.*?[^_\s])?)_(?![\w_])
+    )
+""", re.VERBOSE)
+INLINE_TAGS = {'bold': 'b', 'underline': 'u', 'em': 'i', 'em2': 'i'}
+
+def split_row(line):
+    """Cells of a pipe table row; escaped pipes stay in the cell."""
+    line = line.strip()
+    if line.startswith('|'):
+        line = line[1:]
+    if line.endswith('|') and not line.endswith('\\|'):
+        line = line[:-1]
+    return [cell.strip().replace('\\|', '|') for cell in re.split(r'(?<!\\)\|', line)]
+
+def tokenize(md_content):
+    """Single pass over the markdown yielding (kind, line number, payload) blocks.
+
+    Kinds: heading (level, text), paragraph text, list [(marker, text)],
+    image (alt, path), table (header, alignments, rows) and code text.
+    Rules and [INSERT ...] placeholders produce no block.
+    """
+    lines = md_content.splitlines()
+    paragraph, items, start = [], [], 0
+    i = 0
+
+    def flush():
+        if paragraph:
+            yield 'paragraph', start, ' '.join(paragraph)
+            paragraph.clear()
+        if items:
+            yield 'list', start, list(items)
+            items.clear()
+
+    while i < len(lines):
+        line_no, stripped = i + 1, lines[i].strip()
+        i += 1
+        if not stripped:
+            yield from flush()
+            continue
+        match = LINE_RE.match(stripped) if stripped[0] in BLOCK_START_CHARS else None
+        kind = match.lastgroup if match else None
+        if kind == 'fenced':
+            yield from flush()
+            fence, body = match.group('fence'), []
+            while i < len(lines) and not lines[i].strip().startswith(fence):
+                body.append(lines[i])
+                i += 1
+            i += 1
+            yield 'code', line_no, '\n'.join(body)
+        elif kind == 'heading':
+            yield from flush()
+            yield 'heading', line_no, (len(match.group('hashes')), match.group('title'))
+        elif kind == 'rule' or kind == 'placeholder':
+            yield from flush()
+        elif kind == 'image':
+            yield from flush()
+            yield 'image', line_no, (match.group('alt'), match.group('src'))
+        elif kind == 'item':
+            if paragraph:
+                yield from flush()
+            if not items:
+                start = line_no
+            marker = match.group('marker')
+            items.append(('•' if marker in '-*+' else marker, match.group('text')))
+        elif kind == 'row' and i < len(lines) and TABLE_SEPARATOR_RE.match(lines[i].strip()):
+            yield from flush()
+            header = split_row(stripped)
+            aligns = []
+            for cell in split_row(lines[i]):
+                cell = cell.strip()
+                aligns.append('CENTER' if cell.startswith(':') and cell.endswith(':')
+                              else 'RIGHT' if cell.endswith(':') else 'LEFT')
+            i += 1
+            rows = []
+            while i < len(lines) and lines[i].strip().startswith('|'):
+                rows.append(split_row(lines[i]))
+                i += 1
+            yield 'table', line_no, (header, aligns, rows)
+        else:
+            if items:
+                yield from flush()
+            if not paragraph:
+                start = line_no
+            paragraph.append(stripped)
+    yield from flush()
+
+def render_inline(text):
+    """Markdown inline markup to ReportLab paragraph markup, escaping everything else."""
+    out, pos = [], 0
+    for match in INLINE_RE.finditer(text):
+        out.append(escape(text[pos:match.start()]))
+        kind = match.lastgroup
+        if kind == 'code':
+            out.append(f'<font face="Courier">{escape(match.group("code"))}</font>')
+        elif kind == 'link':
+            out.append(f'<link href="{escape(match.group("href"), {chr(34): "&quot;"})}" color="#1a5fb4">'
+                       f'{render_inline(match.group("label"))}</link>')
+        else:
+            tag = INLINE_TAGS[kind]
+            out.append(f'<{tag}>{render_inline(match.group(kind))}</{tag}>')
+        pos = match.end()
+    out.append(escape(text[pos:]))
+    return ''.join(out)
+
+def image_flowable(img_path, max_width, max_height, image_report=None):
+    """SVG charts as vector drawings, other images as bitmaps, scaled to fit the box.
+
+    Bitmaps are downsampled for the size they are drawn at before embedding;
+    the savings are appended to image_report.
+    """
+    if not os.path.exists(img_path):
+        print(f"Warning: Image not found: {img_path}")
+        return None
+    if img_path.lower().endswith('.svg'):
+        drawing = convert_svg_to_pdf_image(img_path)
+        if not drawing:
+            return None
+        orig_width, orig_height = drawing.width, drawing.height
+        scale_x = max_width / orig_width if orig_width else 1
+        scale_y = max_height / orig_height if orig_height else 1
+        scale = min(scale_x, scale_y)
+        drawing.width = orig_width * scale
+        drawing.height = orig_height * scale
+        drawing.scale(scale, scale)
+        return drawing
+    optimized = optimize_image(img_path, max_width, max_height)
+    width, height = optimized['before_px']
+    scale = min(max_width / width, max_height / height, 1)
+    if image_report is not None:
+        image_report.append(optimized)
+    return Image(optimized['path'], width=width * scale, height=height * scale)
+
+def table_flowable(header, aligns, rows, width, cell_style):
+    """Pipe table as a Table styled like the WeasyPrint pitch CSS (grey header, striped rows)."""
+    columns = len(header)
+    aligns = (aligns + ['LEFT'] * columns)[:columns]
+    cell_styles = [ParagraphStyle(f'TableCell{a}', parent=cell_style, alignment=ALIGNMENTS[a]) for a in aligns]
+    data = []
+    for r, row in enumerate([header] + rows):
+        row = row + [''] * (columns - len(row))
+        cells = [render_inline(c) for c in row[:columns]]
+        if r == 0:
+            cells = [f'<b>{c}</b>' for c in cells]
+        data.append([Paragraph(c, s) for c, s in zip(cells, cell_styles)])
+
+    table = Table(data, colWidths=[width / columns] * columns, repeatRows=1)
+    commands = [
+        ('BACKGROUND', (0, 0), (-1, 0), colors.HexColor('#f0f0f0')),
+        ('GRID', (0, 0), (-1, -1), 0.5, colors.HexColor('#dddddd')),
+        ('VALIGN', (0, 0), (-1, -1), 'TOP'),
+        ('TOPPADDING', (0, 0), (-1, -1), 3),
+        ('BOTTOMPADDING', (0, 0), (-1, -1), 3)
+    ]
+    commands += [('BACKGROUND', (0, r), (-1, r), colors.HexColor('#f9f9f9')) for r in range(2, len(data), 2)]
+    table.setStyle(TableStyle(commands))
+    table.spaceBefore, table.spaceAfter = 4, 6
+    return table
+
+def md_to_pdf(md_file='YCD_FARMER_GUIDE_PITCH.md', pdf_file='YCD_Pitch_Final_v2.pdf'):
     # Read the markdown file
-    with open('YCD_FARMER_GUIDE_PITCH.md', 'r', encoding='utf-8') as f:
+    with open(md_file, 'r', encoding='utf-8') as f:
         md_content = f.read()
 
     # Create PDF with tighter margins
-    pdf_file = 'YCD_Pitch_Final_v2.pdf'
     doc = SimpleDocTemplate(pdf_file, pagesize=letter,
                             rightMargin=0.4*inch, leftMargin=0.4*inch,
                             topMargin=0.5*inch, bottomMargin=0.5*inch)
@@ -92,92 +275,68 @@ def md_to_pdf():
         leading=10
     )
 
-    # Split content into lines
-    lines = md_content.split('\n')
-    
-    for line in lines:
-        stripped = line.strip()
-        
-        # Skip empty lines
-        if not stripped:
-            continue
-        
-        # Title
-        if stripped.startswith('# ') and not stripped.startswith('##'):
-            title = stripped[2:].strip()
-            story.append(Paragraph(title, title_style))
-        
-        # Heading 2 - NO page breaks
-        elif stripped.startswith('## ') and not stripped.startswith('###'):
-            heading = stripped[3:].strip()
-            story.append(Paragraph(heading, heading2_style))
-        
-        # Heading 3
-        elif stripped.startswith('### '):
-            heading = stripped[4:].strip()
-            story.append(Paragraph(heading, heading3_style))
-        
-        # Image reference
-        elif stripped.startswith('![') and '.svg)' in stripped:
-            match = re.search(r'!\[(.*?)\]\((.*?)\)', stripped)
-            if match:
-                img_caption = match.group(1)
-                img_path = match.group(2)
-                
-                if os.path.exists(img_path):
-                    try:
-                        drawing = convert_svg_to_pdf_image(img_path)
-                        if drawing:
-                            # Scale to fit nicely
-                            target_width = 4.5 * inch
-                            target_height = 2.5 * inch
-                            orig_width = drawing.width
-                            orig_height = drawing.height
-                            scale_x = target_width / orig_width if orig_width else 1
-                            scale_y = target_height / orig_height if orig_height else 1
-                            scale = min(scale_x, scale_y)
-                            drawing.width = orig_width * scale
-                            drawing.height = orig_height * scale
-                            drawing.scale(scale, scale)
-                            story.append(drawing)
-                            if img_caption:
-                                cap_style = ParagraphStyle('Caption', parent=styles['Normal'], fontSize=7, textColor=colors.HexColor('#666'), alignment=TA_CENTER, spaceAfter=2)
-                                story.append(Paragraph(f"<i>{img_caption}</i>", cap_style))
-                        else:
-                            story.append(Paragraph(f"[Chart: {os.path.basename(img_path)}]", body_style))
-                    except Exception as e:
-                        story.append(Paragraph(f"[Chart: {img_path}]", body_style))
-        
-        # Bullet points
-        elif stripped.startswith('- '):
-            bullet_text = stripped[2:].strip()
-            # Clean markdown formatting properly
-            bullet_text = re.sub(r'\*\*(.*?)\*\*', r'<b>\1</b>', bullet_text)
-            bullet_text = re.sub(r'__(.*?)__', r'<u>\1</u>', bullet_text)
-            bullet_text = re.sub(r'_(.*?)_', r'<i>\1</i>', bullet_text)
-            story.append(Paragraph(f"• {bullet_text}", bullet_style))
-        
-        # Page break - skip markdown separators
-        elif stripped == '---':
-            continue
-        
-        # Skip markers and tables
-        elif (stripped.startswith('[INSERT') or stripped.startswith('_') or 
-              stripped.startswith('|') or stripped.startswith('```')):
-            continue
-        
-        # Regular text
-        else:
-            if not stripped.startswith('#') and stripped:
-                # Clean markdown properly using regex
-                text = re.sub(r'\*\*(.*?)\*\*', r'<b>\1</b>', stripped)
-                text = re.sub(r'__(.*?)__', r'<u>\1</u>', text)
-                text = re.sub(r'_(.*?)_', r'<i>\1</i>', text)
-                
-                try:
-                    story.append(Paragraph(text, body_style))
-                except:
-                    pass
+    caption_style = ParagraphStyle(
+        'Caption',
+        parent=styles['Normal'],
+        fontSize=7,
+        textColor=colors.HexColor('#666'),
+        alignment=TA_CENTER,
+        spaceAfter=2
+    )
+
+    code_style = ParagraphStyle(
+        'CodeBlock',
+        parent=styles['Code'],
+        fontSize=7.5,
+        leading=9,
+        backColor=colors.HexColor('#f4f4f4'),
+        borderPadding=4,
+        spaceBefore=4,
+        spaceAfter=6
+    )
+
+    cell_style = ParagraphStyle(
+        'TableCell',
+        parent=body_style,
+        fontSize=8,
+        leading=9.5,
+        alignment=TA_LEFT,
+        spaceAfter=0
+    )
+
+    heading_styles = {1: title_style, 2: heading2_style, 3: heading3_style}
+    image_report = []
+
+    for kind, line_no, payload in tokenize(md_content):
+        try:
+            if kind == 'heading':
+                level, text = payload
+                story.append(Paragraph(render_inline(text), heading_styles[min(level, 3)]))
+
+            elif kind == 'paragraph':
+                story.append(Paragraph(render_inline(payload), body_style))
+
+            elif kind == 'list':
+                for marker, text in payload:
+                    story.append(Paragraph(f"{marker} {render_inline(text)}", bullet_style))
+
+            elif kind == 'image':
+                img_caption, img_path = payload
+                flowable = image_flowable(img_path, 4.5 * inch, 2.5 * inch, image_report)
+                if flowable is None:
+                    story.append(Paragraph(f"[Chart: {escape(os.path.basename(img_path))}]", body_style))
+                    continue
+                story.append(flowable)
+                if img_caption:
+                    story.append(Paragraph(f"<i>{render_inline(img_caption)}</i>", caption_style))
+
+            elif kind == 'table':
+                story.append(table_flowable(*payload, doc.width, cell_style))
+
+            elif kind == 'code':
+                story.append(Preformatted(payload, code_style))
+        except Exception as e:
+            raise RuntimeError(f"Failed to render {kind} at line {line_no}: {str(e)}")
 
     # Build PDF
     try:
@@ -189,6 +348,8 @@ def md_to_pdf():
         print(f"📄 File: {pdf_file}")
         print(f"📊 Size: {file_size:.2f} MB")
         print(f"📍 Location: {os.path.abspath(pdf_file)}")
+        for line in format_report(image_report):
+            print(line)
         print(f"{'='*60}\n")
         return True
     except Exception as e:
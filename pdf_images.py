@@ -0,0 +1,153 @@
+#!/usr/bin/env python3
+"""
+Downsample and recompress raster images before they are embedded in a PDF
+
+Images are resized to the target DPI at the size they are printed, then
+written as JPEG when they look like photographs and as PNG (Flate) when they
+have transparency or few colours. Results are cached by content hash and
+settings, and each call reports the bytes saved.
+"""
+import argparse
+import hashlib
+import json
+import math
+import os
+from io import BytesIO
+
+from PIL import Image as PILImage, ImageOps
+
+CACHE_DIR = os.path.join(os.path.dirname(os.path.abspath(__file__)), '.pdf_image_cache')
+CACHE_VERSION = 1
+DEFAULT_DPI = 150
+DEFAULT_JPEG_QUALITY = 80
+RASTER_EXTENSIONS = ('.png', '.jpg', '.jpeg', '.gif', '.bmp', '.tif', '.tiff', '.webp')
+# Images with at most this many distinct colours (charts, logos, screenshots) stay lossless
+MAX_FLATE_COLORS = 256
+
+def is_raster(path):
+    return path.lower().endswith(RASTER_EXTENSIONS)
+
+def target_pixels(size, width_pt=None, height_pt=None, dpi=DEFAULT_DPI):
+    """Pixel size for printing at dpi within width_pt x height_pt, keeping the aspect ratio; never upscales."""
+    width, height = size
+    scale = 1.0
+    if width_pt:
+        scale = min(scale, math.ceil(width_pt / 72 * dpi) / width)
+    if height_pt:
+        scale = min(scale, math.ceil(height_pt / 72 * dpi) / height)
+    return max(1, round(width * scale)), max(1, round(height * scale))
+
+def choose_format(image, source_format):
+    """'JPEG' for photographic content, 'PNG' for transparency and flat-colour graphics."""
+    if image.mode in ('RGBA', 'LA', 'PA') or 'transparency' in image.info:
+        return 'PNG'
+    if source_format == 'JPEG':
+        return 'JPEG'
+    if image.mode in ('1', 'P'):
+        return 'PNG'
+    return 'PNG' if image.getcolors(MAX_FLATE_COLORS) is not None else 'JPEG'
+
+def encode(image, fmt, quality):
+    out = BytesIO()
+    if fmt == 'JPEG':
+        if image.mode not in ('RGB', 'L'):
+            image = image.convert('RGB')
+        image.save(out, 'JPEG', quality=quality, optimize=True, progressive=True)
+    else:
+        image.save(out, 'PNG', optimize=True)
+    return out.getvalue()
+
+def _store(path, data):
+    tmp_path = f'{path}.{os.getpid()}.tmp'
+    with open(tmp_path, 'wb') as f:
+        f.write(data)
+    os.replace(tmp_path, path)
+
+def optimize_image(path, width_pt=None, height_pt=None, dpi=DEFAULT_DPI, quality=DEFAULT_JPEG_QUALITY,
+                   cache_dir=CACHE_DIR):
+    """Optimized copy of a raster image for the given printed size (points).
+
+    Returns a dict with the cached file to embed ('path') and the before/after
+    bytes and pixel sizes. The original is kept when recompressing would not
+    make it smaller and it already fits the target resolution.
+    """
+    with open(path, 'rb') as f:
+        data = f.read()
+    settings = f'{CACHE_VERSION}/{width_pt}/{height_pt}/{dpi}/{quality}'
+    key = hashlib.sha256(settings.encode('utf-8') + b'\0' + data).hexdigest()
+    meta_path = os.path.join(cache_dir, f'{key}.json')
+    if os.path.exists(meta_path):
+        with open(meta_path, 'r', encoding='utf-8') as f:
+            result = json.load(f)
+        result['path'] = os.path.join(cache_dir, result['file'])
+        if os.path.exists(result['path']):
+            return dict(result, source=path, cached=True)
+
+    try:
+        image = PILImage.open(BytesIO(data))
+        source_format = image.format
+        image = ImageOps.exif_transpose(image)
+    except Exception as e:
+        raise RuntimeError(f"Failed to read image {path}: {str(e)}")
+
+    original_size = image.size
+    size = target_pixels(original_size, width_pt, height_pt, dpi)
+    resized = size != original_size
+    if resized:
+        image = image.resize(size, PILImage.LANCZOS)
+    fmt = choose_format(image, source_format)
+    encoded = encode(image, fmt, quality)
+
+    if not resized and len(encoded) >= len(data) and source_format in ('JPEG', 'PNG'):
+        fmt, encoded = source_format, data
+    ext = '.jpg' if fmt == 'JPEG' else '.png'
+
+    os.makedirs(cache_dir, exist_ok=True)
+    result = {
+        'file': key + ext,
+        'format': fmt,
+        'before_bytes': len(data),
+        'after_bytes': len(encoded),
+        'before_px': list(original_size),
+        'after_px': list(size)
+    }
+    _store(os.path.join(cache_dir, result['file']), encoded)
+    _store(meta_path, json.dumps(result).encode('utf-8'))
+    return dict(result, path=os.path.join(cache_dir, result['file']), source=path, cached=False)
+
+def format_report(results):
+    """One line per image plus a total, as printed by the PDF scripts."""
+    lines = []
+    for r in results:
+        saved = r['before_bytes'] - r['after_bytes']
+        lines.append(f"🖼️  {os.path.basename(r['source'])}: {r['before_px'][0]}x{r['before_px'][1]} "
+                     f"{r['before_bytes'] / 1024:.0f} KB -> {r['after_px'][0]}x{r['after_px'][1]} {r['format']} "
+                     f"{r['after_bytes'] / 1024:.0f} KB (saved {saved / 1024:.0f} KB, "
+                     f"{100 * saved / max(r['before_bytes'], 1):.0f}%)")
+    if results:
+        before = sum(r['before_bytes'] for r in results)
+        after = sum(r['after_bytes'] for r in results)
+        lines.append(f"📉 Images: {before / 1024 / 1024:.2f} MB -> {after / 1024 / 1024:.2f} MB")
+    return lines
+
+def main():
+    parser = argparse.ArgumentParser(description='Downsample images for PDF embedding and report the savings')
+    parser.add_argument('images', nargs='+', help='Raster images')
+    parser.add_argument('--width-in', type=float, help='Printed width in inches')
+    parser.add_argument('--height-in', type=float, help='Printed height in inches')
+    parser.add_argument('--dpi', type=int, default=DEFAULT_DPI, help='Target resolution at the printed size')
+    parser.add_argument('--quality', type=int, default=DEFAULT_JPEG_QUALITY, help='JPEG quality')
+    args = parser.parse_args()
+
+    try:
+        width_pt = args.width_in * 72 if args.width_in else None
+        height_pt = args.height_in * 72 if args.height_in else None
+        results = [optimize_image(p, width_pt, height_pt, args.dpi, args.quality) for p in args.images]
+        for line in format_report(results):
+            print(line)
+    except Exception as e:
+        print(f"❌ Error: {e}")
+        exit(1)
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,151 @@
+#!/usr/bin/env python3
+"""
+Render many Markdown documents to PDF in one WeasyPrint session
+
+The stylesheet is parsed once into a CSS object bound to a single
+FontConfiguration, and images are cached across documents, so every
+document after the first only pays for its own layout.
+"""
+import argparse
+import os
+import re
+import time
+from html import escape, unescape
+from pathlib import Path
+from urllib.parse import unquote, urlparse
+
+import markdown2
+from weasyprint import CSS, HTML
+
+try:
+    from weasyprint.text.fonts import FontConfiguration
+except ImportError:
+    from weasyprint.fonts import FontConfiguration
+
+from pdf_images import DEFAULT_DPI, format_report, is_raster, optimize_image
+
+ROOT = os.path.dirname(os.path.abspath(__file__))
+DEFAULT_CSS = os.path.join(ROOT, 'styles', 'pitch_deck.css')
+DEFAULT_EXTRAS = ['fenced-code-blocks', 'tables', 'toc']
+TITLE_RE = re.compile(r'^#\s+(.+?)\s*#*$', re.MULTILINE)
+IMG_SRC_RE = re.compile(r'(<img\b[^>]*?\bsrc=")([^"]+)(")')
+# Widest an image can print: A4 minus the narrowest margins in styles/
+MAX_IMAGE_WIDTH_MM = 180
+
+PAGE_TEMPLATE = """<!DOCTYPE html>
+<html lang="en">
+<head>
+    <meta charset="UTF-8">
+    <title>{title}</title>
+</head>
+<body>
+{body}
+</body>
+</html>"""
+
+class BatchRenderer:
+    """Markdown -> PDF with one parsed stylesheet and font configuration for every document."""
+
+    def __init__(self, css_path=DEFAULT_CSS, extras=None, image_dpi=DEFAULT_DPI,
+                 max_image_width_mm=MAX_IMAGE_WIDTH_MM):
+        start = time.perf_counter()
+        self.font_config = FontConfiguration()
+        self.stylesheet = CSS(filename=str(css_path), font_config=self.font_config)
+        self.extras = extras or DEFAULT_EXTRAS
+        # WeasyPrint's image cache; the pitch documents share the graphics/ charts
+        self.image_cache = {}
+        # Raster images are downsampled to this DPI at the full content width before layout
+        self.image_dpi = image_dpi
+        self.max_image_width_pt = max_image_width_mm / 25.4 * 72
+        self.image_report = []
+        self.setup_seconds = time.perf_counter() - start
+
+    def to_html(self, md_path):
+        with open(md_path, 'r', encoding='utf-8') as f:
+            md_content = f.read()
+        title = TITLE_RE.search(md_content)
+        body = markdown2.markdown(md_content, extras=self.extras)
+        return PAGE_TEMPLATE.format(title=escape(title.group(1) if title else os.path.basename(md_path)), body=body)
+
+    def optimize_images(self, html, base_dir):
+        """Point local raster <img> sources at downsampled copies; records savings in image_report."""
+        def replace(match):
+            src = unescape(match.group(2))
+            parsed = urlparse(src)
+            if parsed.scheme not in ('', 'file') or not is_raster(parsed.path):
+                return match.group(0)
+            path = os.path.join(base_dir, unquote(parsed.path))
+            if not os.path.exists(path):
+                return match.group(0)
+            optimized = optimize_image(path, self.max_image_width_pt, dpi=self.image_dpi)
+            self.image_report.append(optimized)
+            return f'{match.group(1)}{escape(Path(optimized["path"]).as_uri())}{match.group(3)}'
+        return IMG_SRC_RE.sub(replace, html)
+
+    def render(self, md_path, pdf_path):
+        """Render one document; relative image paths resolve against the Markdown file's directory."""
+        md_path, pdf_path = os.path.abspath(md_path), os.path.abspath(pdf_path)
+        base_dir = os.path.dirname(md_path)
+        document = HTML(string=self.optimize_images(self.to_html(md_path), base_dir), base_url=base_dir)
+        tmp_path = pdf_path + '.tmp'
+        try:
+            document.write_pdf(tmp_path, stylesheets=[self.stylesheet], font_config=self.font_config,
+                               cache=self.image_cache)
+            os.replace(tmp_path, pdf_path)
+        except Exception as e:
+            if os.path.exists(tmp_path):
+                os.remove(tmp_path)
+            raise RuntimeError(f"Failed to render {md_path}: {str(e)}")
+        return os.path.getsize(pdf_path)
+
+def output_paths(inputs, outputs=None, out_dir=None):
+    """Outputs in input order: explicit --output values, else <input stem>.pdf (in out_dir if given)."""
+    outputs = list(outputs or [])
+    if len(outputs) > len(inputs):
+        raise RuntimeError(f"{len(outputs)} outputs given for {len(inputs)} inputs")
+    for md_path in inputs[len(outputs):]:
+        stem = os.path.splitext(os.path.basename(md_path))[0]
+        outputs.append(os.path.join(out_dir or os.path.dirname(os.path.abspath(md_path)), f'{stem}.pdf'))
+    return outputs
+
+def main():
+    parser = argparse.ArgumentParser(description='Render Markdown documents to PDF with a shared stylesheet')
+    parser.add_argument('inputs', nargs='+', help='Markdown files')
+    parser.add_argument('--output', '-o', action='append',
+                        help='Output PDF for the input in the same position (repeatable; default: <input>.pdf)')
+    parser.add_argument('--out-dir', help='Directory for outputs not given with --output')
+    parser.add_argument('--css', default=DEFAULT_CSS, help='Stylesheet shared by every document')
+    parser.add_argument('--extras', help=f"Comma-separated markdown2 extras (default: {','.join(DEFAULT_EXTRAS)})")
+    parser.add_argument('--image-dpi', type=int, default=DEFAULT_DPI, help='Resolution for embedded raster images')
+    args = parser.parse_args()
+
+    try:
+        outputs = output_paths(args.inputs, args.output, args.out_dir)
+        if args.out_dir:
+            os.makedirs(args.out_dir, exist_ok=True)
+        renderer = BatchRenderer(args.css, args.extras.split(',') if args.extras else None, args.image_dpi)
+        print(f"🎨 Stylesheet {os.path.basename(args.css)} parsed in {renderer.setup_seconds:.2f}s")
+
+        failed = 0
+        start = time.perf_counter()
+        for md_path, pdf_path in zip(args.inputs, outputs):
+            doc_start = time.perf_counter()
+            try:
+                renderer.image_report.clear()
+                size = renderer.render(md_path, pdf_path)
+                print(f"✅ {md_path} -> {pdf_path} ({size / 1024 / 1024:.2f} MB, "
+                      f"{time.perf_counter() - doc_start:.1f}s)")
+                for line in format_report(renderer.image_report):
+                    print(f"   {line}")
+            except Exception as e:
+                failed += 1
+                print(f"❌ {e}")
+        print(f"\n📄 {len(outputs) - failed}/{len(outputs)} documents in {time.perf_counter() - start:.1f}s")
+        if failed:
+            exit(1)
+    except Exception as e:
+        print(f"❌ Error: {e}")
+        exit(1)
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,90 @@
+#!/usr/bin/env python3
+"""
+Persistent cache of SVG graphics converted to ReportLab drawings
+
+Entries are keyed by the SVG's content hash (plus the svglib/ReportLab
+versions that produced them), so an edited chart is converted again and an
+unchanged one is loaded from disk instead of being re-parsed. The WeasyPrint
+scripts embed SVG files directly and do not use this cache.
+"""
+import argparse
+import glob
+import hashlib
+import os
+import pickle
+import time
+
+import reportlab
+import svglib
+from svglib.svglib import svg2rlg
+
+CACHE_DIR = os.path.join(os.path.dirname(os.path.abspath(__file__)), '.svg_cache')
+CACHE_VERSION = 1
+_TOOLCHAIN = f'{CACHE_VERSION}/svglib-{svglib.__version__}/reportlab-{reportlab.Version}'
+
+def svg_key(svg_path):
+    """Content hash of the SVG combined with the converter versions."""
+    digest = hashlib.sha256(_TOOLCHAIN.encode('utf-8'))
+    with open(svg_path, 'rb') as f:
+        digest.update(f.read())
+    return digest.hexdigest()
+
+def _entry_path(key, suffix, cache_dir):
+    return os.path.join(cache_dir, key[:2], f'{key}{suffix}')
+
+def _store(path, data):
+    os.makedirs(os.path.dirname(path), exist_ok=True)
+    tmp_path = f'{path}.{os.getpid()}.tmp'
+    with open(tmp_path, 'wb') as f:
+        f.write(data)
+    os.replace(tmp_path, path)
+
+def load_drawing(svg_path, cache_dir=CACHE_DIR):
+    """ReportLab Drawing for an SVG, from the cache when possible.
+
+    Every call returns a fresh object, so callers may scale or otherwise
+    modify it. Returns None if svglib cannot convert the file.
+    """
+    path = _entry_path(svg_key(svg_path), '.drawing.pickle', cache_dir)
+    if os.path.exists(path):
+        try:
+            with open(path, 'rb') as f:
+                return pickle.load(f)
+        except Exception:
+            # Truncated or written by an incompatible version: convert again
+            os.remove(path)
+
+    drawing = svg2rlg(svg_path)
+    if drawing is not None:
+        _store(path, pickle.dumps(drawing, protocol=pickle.HIGHEST_PROTOCOL))
+    return drawing
+
+def clear(cache_dir=CACHE_DIR):
+    """Delete all cached entries; returns the number of files removed."""
+    removed = 0
+    for path in glob.glob(os.path.join(cache_dir, '*', '*')):
+        os.remove(path)
+        removed += 1
+    return removed
+
+def main():
+    parser = argparse.ArgumentParser(description='Warm or clear the SVG conversion cache')
+    parser.add_argument('svgs', nargs='*', help='SVG files to convert (default: graphics/*.svg)')
+    parser.add_argument('--clear', action='store_true', help='Delete every cached entry first')
+    args = parser.parse_args()
+
+    try:
+        if args.clear:
+            print(f"🗑  Removed {clear()} cached files")
+        root = os.path.dirname(os.path.abspath(__file__))
+        for svg_path in args.svgs or sorted(glob.glob(os.path.join(root, 'graphics', '*.svg'))):
+            start = time.perf_counter()
+            drawing = load_drawing(svg_path)
+            status = '✅' if drawing is not None else '⚠️ '
+            print(f"{status} {os.path.basename(svg_path)}: {(time.perf_counter() - start) * 1000:.1f} ms")
+    except Exception as e:
+        print(f"❌ Error: {e}")
+        exit(1)
+
+if __name__ == '__main__':
+    main()